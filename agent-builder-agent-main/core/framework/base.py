@@ -9,8 +9,11 @@ import json
 import sqlite3
 from fastapi import FastAPI, HTTPException
 import functools
+import inspect
+import threading
 from contextvars import ContextVar
 from loguru import logger
+from ..utils.llm_telemetry import telemetry, LLMCallRecord
 
 
 # Database setup
@@ -34,6 +37,29 @@ CREATE TABLE IF NOT EXISTS sessions (
     start_time TEXT
 )
 ''')
+c.execute('''
+CREATE TABLE IF NOT EXISTS llm_calls (
+    session_id TEXT,
+    model TEXT,
+    started_at REAL,
+    latency_s REAL,
+    total_time_s REAL,
+    time_to_first_token_s REAL,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    total_tokens INTEGER,
+    cached_tokens INTEGER,
+    cache_write_tokens INTEGER,
+    cache_hit INTEGER,
+    retries INTEGER,
+    cost_usd REAL,
+    success INTEGER,
+    error TEXT
+)
+''')
+# Databases created before cache write tracking lack the column
+if 'cache_write_tokens' not in [column[1] for column in c.execute('PRAGMA table_info(llm_calls)')]:
+    c.execute('ALTER TABLE llm_calls ADD COLUMN cache_write_tokens INTEGER')
 conn.commit()
 
 # Context for session management
@@ -48,6 +74,7 @@ class DatabaseHandler:
     def __init__(self):
         self.conn = sqlite3.connect('../../logs.db', check_same_thread=False)
         self.cursor = self.conn.cursor()
+        self.lock = threading.Lock()
 
     def insert_log(self, log_entry: Dict[str, Any]):
         self.cursor.execute('''
@@ -64,7 +91,22 @@ class DatabaseHandler:
         ''', (session_id, datetime.now().isoformat()))
         self.conn.commit()
 
+    def insert_llm_call(self, record: LLMCallRecord):
+        # LLM calls may be recorded from worker threads, so serialise access to the shared connection
+        with self.lock:
+            self.conn.execute('''
+                INSERT INTO llm_calls (session_id, model, started_at, latency_s, total_time_s, time_to_first_token_s,
+                                       prompt_tokens, completion_tokens, total_tokens, cached_tokens,
+                                       cache_write_tokens, cache_hit, retries, cost_usd, success, error)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (record.session_id, record.model, record.started_at, record.latency_s, record.total_time_s,
+                  record.time_to_first_token_s, record.prompt_tokens, record.completion_tokens, record.total_tokens,
+                  record.cached_tokens, record.cache_write_tokens, int(record.cache_hit), record.retries, record.cost_usd, int(record.success),
+                  record.error))
+            self.conn.commit()
+
 db_handler = DatabaseHandler()
+telemetry.add_sink(db_handler.insert_llm_call)
 
 class Logger:
     def __init__(self, unit_name: str):
@@ -119,6 +161,23 @@ class Unit(ABC):
         return UnitResult(success=False, output=msg)
 
     def log_method(self, method):
+        if inspect.iscoroutinefunction(method):
+            # Callers detect coroutine tools with inspect.iscoroutinefunction, so the wrapper must be one too
+            @functools.wraps(method)
+            async def async_wrapper(*args, **kwargs):
+                self.logger.call_stack.append(method.__name__)
+                self.logger.log(f"Calling method: {method.__name__}", "DEBUG")
+                try:
+                    result = await method(*args, **kwargs)
+                    self.logger.log(f"Method {method.__name__} returned: {result}", "DEBUG")
+                    self.logger.call_stack.pop()
+                    return result
+                except Exception as e:
+                    self.logger.log_exception(e)
+                    self.logger.call_stack.pop()
+                    raise
+            return async_wrapper
+
         @functools.wraps(method)
         def wrapper(*args, **kwargs):
             self.logger.call_stack.append(method.__name__)
@@ -245,4 +304,27 @@ async def get_session_logs_tree(session_id: str):
         else:
             root_logs.append(log_dict[log_id])
 
-    return root_logs
\ No newline at end of file
+    return root_logs
+
+@app.get("/sessions/{session_id}/llm_calls")
+async def get_session_llm_calls(session_id: str):
+    cursor = conn.execute('SELECT * FROM llm_calls WHERE session_id = ? ORDER BY started_at', (session_id,))
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+@app.get("/sessions/{session_id}/llm_calls/summary")
+async def get_session_llm_summary(session_id: str):
+    cursor = conn.execute('''
+        SELECT model, COUNT(*), SUM(1 - success), SUM(retries), SUM(prompt_tokens), SUM(completion_tokens),
+               SUM(total_tokens), SUM(cached_tokens), SUM(cache_write_tokens), SUM(cache_hit), SUM(cost_usd), AVG(latency_s),
+               MAX(latency_s), AVG(time_to_first_token_s)
+        FROM llm_calls WHERE session_id = ? GROUP BY model
+    ''', (session_id,))
+    rows = cursor.fetchall()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Session not found")
+    keys = ["calls", "failed_calls", "retries", "prompt_tokens", "completion_tokens", "total_tokens",
+            "cached_tokens", "cache_write_tokens", "cache_hits", "cost_usd", "avg_latency_s", "max_latency_s", "avg_time_to_first_token_s"]
+    by_model = {row[0]: dict(zip(keys, row[1:])) for row in rows}
+    totals = {key: sum((stats[key] or 0) for stats in by_model.values()) for key in keys[:10]}
+    return {"session_id": session_id, **totals, "by_model": by_model}
@@ -1,2 +1,2 @@
-from .terminal_tool import TerminalTool
+from .terminal_tool import TerminalTool, AsyncTerminalTool
 from .files_tool import FilesTool
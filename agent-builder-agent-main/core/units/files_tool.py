@@ -3,14 +3,41 @@ import json
 import subprocess
 import logging
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
 from fastapi import FastAPI, HTTPException
 from ..framework.base import Unit, UnitResult
 from ..utils.llm import make_llm_api_call
+from ..utils.tokens import count_text_tokens
+from ..utils.edit_engine import EDIT_FILE_SYSTEM_PROMPT, EditError, parse_edit_response, apply_edit_blocks, validate_content, write_atomic
 from .working_memory import WorkingMemory
-from ..utils.file_utils import find_files, EXCLUDED_FILES, EXCLUDED_DIRS, EXCLUDED_EXT, _should_exclude
+from ..utils.workspace_manifest import get_workspace_manifest, release_workspace_manifest, ScanDelta, WATCH_DEPTH
+from ..utils.checkpoints import CheckpointStore
+from ..utils.symbol_index import SymbolIndex
+from ..utils.search_index import get_search_index, release_search_index
+from ..utils.workspace_watcher import WorkspaceWatcher, inotify_available
+
+# Used for whole-file rewrites. Kept as a module constant so the static system prompt is byte-identical across calls and can be served from the provider's prompt cache
+EDIT_MAINPY_SYSTEM_PROMPT = "You are a brilliant and meticulous engineer. When you write code, the code works on the first try, is syntactically perfect and is fully complete. You have the utmost care for the code that you write, so you do not make mistakes and every function and class is fully implemented. \n Under NO CIRCUMSTANCES should the file be stripped of the majority of contents, make deliberate changes instead. \n Make sure to output the complete newFileContents in the JSON property newFileContents, do not create additional properties – but Output the complete File Contents all within 'newFileContents'"
+
+EDIT_ATTEMPTS = 2  # Tries at producing applicable edit blocks before falling back to a rewrite
+REWRITE_MAX_TOKENS = 16384  # Output limit for whole-file rewrites
+MAX_SYMBOL_MATCHES = 5  # Definitions returned by one read_symbol call
+MAX_READ_LINES = 2000  # Lines returned by one read_file call
+MAX_READ_BYTES = 256 * 1024  # Bytes returned by one read_file call
+
+def _workspace_snapshot_updater(manifest, manifest_first=False, update_snapshot=True):
+    """
+    Returns the watcher callback that applies changed paths to the shared manifest and, with update_snapshot,
+    refreshes the WorkspaceDirectoryContents module. Runs on the watcher thread, so it opens its own WorkingMemory.
+    """
+    def on_change(paths, full_rescan):
+        delta = manifest.scan(manifest.root, WATCH_DEPTH) if full_rescan else manifest.refresh_paths(paths)
+        if delta.has_changes and update_snapshot:
+            snapshot = manifest.get_listing(manifest.root, 3) if manifest_first else manifest.get_contents(manifest.root, 3)
+            WorkingMemory().add_or_update_module("WorkspaceDirectoryContents", snapshot)
+    return on_change
 
 def _rindex(li, value):
     return len(li) - li[-1::-1].index(value) - 1
@@ -18,22 +45,75 @@ def _rindex(li, value):
 @dataclass
 class FilesTool(Unit):
     base_path: str = "/Users/markokraemer/Desktop/projects/agent-builder/working_directory"  # Hard coded for now
+    watch_workspace: bool = False  # Keep WorkspaceDirectoryContents live via inotify instead of rescanning
+    respect_gitignore: bool = False  # Also exclude files matched by .gitignore files in the workspace
+    checkpoint_hardlinks: bool = False  # Link checkpoint blobs to workspace files instead of copying; only safe if files are never written in place
+    manifest_first: bool = False  # Keep only the file listing in WorkspaceDirectoryContents; contents are fetched with read_file
 
-    def __init__(self):
+    def __init__(self, base_path: Optional[str] = None):
         """
-        Initialize the FilesTool.
+        Initialize the FilesTool. base_path overrides the class default, e.g. with the host directory of a leased workspace.
         """
         super().__init__()
+        if base_path is not None:
+            self.base_path = base_path
         self.working_memory = WorkingMemory()
+        self.manifest = get_workspace_manifest(self.base_path, self.respect_gitignore)
+        self.symbols = SymbolIndex(self.manifest)
+        self.search_index = get_search_index(self.manifest)
+        self.checkpoints = CheckpointStore(self.manifest, use_hardlinks=self.checkpoint_hardlinks)
+        if self.watch_workspace and inotify_available() and os.path.exists(self.base_path):
+            self.start_watching()
         self.initialize_files()
 
+    def start_watching(self, debounce_ms: int = 200, update_snapshot: bool = True):
+        """
+        Start the inotify watcher that keeps the manifest, and with update_snapshot the workspace snapshot,
+        current, so reads never walk the tree. The watcher is shared by every FilesTool on the same base_path.
+        """
+        with self.manifest.lock:
+            if self.manifest.watcher is not None and self.manifest.watcher.running:
+                return
+            watcher = WorkspaceWatcher(self.manifest.root, _workspace_snapshot_updater(self.manifest, self.manifest_first, update_snapshot), debounce_ms=debounce_ms, matcher=self.manifest.matcher)
+            watcher.start()
+            # Changes made before the watches were in place are picked up by one full scan
+            self.manifest.scan(self.manifest.root, WATCH_DEPTH)
+            self.manifest.watcher = watcher
+
+    def stop_watching(self):
+        """
+        Stop the workspace watcher; reads fall back to incremental scans.
+        """
+        with self.manifest.lock:
+            watcher, self.manifest.watcher = self.manifest.watcher, None
+        if watcher is not None:
+            watcher.stop()
+
+    def close(self):
+        """
+        Stops the workspace watcher and drops the manifest and search index shared by all FilesTools on
+        base_path from the process-wide caches. Call it before the workspace itself is removed.
+        """
+        release_workspace_manifest(self.base_path)
+        release_search_index(self.base_path)
+
     def initialize_files(self):
         """
         Initialize the files in the working directory by reading the directory contents.
         """
-        if not self.working_memory.get_module("WorkspaceDirectoryContents"):
+        workspace_contents = self.working_memory.get_module("WorkspaceDirectoryContents")
+        if not workspace_contents:
             self.working_memory.add_or_update_module("WorkspaceDirectoryContents", [])
-        self.read_directory_contents("")  # Hardcoded initializes with full latest WorkspaceDirectoryContents
+        elif isinstance(workspace_contents, dict):
+            # Reuse contents persisted by a previous process for files whose hash is unchanged
+            self.manifest.seed_contents(workspace_contents)
+        self._refresh_workspace_snapshot()
+
+    def _refresh_workspace_snapshot(self):
+        if self.manifest_first:
+            self.list_directory("")
+        else:
+            self.read_directory_contents("")  # Hardcoded initializes with full latest WorkspaceDirectoryContents
 
     def _get_effective_path(self, path: str) -> str:
         """
@@ -73,32 +153,288 @@ class FilesTool(Unit):
         :param instructions: Instructions on how to edit the file.
         :return: Result of the editing operation.
         """
-        self.logger.log(f"Editing main.py with instructions: {instructions}")
-        effective_path = self._get_effective_path('main.py')
-        if not os.path.exists(effective_path):
-            return self.fail_response("File main.py does not exist.")
+        return self.edit_file('main.py', instructions)
+
+    def edit_file(self, path: str, instructions: str) -> UnitResult:
+        """
+        Edit any file in the workspace based on instructions. Only the changed lines are generated and applied to the file, so large files can be edited quickly. Creates the file if it does not exist.
+        
+        :param path: The file path relative to the workspace.
+        :param instructions: Instructions on how to edit the file.
+        :return: Result of the editing operation.
+        """
+        self.logger.log(f"Editing {path} with instructions: {instructions}")
+        effective_path = self._get_effective_path(path)
+        if not os.path.realpath(effective_path).startswith(os.path.realpath(self.base_path) + os.sep):
+            return self.fail_response("Path is outside the workspace")
         try:
-            with open(effective_path, 'r') as file:
-                current_content = file.read()
-            # Construct messages for LLM API call
-            messages = [
-                {
-                    "role": "system",
-                    "content": "You are a brilliant and meticulous engineer. When you write code, the code works on the first try, is syntactically perfect and is fully complete. You have the utmost care for the code that you write, so you do not make mistakes and every function and class is fully implemented. \n Under NO CIRCUMSTANCES should the file be stripped of the majority of contents, make deliberate changes instead. \n Make sure to output the complete newFileContents in the JSON property newFileContents, do not create additional properties – but Output the complete File Contents all within 'newFileContents'"
-                },
-                {"role": "user", "content": f"This is the current content of the file you are editing 'main.py':\n\n<current_content>{current_content}</current_content> \nYou are now implementing the following instructions for main.py: {instructions}\n.\n.Respond in this JSON Format, OUTPUT EVERYTHING IN FOLLOWING JSON PROPERTIES, do not add new properties but output in File, FileName, newFileContents. Make sure to ONLY EDIT main.py. Strictly respond in this JSON Format:\n\n {{\n  \"File\": {{\n    \"FilePath\": \"main.py\",\n    \"newFileContents\": \"The whole file contents, the complete code – The contents of the new file with all instructions implemented perfectly. NEVER write comments. Keep the complete File Contents within this single JSON Property.\"}}\n}}\n"}
+            current_content = ""
+            if os.path.exists(effective_path):
+                with open(effective_path, 'r') as file:
+                    current_content = file.read()
+
+            new_content, error = None, None
+            if current_content.strip():
+                new_content, error = self._edit_with_blocks(path, current_content, instructions)
+            if new_content is None:
+                # Whole-file rewrite for new or empty files, or when the blocks could not be applied
+                self.logger.log(f"Falling back to a whole-file rewrite of {path}: {error}")
+                new_content = self._rewrite_file(path, current_content, instructions)
+                error = validate_content(path, new_content)
+                if error:
+                    return self.fail_response(f"Edit of {path} was not written: {error}")
+
+            write_atomic(effective_path, new_content)
+            self.manifest.refresh_paths([os.path.relpath(os.path.realpath(effective_path), self.manifest.root)])
+            return self.success_response(f"File '{path}' edited successfully. Check WorkingMemory for latest contents.")
+        except Exception as e:
+            self.logger.log_exception(e)
+            return self.fail_response(str(e))
+
+    def _edit_with_blocks(self, path: str, current_content: str, instructions: str):
+        """
+        Ask for SEARCH/REPLACE blocks (or a unified diff) and apply them. A block that does not apply or a
+        result that fails validation is sent back once for correction. Returns (new_content, None) on success
+        and (None, error) otherwise.
+        """
+        messages = [
+            {"role": "system", "content": EDIT_FILE_SYSTEM_PROMPT},
+            {"role": "user", "content": f"This is the current content of the file you are editing '{path}':\n\n<current_content>{current_content}</current_content>\nYou are now implementing the following instructions for {path}: {instructions}"}
+        ]
+        error = None
+        for _ in range(EDIT_ATTEMPTS):
+            response = make_llm_api_call(messages, "gpt-4o", max_tokens=4096)
+            reply = response.choices[0].message['content'] or ""
+            try:
+                new_content = apply_edit_blocks(current_content, parse_edit_response(reply))
+                error = validate_content(path, new_content)
+            except EditError as e:
+                error = str(e)
+            if error is None:
+                return new_content, None
+            messages += [
+                {"role": "assistant", "content": reply},
+                {"role": "user", "content": f"Your edit could not be applied: {error}\nRespond again with corrected SEARCH/REPLACE blocks for the original file contents."}
             ]
-            # Make LLM API call and parse the response
-            response = make_llm_api_call(messages, "gpt-4o", json_mode=True, max_tokens=4096) 
-            response_content = response.choices[0].message['content']
-            response_json = json.loads(response_content)
-            new_content = response_json["File"]["newFileContents"]
-
-            # Write the new content into the file
-            with open(effective_path, 'w') as file:
-                file.write(new_content)
-            
-            return self.success_response("File 'main.py' edited successfully. Check WorkingMemory for latest contents.")
+        return None, error
+
+    def _rewrite_file(self, path: str, current_content: str, instructions: str) -> str:
+        """
+        Ask for the complete new file in JSON. max_tokens grows with the file so large files are not cut off.
+        """
+        messages = [
+            {"role": "system", "content": EDIT_MAINPY_SYSTEM_PROMPT},
+            {"role": "user", "content": f"This is the current content of the file you are editing '{path}':\n\n<current_content>{current_content}</current_content> \nYou are now implementing the following instructions for {path}: {instructions}\n.\n.Respond in this JSON Format, OUTPUT EVERYTHING IN FOLLOWING JSON PROPERTIES, do not add new properties but output in File, FileName, newFileContents. Make sure to ONLY EDIT {path}. Strictly respond in this JSON Format:\n\n {{\n  \"File\": {{\n    \"FilePath\": \"{path}\",\n    \"newFileContents\": \"The whole file contents, the complete code – The contents of the new file with all instructions implemented perfectly. NEVER write comments. Keep the complete File Contents within this single JSON Property.\"}}\n}}\n"}
+        ]
+        max_tokens = min(REWRITE_MAX_TOKENS, max(4096, int(count_text_tokens(current_content) * 1.5) + 1024))
+        response = make_llm_api_call(messages, "gpt-4o", json_mode=True, max_tokens=max_tokens)
+        if getattr(response.choices[0], 'finish_reason', None) == "length":
+            raise EditError(f"Rewrite of {path} was cut off at {max_tokens} tokens")
+        response_json = json.loads(response.choices[0].message['content'])
+        return response_json["File"]["newFileContents"]
+
+    def create_checkpoint(self, label: str = None) -> UnitResult:
+        """
+        Save a checkpoint of every file in the workspace, so a known-good version can be restored later with restore_checkpoint instead of being regenerated.
+        
+        :param label: Optional short description of the checkpoint, e.g. "v2 tests passing".
+        :return: The checkpoint id.
+        """
+        self.logger.log(f"Creating checkpoint: {label}")
+        try:
+            checkpoint = self.checkpoints.create(label)
+            return self.success_response(checkpoint.summary())
+        except Exception as e:
+            self.logger.log_exception(e)
+            return self.fail_response(str(e))
+
+    def restore_checkpoint(self, checkpoint_id: str) -> UnitResult:
+        """
+        Restore the workspace to a checkpoint created with create_checkpoint. Files created after the checkpoint are removed. Updates the WorkspaceDirectoryContents Module in working memory.
+        
+        :param checkpoint_id: The id returned by create_checkpoint or list_checkpoints.
+        :return: The restored and removed files.
+        """
+        self.logger.log(f"Restoring checkpoint: {checkpoint_id}")
+        try:
+            changes = self.checkpoints.restore(checkpoint_id)
+            self._refresh_workspace_snapshot()
+            return self.success_response(changes)
+        except Exception as e:
+            self.logger.log_exception(e)
+            return self.fail_response(str(e))
+
+    def list_checkpoints(self) -> UnitResult:
+        """
+        List the saved workspace checkpoints, oldest first.
+        """
+        try:
+            return self.success_response([checkpoint.summary() for checkpoint in self.checkpoints.list()])
+        except Exception as e:
+            self.logger.log_exception(e)
+            return self.fail_response(str(e))
+
+    def find_symbol(self, query: str, kind: str = None) -> UnitResult:
+        """
+        Find Python classes, functions, methods and module-level variables in the workspace by name. Returns where each one is defined (path and line span) and its signature, so you can fetch only the definitions you need with read_symbol or read_file.
+        
+        :param query: A name, a dotted name such as "FilesTool.read_file", or part of a name.
+        :param kind: Optionally only return symbols of this kind: class, function, method or variable.
+        :return: The matching symbols.
+        """
+        self.logger.log(f"Finding symbol: {query} ({kind})")
+        try:
+            self._sync_manifest()
+            self.symbols.update()
+            matches = [
+                {"name": symbol.qualname, "kind": symbol.kind, "path": symbol.path, "start_line": symbol.start_line, "end_line": symbol.end_line, "signature": symbol.signature, "doc": symbol.doc}
+                for symbol in self.symbols.find(query, kind)
+            ]
+            return self.success_response(matches)
+        except Exception as e:
+            self.logger.log_exception(e)
+            return self.fail_response(str(e))
+
+    def read_symbol(self, name: str, path: str = None) -> UnitResult:
+        """
+        Read the source code of a Python class, function or method in the workspace by its exact name, e.g. "FilesTool.read_file". Returns only that definition, together with the imports of its file.
+        
+        :param name: The symbol name, qualified name or module-qualified name.
+        :param path: Optionally the file that defines the symbol, relative to the workspace.
+        :return: The source of each matching definition.
+        """
+        self.logger.log(f"Reading symbol: {name} in {path}")
+        try:
+            self._sync_manifest()
+            self.symbols.update()
+            matches = self.symbols.resolve(name, os.path.normpath(path) if path else None)
+            if not matches:
+                return self.fail_response(f"Symbol {name} not found. Use find_symbol to search for it.")
+            return self.success_response([
+                {"name": symbol.qualname, "kind": symbol.kind, "path": symbol.path, "start_line": symbol.start_line, "end_line": symbol.end_line, "imports": self.symbols.imports(symbol.path), "source": self.symbols.read(symbol)}
+                for symbol in matches[:MAX_SYMBOL_MATCHES]
+            ])
+        except Exception as e:
+            self.logger.log_exception(e)
+            return self.fail_response(str(e))
+
+    def search_workspace(self, query: str, k: int = 10) -> UnitResult:
+        """
+        Search the text files in the workspace for a query (keywords or identifiers) and return the k most relevant files ranked by BM25, each with its best matching lines and line numbers. Use read_file or read_symbol to fetch more context.
+        
+        :param query: Keywords or identifiers to search for.
+        :param k: The number of files to return.
+        :return: The matching files and lines.
+        """
+        self.logger.log(f"Searching workspace for: {query}")
+        try:
+            self._sync_manifest()
+            self.search_index.update()
+            hits = self.search_index.search(query, k)
+            return self.success_response([{"path": hit.path, "score": hit.score, "lines": hit.lines} for hit in hits])
+        except Exception as e:
+            self.logger.log_exception(e)
+            return self.fail_response(str(e))
+
+    def _refresh_manifest(self, effective_path: str, depth: int) -> ScanDelta:
+        """
+        Bring the manifest up to date for effective_path and return what changed.
+        """
+        if self.manifest.watcher is not None and self.manifest.watcher.running:
+            # The watcher keeps the snapshot current, so there is nothing to scan
+            return ScanDelta()
+        # Only files that were added or changed since the last scan are re-read
+        return self.manifest.scan(effective_path, depth)
+
+    def _sync_manifest(self):
+        """
+        Bring the whole manifest up to date before an index lookup. With a watcher (watch_workspace) only
+        the paths it saw change are refreshed; otherwise an incremental scan re-reads only changed files.
+        """
+        watcher = self.manifest.watcher
+        if watcher is not None and watcher.running:
+            # Apply changes still waiting for the debounce, so a file written just now is found
+            watcher.flush()
+        else:
+            self.manifest.scan(self.manifest.root, WATCH_DEPTH)
+
+    def list_directory(self, path: str = "", depth: int = 3) -> UnitResult:
+        """
+        List the files at the given path up to a specified depth with their size, content hash and line count, but without their contents. Use read_file to fetch only the lines you need. Updates the WorkspaceDirectoryContents Module in working memory with the listing.
+        """
+        self.logger.log(f"Listing directory for path: {path} up to depth: {depth}")
+        if not os.path.exists(self.base_path):
+            return self.fail_response("Base path does not exist")
+        effective_path = self._get_effective_path(path)
+        if not os.path.exists(effective_path) or not os.path.isdir(effective_path):
+            return self.fail_response("Directory does not exist or is not a directory")
+        try:
+            delta = self._refresh_manifest(effective_path, depth)
+            listing = self.manifest.get_listing(effective_path, depth)
+            self.working_memory.add_or_update_module("WorkspaceDirectoryContents", listing)
+            return self.success_response({"files": listing, "changes": delta.to_dict()})
+        except Exception as e:
+            self.logger.log_exception(e)
+            return self.fail_response(str(e))
+
+    def read_file(self, path: str, start_line: int = None, end_line: int = None, start_byte: int = None, end_byte: int = None) -> UnitResult:
+        """
+        Read part of a file. Pass start_line/end_line (1-based, inclusive) for a line range, or start_byte/end_byte (0-based, end exclusive) for a byte range; without a range the file is read from the start. At most 2000 lines or 256 KB are returned per call, and the result says where to continue; a single line longer than 256 KB is returned in part with next_start_byte.
+        
+        :param path: The file path relative to the workspace.
+        :return: The requested range of the file.
+        """
+        self.logger.log(f"Reading file {path} lines {start_line}-{end_line} bytes {start_byte}-{end_byte}")
+        effective_path = self._get_effective_path(path)
+        if not os.path.realpath(effective_path).startswith(os.path.realpath(self.base_path) + os.sep):
+            return self.fail_response("Path is outside the workspace")
+        if not os.path.isfile(effective_path):
+            return self.fail_response(f"File {path} does not exist.")
+        try:
+            size = os.path.getsize(effective_path)
+            if start_byte is not None or end_byte is not None:
+                start = max(0, start_byte or 0)
+                if start > size:
+                    return self.fail_response(f"start_byte {start_byte} is past the end of {path} ({size} bytes).")
+                requested_end = min(size, end_byte if end_byte is not None else size)
+                end = min(requested_end, start + MAX_READ_BYTES)
+                with open(effective_path, 'rb') as file:
+                    file.seek(start)
+                    data = file.read(max(0, end - start))
+                result = {"path": path, "size": size, "start_byte": start, "end_byte": end, "content": data.decode('utf-8', errors='replace')}
+                if end < requested_end:
+                    result["next_start_byte"] = end
+                return self.success_response(result)
+
+            first = max(1, start_line or 1)
+            last = end_line if end_line is not None else first + MAX_READ_LINES - 1
+            last = min(last, first + MAX_READ_LINES - 1)
+            # Read as bytes so MAX_READ_BYTES caps bytes, not characters, and line offsets are known
+            lines, read_bytes, offset, truncated, partial = [], 0, 0, False, None
+            with open(effective_path, 'rb') as file:
+                for line_number, line in enumerate(file, start=1):
+                    if line_number < first:
+                        offset += len(line)
+                        continue
+                    if line_number > last or read_bytes + len(line) > MAX_READ_BYTES:
+                        truncated = True
+                        if not lines and line_number == first:
+                            # The first requested line alone is over the cap; return its start and continue by byte
+                            partial = line[:MAX_READ_BYTES]
+                        break
+                    lines.append(line)
+                    read_bytes += len(line)
+            if partial is not None:
+                return self.success_response({"path": path, "size": size, "start_line": first, "end_line": first, "content": partial.decode('utf-8', errors='replace'), "partial_line": True, "next_start_byte": offset + len(partial)})
+            returned_last = first + len(lines) - 1
+            result = {"path": path, "size": size, "start_line": first, "end_line": returned_last, "content": b"".join(lines).decode('utf-8', errors='replace')}
+            relative_path = os.path.relpath(os.path.realpath(effective_path), self.manifest.root)
+            entry = self.manifest.entries.get(relative_path)
+            if entry is not None and entry.line_count is not None:
+                result["total_lines"] = entry.line_count
+            if truncated and (end_line is None or returned_last < end_line):
+                result["next_start_line"] = returned_last + 1
+            return self.success_response(result)
         except Exception as e:
             self.logger.log_exception(e)
             return self.fail_response(str(e))
@@ -115,31 +451,11 @@ class FilesTool(Unit):
             return self.fail_response("Directory does not exist or is not a directory")
 
         try:
-            directory_contents = {}
-            for root, dirs, files in os.walk(effective_path):
-                # Calculate current depth
-                current_depth = os.path.relpath(root, effective_path).count(os.sep)
-                if current_depth > depth:
-                    dirs[:] = []  # Don't go any deeper
-                else:
-                    # Apply exclusions for directories
-                    dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRS and not _should_exclude(self.base_path, os.path.join(root, d))]
-                    # Apply exclusions for files
-                    files = [f for f in files if f not in EXCLUDED_FILES and not any(f.endswith(ext) for ext in EXCLUDED_EXT) and not _should_exclude(self.base_path, os.path.join(root, f))]
-                    # Append relative paths of files and directories to contents and read file contents
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        relative_file_path = os.path.relpath(file_path, effective_path)
-                        if not _should_exclude(self.base_path, file_path):
-                            try:
-                                with open(file_path, 'r', encoding='utf-8') as file_content:
-                                    directory_contents[relative_file_path] = file_content.read()
-                            except UnicodeDecodeError:
-                                # Skip files that cannot be decoded with UTF-8
-                                continue
+            delta = self._refresh_manifest(effective_path, depth)
+            directory_contents = self.manifest.get_contents(effective_path, depth)
             # Update the WorkspaceDirectoryContents Module in working memory
             self.working_memory.add_or_update_module("WorkspaceDirectoryContents", directory_contents)
-            return self.success_response({"contents": directory_contents})
+            return self.success_response({"contents": directory_contents, "changes": delta.to_dict()})
         except Exception as e:
             self.logger.log_exception(e)
             return self.fail_response(str(e))
@@ -184,6 +500,27 @@ class FilesTool(Unit):
                     },
                 },
             },
+            {
+                "type": "function",
+                "function": {
+                    "name": FilesTool.edit_file.__name__,
+                    "description": FilesTool.edit_file.__doc__,
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "path": {
+                                "type": "string",
+                                "description": "The file path to edit, relative to the workspace.",
+                            },
+                            "instructions": {
+                                "type": "string",
+                                "description": "Instructions on how to edit the file.",
+                            }
+                        },
+                        "required": ["path", "instructions"],
+                    },
+                },
+            },
             {
                 "type": "function",
                 "function": {
@@ -205,7 +542,173 @@ class FilesTool(Unit):
                         "required": ["path"],
                     },
                 },
-            }, 
+            },
+            {
+                "type": "function",
+                "function": {
+                    "name": FilesTool.list_directory.__name__,
+                    "description": FilesTool.list_directory.__doc__,
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "path": {
+                                "type": "string",
+                                "description": "The directory path to list, relative to the workspace.",
+                            },
+                            "depth": {
+                                "type": "integer",
+                                "description": "The depth to which the directory should be listed.",
+                                "default": 3,
+                            }
+                        },
+                        "required": ["path"],
+                    },
+                },
+            },
+            {
+                "type": "function",
+                "function": {
+                    "name": FilesTool.read_file.__name__,
+                    "description": FilesTool.read_file.__doc__,
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "path": {
+                                "type": "string",
+                                "description": "The file path to read, relative to the workspace.",
+                            },
+                            "start_line": {
+                                "type": "integer",
+                                "description": "First line to return (1-based, inclusive).",
+                            },
+                            "end_line": {
+                                "type": "integer",
+                                "description": "Last line to return (1-based, inclusive).",
+                            },
+                            "start_byte": {
+                                "type": "integer",
+                                "description": "First byte to return (0-based). Use instead of lines for byte ranges.",
+                            },
+                            "end_byte": {
+                                "type": "integer",
+                                "description": "Byte offset to stop at (exclusive).",
+                            }
+                        },
+                        "required": ["path"],
+                    },
+                },
+            },
+            {
+                "type": "function",
+                "function": {
+                    "name": FilesTool.create_checkpoint.__name__,
+                    "description": FilesTool.create_checkpoint.__doc__,
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "label": {
+                                "type": "string",
+                                "description": "Optional short description of the checkpoint.",
+                            }
+                        },
+                        "required": [],
+                    },
+                },
+            },
+            {
+                "type": "function",
+                "function": {
+                    "name": FilesTool.restore_checkpoint.__name__,
+                    "description": FilesTool.restore_checkpoint.__doc__,
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "checkpoint_id": {
+                                "type": "string",
+                                "description": "The id of the checkpoint to restore.",
+                            }
+                        },
+                        "required": ["checkpoint_id"],
+                    },
+                },
+            },
+            {
+                "type": "function",
+                "function": {
+                    "name": FilesTool.list_checkpoints.__name__,
+                    "description": FilesTool.list_checkpoints.__doc__,
+                    "parameters": {
+                        "type": "object",
+                        "properties": {},
+                        "required": [],
+                    },
+                },
+            },
+            {
+                "type": "function",
+                "function": {
+                    "name": FilesTool.find_symbol.__name__,
+                    "description": FilesTool.find_symbol.__doc__,
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "query": {
+                                "type": "string",
+                                "description": "A name, a dotted name or part of a name.",
+                            },
+                            "kind": {
+                                "type": "string",
+                                "enum": ["class", "function", "method", "variable"],
+                                "description": "Only return symbols of this kind.",
+                            }
+                        },
+                        "required": ["query"],
+                    },
+                },
+            },
+            {
+                "type": "function",
+                "function": {
+                    "name": FilesTool.read_symbol.__name__,
+                    "description": FilesTool.read_symbol.__doc__,
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "name": {
+                                "type": "string",
+                                "description": "The symbol name, e.g. \"FilesTool.read_file\".",
+                            },
+                            "path": {
+                                "type": "string",
+                                "description": "The file that defines the symbol, relative to the workspace.",
+                            }
+                        },
+                        "required": ["name"],
+                    },
+                },
+            },
+            {
+                "type": "function",
+                "function": {
+                    "name": FilesTool.search_workspace.__name__,
+                    "description": FilesTool.search_workspace.__doc__,
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "query": {
+                                "type": "string",
+                                "description": "Keywords or identifiers to search for.",
+                            },
+                            "k": {
+                                "type": "integer",
+                                "description": "The number of files to return.",
+                                "default": 10,
+                            }
+                        },
+                        "required": ["query"],
+                    },
+                },
+            },
         ]
 
 if __name__ == "__main__":
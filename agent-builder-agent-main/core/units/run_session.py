@@ -1,6 +1,7 @@
 import os
 import json
 import asyncio
+import argparse
 import subprocess
 import platform
 from openai import OpenAI
@@ -10,33 +11,56 @@ from core.utils.agent_base import BaseAssistant
 from .working_memory import WorkingMemory
 from core.framework.base import Unit, UnitResult
 from .files_tool import FilesTool
-from .terminal_tool import TerminalTool
+from .terminal_tool import TerminalTool, AsyncTerminalTool
+from core.utils.workspace_manager import get_workspace_manager
+from core.utils.execution_backends import ExecutionBackend, DockerExecutionBackend, LocalProcessExecutionBackend
 from dataclasses import dataclass
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 @dataclass
 class RunSessionTool(Unit):
-    def __init__(self):
+    execution: str = "docker"  # "docker" or "local" (LocalProcessExecutionBackend sandbox, no Docker or tmux needed)
+    use_workspace_pool: bool = False  # With docker, lease a dedicated container from the WorkspaceManager instead of the shared docker-compose one
+
+    def __init__(self, execution: Optional[str] = None, use_workspace_pool: Optional[bool] = None):
         """
         Initializes the RunSessionTool instance by setting up the necessary components.
+        execution and use_workspace_pool override the class defaults.
         """
         super().__init__()
+        if execution is not None:
+            self.execution = execution
+        if use_workspace_pool is not None:
+            self.use_workspace_pool = use_workspace_pool
+        if self.execution not in ("docker", "local"):
+            raise ValueError(f"Unknown execution: {self.execution}")
         self.client = OpenAI(default_headers={"OpenAI-Beta": "assistants=v2"})
         initialize_logging()
         
         self.working_memory = WorkingMemory()
-        self.files_tool_instance = FilesTool()
-        self.terminal_tool_instance = TerminalTool()
+        self.workspace = get_workspace_manager().acquire(self.logger.session_id) if self.execution == "docker" and self.use_workspace_pool else None
+        self.execution_backend = self.create_execution_backend()
+        self.files_tool_instance = FilesTool(base_path=self.execution_backend.workspace_path if self.execution_backend else None)
+        # Without a session-specific backend the assistant creates default tools per action, as before
+        self.terminal_tool_instance = AsyncTerminalTool(execution_backend=self.execution_backend) if self.execution_backend else None
 
         self.tools = []
-        self.tools.extend(self.files_tool_instance.schema())
-        self.tools.extend(self.terminal_tool_instance.schema())
+        self.tools.extend(FilesTool.schema())
+        self.tools.extend(TerminalTool.schema())
         self.agent_instructions = self._get_agent_instructions()
         self.agent_internal_monologue_system_message = self._get_agent_internal_monologue_system_message()
-        self.agent = BaseAssistant("Mirko.ai", self.agent_instructions, self.tools)
+        tool_instances = [self.terminal_tool_instance, self.files_tool_instance] if self.execution_backend else None
+        self.agent = BaseAssistant("Mirko.ai", self.agent_instructions, self.tools, tool_instances=tool_instances)
         self.working_memory_content = json.dumps(self.working_memory.export_memory(), indent=3)
         self.additional_instructions = f"Working Memory <WorkingMemory> {self.working_memory_content} </WorkingMemory>"
 
+    def create_execution_backend(self) -> Optional[ExecutionBackend]:
+        if self.execution == "local":
+            return LocalProcessExecutionBackend()
+        if self.workspace is not None:
+            return DockerExecutionBackend(self.workspace.container_id, self.workspace.host_path)
+        return None  # The tools use the docker-compose container and their default paths
+
     def _get_agent_instructions(self):
         return """
             You are Mirko, a brilliant and meticulous software architect, logician, and software engineer - you are leading the development of this python script/software/app.
@@ -159,10 +183,26 @@ class RunSessionTool(Unit):
         
         self.agent.generate_playground_access(thread_id)
 
-        while True:
-            run_id = self.agent.run_thread(thread_id, self.agent.assistant_id, additional_instructions=self.additional_instructions)
-            await self.agent.check_run_status_and_execute_action(thread_id, run_id)
-            self.agent.internal_monologue(thread_id, self.agent_internal_monologue_system_message)
+        try:
+            while True:
+                run_id = self.agent.run_thread(thread_id, self.agent.assistant_id, additional_instructions=self.additional_instructions)
+                await self.agent.check_run_status_and_execute_action(thread_id, run_id)
+                self.agent.internal_monologue(thread_id, self.agent_internal_monologue_system_message)
+        finally:
+            self.release_workspace()
+
+    def release_workspace(self):
+        """
+        Resets the leased workspace container and returns it to the pool, or removes the local sandbox.
+        """
+        if self.terminal_tool_instance is not None:
+            self.terminal_tool_instance.close()  # Ends the sessions of every TerminalTool on this backend before it goes away
+        if self.execution_backend is not None:
+            self.files_tool_instance.close()
+            self.execution_backend.close()
+        if self.workspace is not None:
+            get_workspace_manager().release(self.workspace.session_id)
+            self.workspace = None
 
     @staticmethod
     def schema() -> List[Dict[str, Any]]:
@@ -190,7 +230,11 @@ class RunSessionTool(Unit):
         ]
 
 if __name__ == "__main__":
-    run_session_tool = RunSessionTool()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--execution", choices=["docker", "local"], default=RunSessionTool.execution, help="Run commands in the dev-env container or in a local process sandbox")
+    parser.add_argument("--use-workspace-pool", action="store_true", help="With docker, lease a dedicated container from the WorkspaceManager")
+    args = parser.parse_args()
+    run_session_tool = RunSessionTool(execution=args.execution, use_workspace_pool=args.use_workspace_pool)
     user_request = """ 
 
     Create a tool that will automatically draft email answers to all emails in the inbox with status unread.
@@ -1,34 +1,81 @@
 import subprocess
+import asyncio
 import os
 import tempfile
 import json
 import time
 import re
 from ..framework.base import Unit, UnitResult
-from ..utils.workspace_utils import get_docker_container_id
+from ..utils.workspace_utils import get_docker_container_id, get_docker_client
+from ..utils.terminal_backends import TerminalBackend, TmuxTerminalBackend, DockerExecTerminalBackend
+from ..utils.execution_backends import ExecutionBackend
+from ..utils.terminal_commands import RUN_DONE, RUN_INTERRUPT, CommandRun
+from ..utils.terminal_logs import SessionLogReader, wait_for_log_output, async_wait_for_log_output, LOG_MAX_BYTES, LOG_SEGMENTS
+from ..utils.terminal_pool import SessionPool, get_session_pool
+from ..utils.terminal_output import compact_terminal_output
 from .working_memory import WorkingMemory
 from dataclasses import dataclass
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+
+RUN_COMMAND_REPORT_TIMEOUT_S = 5  # Time allowed to collect the output of an interrupted run_command
 
 @dataclass
 class TerminalTool(Unit):
     logs_dir: str = "/Users/markokraemer/Desktop/projects/agent-builder/working_directory/terminal_logs"
+    terminal_backend: str = "tmux"  # "tmux" or "docker_exec" (persistent exec PTY per session through the Docker SDK)
+    warm_sessions: int = 2  # Shells kept started ahead of new_terminal_session calls
+    session_idle_timeout_s: int = 300  # Released shells beyond warm_sessions are closed after this long
+    log_max_bytes: int = LOG_MAX_BYTES  # Session logs are rotated into gzip segments at this size
+    log_segments: int = LOG_SEGMENTS
 
 
-    def __init__(self):
+    def __init__(self, container_name: Optional[str] = None, execution_backend: Optional[ExecutionBackend] = None):
         """
         Initializes the TerminalTool instance by setting up a temporary directory for logs,
         retrieving the container ID, and initializing terminal sessions.
+        container_name selects the workspace container, e.g. one leased from the WorkspaceManager;
+        by default the docker-compose dev-env container is used. An execution_backend (e.g. a
+        LocalProcessExecutionBackend) replaces the container and provides the shells and log directory.
         """
         super().__init__()
+        self.execution_backend = execution_backend
+        if execution_backend is not None and execution_backend.logs_dir:
+            self.logs_dir = execution_backend.logs_dir
         os.makedirs(self.logs_dir, exist_ok=True)
-        container_id = get_docker_container_id("workspace_dev-env_1")
-        if container_id is None:
-            raise ValueError("No running container found for the standard docker image.")
-        self.container_name = container_id
+        if container_name is None and execution_backend is None:
+            container_name = get_docker_container_id("workspace_dev-env_1")
+            if container_name is None:
+                raise ValueError("No running container found for the standard docker image.")
+        self.container_name = container_name
+        self.session_pool: SessionPool = get_session_pool(self.pool_key(), self.create_backend, self.logs_dir, self.warm_sessions, self.session_idle_timeout_s)
+        self.backend = self.session_pool.backend
         self.working_memory = WorkingMemory()
         self.initialize_terminal_sessions()
 
+    def pool_key(self) -> tuple:
+        """
+        TerminalTools with the same key share one process-wide SessionPool, including its open sessions.
+        """
+        if self.execution_backend is not None:
+            return ("execution_backend", self.execution_backend)
+        return (self.terminal_backend, self.container_name, self.logs_dir)
+
+    def create_backend(self) -> TerminalBackend:
+        if self.execution_backend is not None:
+            return self.execution_backend.create_terminal_backend(self.log_max_bytes, self.log_segments)
+        if self.terminal_backend == "docker_exec":
+            return DockerExecTerminalBackend(self.container_name, client=get_docker_client(), log_max_bytes=self.log_max_bytes, log_segments=self.log_segments)
+        if self.terminal_backend == "tmux":
+            return TmuxTerminalBackend(self.container_name, log_max_bytes=self.log_max_bytes, log_segments=self.log_segments)
+        raise ValueError(f"Unknown terminal backend: {self.terminal_backend}")
+
+    def close(self):
+        """
+        Closes the session pool shared by all TerminalTools on this container or execution backend, ending
+        their sessions. Call it before the workspace itself is reset or removed.
+        """
+        self.session_pool.close()
+
     def initialize_terminal_sessions(self):
         """
         Initializes the TerminalSessions module with an empty list if it doesn't already exist.
@@ -41,92 +88,181 @@ class TerminalTool(Unit):
         Creates a new terminal session and returns its session ID.
         """
         self.logger.log("Creating a new terminal session.")
-        terminal_sessions = self.working_memory.get_module("TerminalSessions")
-        session_id = f"session_{len(terminal_sessions) + 1}"
-        log_file_path = os.path.join(self.logs_dir, f"{session_id}.log")
-        kill_command = f"tmux kill-session -t {session_id}"
-        subprocess.run(kill_command, shell=True)  # Ignore errors if session does not exist
-
         try:
-            command = f"tmux new-session -d -s {session_id} 'docker exec -it {self.container_name} /bin/bash | ts \"%Y-%m-%d-%H:%M:%S\" > {log_file_path}'"
-            subprocess.run(command, shell=True, check=True)
-            terminal_sessions.append({"session_id": session_id, "action_history": []})
-            self.working_memory.add_or_update_module("TerminalSessions", terminal_sessions)
-            self.logger.log(f"New terminal session created with ID: {session_id}")
-        except subprocess.CalledProcessError as e:
+            session_id = self.session_pool.acquire()
+            self._register_session(session_id)
+        except Exception as e:
             self.logger.log_exception(e)
-            raise RuntimeError(f"Failed to create new tmux session for {session_id}")
+            raise RuntimeError("Failed to create new terminal session")
         return session_id
 
+    def _register_session(self, session_id: str):
+        self._get_log_reader(session_id).mark(forget_history=True)  # A reused shell's earlier output is not part of this session
+        terminal_sessions = self.working_memory.get_module("TerminalSessions")
+        terminal_sessions.append({"session_id": session_id, "action_history": []})
+        self.working_memory.add_or_update_module("TerminalSessions", terminal_sessions)
+        self.logger.log(f"New terminal session created with ID: {session_id}")
+
     def control_c_terminal_session(self, session_id: str) -> UnitResult:
         """
         Closes the specified terminal session and returns a UnitResult indicating success or failure.
+        The shell is interrupted, reset and returned to the session pool for later sessions.
         """
         self.logger.log(f"Closing terminal session with ID: {session_id}")
         try:
-            command = f"tmux kill-session -t {session_id}"
-            subprocess.run(command, shell=True, check=True)
-            terminal_sessions = self.working_memory.get_module("TerminalSessions")
-            closed_session = [session for session in terminal_sessions if session["session_id"] == session_id]
-            terminal_sessions = [session for session in terminal_sessions if session["session_id"] != session_id]
-            self.working_memory.add_or_update_module("TerminalSessions", terminal_sessions)
-            if closed_session:
-                return self.success_response(f"CLOSED session_id: {closed_session[0]}")
-            else:
-                return self.fail_response("Session ID not found")
-        except subprocess.CalledProcessError as e:
+            self.session_pool.release(session_id)
+            return self._unregister_session(session_id)
+        except (subprocess.CalledProcessError, KeyError, OSError) as e:
             self.logger.log_exception(e)
-            return self.fail_response(f"Failed to kill tmux session {session_id}")
+            return self.fail_response(f"Failed to kill terminal session {session_id}")
+
+    def _unregister_session(self, session_id: str) -> UnitResult:
+        terminal_sessions = self.working_memory.get_module("TerminalSessions")
+        closed_session = [session for session in terminal_sessions if session["session_id"] == session_id]
+        terminal_sessions = [session for session in terminal_sessions if session["session_id"] != session_id]
+        self.working_memory.add_or_update_module("TerminalSessions", terminal_sessions)
+        if closed_session:
+            return self.success_response(f"CLOSED session_id: {closed_session[0]}")
+        else:
+            return self.fail_response("Session ID not found")
 
     def send_terminal_command(self, session_id: str, command: str) -> UnitResult:
         """
         Sends a command to the specified terminal session and updates the session's action and history.
         """
         self.logger.log(f"Sending command to terminal session {session_id}: {command}")
-        tmux_command = f"tmux send-keys -t {session_id} '{command}' Enter"
         try:
-            subprocess.run(tmux_command, shell=True, check=True)
+            self.backend.send_command(self._shell_id(session_id), command)
             self.update_action_history(session_id, command)
             self.observe_terminal_session(session_id, 0, 0)  # Update the session history immediately
             return self.success_response("Command executed")
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, KeyError, OSError) as e:
             self.logger.log_exception(e)
-            return self.fail_response("Failed to send command to tmux session")
+            return self.fail_response(f"Failed to send command to terminal session {session_id}: {e}")
 
-    def observe_terminal_session(self, session_id: str, offset_start_time_by_in_seconds: int, observation_time_in_seconds: int) -> str:
+    def run_command(self, session_id: str, command: str, timeout: int = 60, compact: bool = True, errors_only: bool = False) -> UnitResult:
+        """
+        Runs a command in the terminal session and waits for it to finish. Returns its stdout, stderr, exit code and duration as soon as it exits. Use this instead of send_terminal_command + observe_terminal_session for commands that terminate; use send_terminal_command for servers and other long-running processes. If the command runs longer than timeout seconds it is interrupted with Ctrl+C. Output is compacted like in observe_terminal_session.
+        """
+        self.logger.log(f"Running command in terminal session {session_id}: {command}")
+        try:
+            shell_id, reader, run = self._start_command(session_id, command, timeout)
+            self.update_action_history(session_id, command)
+            action = run.step(reader.read_new())
+            while action != RUN_DONE:
+                if action == RUN_INTERRUPT:
+                    self._interrupt_command(shell_id, run)
+                else:
+                    self.backend.wait_for_output(shell_id, run.remaining)
+                action = run.step(reader.read_new())
+            return self._command_response(run, timeout, compact, errors_only)
+        except (subprocess.CalledProcessError, KeyError, OSError) as e:
+            self.logger.log_exception(e)
+            return self.fail_response(f"Failed to run command in terminal session {session_id}: {e}")
+
+    def _start_command(self, session_id: str, command: str, timeout: int) -> Tuple[str, SessionLogReader, CommandRun]:
+        shell_id, reader = self._shell_id(session_id), self._get_log_reader(session_id)
+        reader.mark()
+        run = CommandRun(command, timeout, RUN_COMMAND_REPORT_TIMEOUT_S)
+        self.backend.send_command(shell_id, run.wrapped_command)
+        return shell_id, reader, run
+
+    def _interrupt_command(self, shell_id: str, run: CommandRun):
+        # Interrupt the command, then report whatever it captured so far
+        self.backend.interrupt(shell_id)
+        self.backend.send_command(shell_id, run.report_command)
+
+    def _command_response(self, run: CommandRun, timeout: int, compact: bool, errors_only: bool) -> UnitResult:
+        result = run.result
+        if result is None:
+            return self.fail_response(f"Command did not finish within {timeout} seconds and its output could not be collected.")
+        response = {
+            "command": run.command,
+            "exit_code": result.exit_code,
+            "stdout": result.stdout,
+            "stderr": result.stderr,
+            "duration_s": round(run.duration, 3),
+            "timed_out": run.timed_out,
+        }
+        if compact:
+            for stream in ("stdout", "stderr"):
+                response[stream], stats = compact_terminal_output(response[stream], errors_only=errors_only)
+                if stats.changed:
+                    response.setdefault("compaction", {})[stream] = stats.summary()
+        return self.success_response(response)
+
+    def _shell_id(self, session_id: str) -> str:
+        """Returns the pooled shell behind session_id; raises KeyError for sessions that are not open."""
+        return self.session_pool.lease(session_id).shell_id
+
+    def _get_log_reader(self, session_id: str) -> SessionLogReader:
+        lease = self.session_pool.lease(session_id)
+        if lease.reader is None:
+            lease.reader = SessionLogReader(lease.log_file_path, segments=self.log_segments)
+        return lease.reader
+
+    def observe_terminal_session(self, session_id: str, offset_start_time_by_in_seconds: int, observation_time_in_seconds: int, idle_ms: int = None, until_regex: str = None, only_new_output: bool = False, compact: bool = True, errors_only: bool = False) -> str:
         """
         Observes the terminal session for a specified duration and returns the logs.
+        With only_new_output, returns everything printed since the previous observation instead of a time range.
+        With idle_ms or until_regex, observation_time_in_seconds is the maximum wait and the logs are returned as soon as the output has been quiet for idle_ms milliseconds or until_regex matches the new output (e.g. the shell prompt).
+        With compact (the default), escape codes, progress bar redraws and repeated lines are removed and long output is shortened in the middle; errors_only keeps just the error-looking lines.
         """
         self.logger.log(f"Observing terminal session {session_id} from {offset_start_time_by_in_seconds} seconds ago for {observation_time_in_seconds} seconds.")
-        terminal_sessions = self.working_memory.get_module("TerminalSessions")
-        for session in terminal_sessions:
-            if session["session_id"] == session_id:
-                log_file_path = os.path.join(self.logs_dir, f"{session_id}.log")
-                start_time = time.time()
-                actual_start_time = start_time - offset_start_time_by_in_seconds
-                end_time = start_time + observation_time_in_seconds
-                time.sleep(observation_time_in_seconds)
-                observed_logs = []
-
-                try:
-                    with open(log_file_path, 'r') as log_file:
-                        log_content = log_file.read()
-                        log_lines = log_content.split('\n')
-                        within_time_range = False
-                        for line in log_lines:
-                            match = re.match(r'(\d{4}-\d{2}-\d{2}-\d{2}:\d{2}:\d{2})', line)
-                            if match:
-                                log_time = time.mktime(time.strptime(match.group(1), "%Y-%m-%d-%H:%M:%S"))
-                                within_time_range = actual_start_time <= log_time <= end_time
-                                if within_time_range:
-                                    observed_logs.append(line)
-                            elif within_time_range:
-                                observed_logs.append(line)
-                except FileNotFoundError:
-                    return "Log file not found. It's possible the session has not generated any output yet."
-
-                return "\n".join(observed_logs)
-        return "Session not found or no history available."
+        log_file_path, error = self._observation_log(session_id, until_regex)
+        if error:
+            return error
+        start_time = time.time()
+        if idle_ms is None and until_regex is None:
+            time.sleep(observation_time_in_seconds)
+        else:
+            reason = wait_for_log_output(log_file_path, observation_time_in_seconds, idle_ms, until_regex)
+            self.logger.log(f"Observation of {session_id} ended after {time.time() - start_time:.2f}s ({reason})")
+        return self._read_observation(session_id, start_time - offset_start_time_by_in_seconds, only_new_output, compact, errors_only)
+
+    def _observation_log(self, session_id: str, until_regex: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Returns the log to observe, or an error to report instead when the session is not open or until_regex is invalid.
+        """
+        try:
+            log_file_path = self.session_pool.lease(session_id).log_file_path
+        except KeyError:
+            return None, "Session not found or no history available."
+        if until_regex:
+            try:
+                re.compile(until_regex)
+            except re.error as e:
+                return None, f"Invalid until_regex {until_regex!r}: {e}"
+        return log_file_path, None
+
+    def _read_observation(self, session_id: str, actual_start_time: float, only_new_output: bool, compact: bool, errors_only: bool) -> str:
+        # Lines are stamped with whole seconds, so the window ends at the current second
+        end_time = time.time()
+        try:
+            lease = self.session_pool.lease(session_id)
+        except KeyError:
+            return "Session not found or no history available."
+        if not os.path.exists(lease.log_file_path):
+            return "Log file not found. It's possible the session has not generated any output yet."
+        reader = self._get_log_reader(session_id)
+        logs = reader.read_new() if only_new_output else reader.read_range(actual_start_time, end_time)
+        if not compact:
+            return logs
+        compacted, stats = compact_terminal_output(logs, errors_only=errors_only)
+        return f"{compacted}\n{stats.summary()}" if stats.changed else compacted
+
+    def tail_terminal_session(self, session_id: str, max_bytes: int = 4096) -> str:
+        """
+        Returns the last max_bytes of the terminal session's output without waiting. Use this to check what just happened in a session.
+        """
+        self.logger.log(f"Tailing the last {max_bytes} bytes of terminal session {session_id}.")
+        try:
+            output = self.backend.tail(self._shell_id(session_id), max_bytes)
+        except KeyError:
+            return "Session not found or no history available."
+        if output is None:
+            output = self._get_log_reader(session_id).tail(max_bytes)
+        return output
 
     def update_action_history(self, session_id: str, command: str):
         """Updates the action history of a terminal session with the command sent."""
@@ -214,15 +350,198 @@ class TerminalTool(Unit):
                             },
                             "observation_time_in_seconds": {
                                 "type": "integer",
-                                "description": "The duration in seconds for which the terminal session will be observed.",
+                                "description": "The duration in seconds for which the terminal session will be observed. With idle_ms or until_regex, the maximum time to wait.",
+                            },
+                            "idle_ms": {
+                                "type": "integer",
+                                "description": "Return as soon as the terminal has printed nothing for this many milliseconds.",
+                            },
+                            "until_regex": {
+                                "type": "string",
+                                "description": "Return as soon as the new output matches this regular expression, e.g. a shell prompt or \"Server running\".",
+                            },
+                            "only_new_output": {
+                                "type": "boolean",
+                                "description": "Return only the output printed since the previous observation of this session.",
+                                "default": False
+                            },
+                            "compact": {
+                                "type": "boolean",
+                                "description": "Strip escape codes and progress bars, fold repeated lines and elide the middle of long output.",
+                                "default": True
+                            },
+                            "errors_only": {
+                                "type": "boolean",
+                                "description": "Only return lines that look like errors or warnings, with context and the final lines of the output.",
+                                "default": False
                             }
                         },
                         "required": ["session_id", "offset_start_time_by_in_seconds", "observation_time_in_seconds"],
                     },
                 },
             },
+            {
+                "type": "function",
+                "function": {
+                    "name": TerminalTool.run_command.__name__,
+                    "description": TerminalTool.run_command.__doc__,
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "session_id": {
+                                "type": "string",
+                                "description": "The session ID of the terminal session to run the command in.",
+                            },
+                            "command": {
+                                "type": "string",
+                                "description": "The command to run, e.g. \"python3.12 main.py\".",
+                            },
+                            "timeout": {
+                                "type": "integer",
+                                "description": "Seconds to wait for the command to finish before interrupting it.",
+                                "default": 60
+                            },
+                            "compact": {
+                                "type": "boolean",
+                                "description": "Strip escape codes and progress bars, fold repeated lines and elide the middle of long output.",
+                                "default": True
+                            },
+                            "errors_only": {
+                                "type": "boolean",
+                                "description": "Only return lines that look like errors or warnings, with context and the final lines of the output.",
+                                "default": False
+                            }
+                        },
+                        "required": ["session_id", "command"],
+                    },
+                },
+            },
+            {
+                "type": "function",
+                "function": {
+                    "name": TerminalTool.tail_terminal_session.__name__,
+                    "description": TerminalTool.tail_terminal_session.__doc__,
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "session_id": {
+                                "type": "string",
+                                "description": "The session ID of the terminal session to tail.",
+                            },
+                            "max_bytes": {
+                                "type": "integer",
+                                "description": "Maximum number of bytes of recent output to return.",
+                                "default": 4096
+                            }
+                        },
+                        "required": ["session_id"],
+                    },
+                },
+            },
         ]
 
+
+class AsyncTerminalTool(TerminalTool):
+    """
+    TerminalTool for asyncio callers such as BaseAssistant.execute_run_action. The tool methods are
+    coroutines with the same names, parameters and schema: waits use asyncio.sleep or backend output
+    events, and blocking backend and log calls run in worker threads, so observing one session does not
+    stall the others on the event loop. Working memory and logging stay on the event loop thread, since
+    their SQLite connections are not shared across threads.
+    """
+
+    async def new_terminal_session(self) -> str:
+        """
+        Creates a new terminal session and returns its session ID.
+        """
+        self.logger.log("Creating a new terminal session.")
+        try:
+            session_id = await asyncio.to_thread(self.session_pool.acquire)
+            self._register_session(session_id)
+        except Exception as e:
+            self.logger.log_exception(e)
+            raise RuntimeError("Failed to create new terminal session")
+        return session_id
+
+    async def control_c_terminal_session(self, session_id: str) -> UnitResult:
+        """
+        Closes the specified terminal session and returns a UnitResult indicating success or failure.
+        The shell is interrupted, reset and returned to the session pool for later sessions.
+        """
+        self.logger.log(f"Closing terminal session with ID: {session_id}")
+        try:
+            await asyncio.to_thread(self.session_pool.release, session_id)
+            return self._unregister_session(session_id)
+        except (subprocess.CalledProcessError, KeyError, OSError) as e:
+            self.logger.log_exception(e)
+            return self.fail_response(f"Failed to kill terminal session {session_id}")
+
+    async def send_terminal_command(self, session_id: str, command: str) -> UnitResult:
+        """
+        Sends a command to the specified terminal session and updates the session's action and history.
+        """
+        self.logger.log(f"Sending command to terminal session {session_id}: {command}")
+        try:
+            await asyncio.to_thread(self.backend.send_command, self._shell_id(session_id), command)
+            self.update_action_history(session_id, command)
+            return self.success_response("Command executed")
+        except (subprocess.CalledProcessError, KeyError, OSError) as e:
+            self.logger.log_exception(e)
+            return self.fail_response(f"Failed to send command to terminal session {session_id}: {e}")
+
+    async def run_command(self, session_id: str, command: str, timeout: int = 60, compact: bool = True, errors_only: bool = False) -> UnitResult:
+        """
+        Runs a command in the terminal session and waits for it to finish. Returns its stdout, stderr, exit code and duration as soon as it exits. Use this instead of send_terminal_command + observe_terminal_session for commands that terminate; use send_terminal_command for servers and other long-running processes. If the command runs longer than timeout seconds it is interrupted with Ctrl+C. Output is compacted like in observe_terminal_session.
+        """
+        self.logger.log(f"Running command in terminal session {session_id}: {command}")
+        try:
+            shell_id, reader, run = await asyncio.to_thread(self._start_command, session_id, command, timeout)
+            self.update_action_history(session_id, command)
+            action = run.step(await asyncio.to_thread(reader.read_new))
+            while action != RUN_DONE:
+                if action == RUN_INTERRUPT:
+                    await asyncio.to_thread(self._interrupt_command, shell_id, run)
+                else:
+                    await self.backend.async_wait_for_output(shell_id, run.remaining)
+                action = run.step(await asyncio.to_thread(reader.read_new))
+            return self._command_response(run, timeout, compact, errors_only)
+        except (subprocess.CalledProcessError, KeyError, OSError) as e:
+            self.logger.log_exception(e)
+            return self.fail_response(f"Failed to run command in terminal session {session_id}: {e}")
+
+    async def observe_terminal_session(self, session_id: str, offset_start_time_by_in_seconds: int, observation_time_in_seconds: int, idle_ms: int = None, until_regex: str = None, only_new_output: bool = False, compact: bool = True, errors_only: bool = False) -> str:
+        """
+        Observes the terminal session for a specified duration and returns the logs.
+        With only_new_output, returns everything printed since the previous observation instead of a time range.
+        With idle_ms or until_regex, observation_time_in_seconds is the maximum wait and the logs are returned as soon as the output has been quiet for idle_ms milliseconds or until_regex matches the new output (e.g. the shell prompt).
+        With compact (the default), escape codes, progress bar redraws and repeated lines are removed and long output is shortened in the middle; errors_only keeps just the error-looking lines.
+        """
+        self.logger.log(f"Observing terminal session {session_id} from {offset_start_time_by_in_seconds} seconds ago for {observation_time_in_seconds} seconds.")
+        log_file_path, error = self._observation_log(session_id, until_regex)
+        if error:
+            return error
+        start_time = time.time()
+        if idle_ms is None and until_regex is None:
+            await asyncio.sleep(observation_time_in_seconds)
+        else:
+            reason = await async_wait_for_log_output(log_file_path, observation_time_in_seconds, idle_ms, until_regex)
+            self.logger.log(f"Observation of {session_id} ended after {time.time() - start_time:.2f}s ({reason})")
+        return await asyncio.to_thread(self._read_observation, session_id, start_time - offset_start_time_by_in_seconds, only_new_output, compact, errors_only)
+
+    async def tail_terminal_session(self, session_id: str, max_bytes: int = 4096) -> str:
+        """
+        Returns the last max_bytes of the terminal session's output without waiting. Use this to check what just happened in a session.
+        """
+        self.logger.log(f"Tailing the last {max_bytes} bytes of terminal session {session_id}.")
+        try:
+            output = self.backend.tail(self._shell_id(session_id), max_bytes)
+        except KeyError:
+            return "Session not found or no history available."
+        if output is None:
+            output = await asyncio.to_thread(self._get_log_reader(session_id).tail, max_bytes)
+        return output
+
+
 if __name__ == "__main__":
     terminal_tool_instance = TerminalTool()
 
@@ -2,12 +2,53 @@ from .workspace_utils import (
     initialise_workspace,
     get_docker_container_id,
     get_container_merged_dir,
+    get_docker_client,
+    set_docker_client,
 ) 
 
+from .execution_backends import (
+    ExecutionBackend,
+    DockerExecutionBackend,
+    LocalProcessExecutionBackend,
+    ResourceLimits,
+)
+
+from .workspace_manager import (
+    WorkspaceManager,
+    Workspace,
+    WorkspaceError,
+    get_workspace_manager,
+)
+
 from .file_utils import (
     find_files,
+    iter_files,
 )
 
 from .llm import (
-    make_llm_api_call
+    make_llm_api_call,
+    make_llm_batch,
+    LLMBatchResult,
+    set_llm_backend,
+    get_llm_backend,
+)
+
+from .llm_backends import (
+    LLMBackend,
+    LiteLLMBackend,
+    FakeLLMBackend,
+)
+
+from .llm_telemetry import (
+    telemetry,
+    LLMCallRecord,
+)
+
+from .tokens import (
+    count_text_tokens,
+    count_messages_tokens,
+    fit_messages_to_context,
+    get_context_window,
+    ContextWindowError,
+    ContextTrimReport,
 )
\ No newline at end of file
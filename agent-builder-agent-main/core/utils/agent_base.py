@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import Any, List, Dict, Optional
 import os
 
 from openai import OpenAI
@@ -28,10 +28,11 @@ working_memory = WorkingMemory()
 # =========================
 
 class BaseAssistant:
-    def __init__(self, name: str, instructions: str, tools: List[Dict] = []):
+    def __init__(self, name: str, instructions: str, tools: List[Dict] = [], tool_instances: Optional[List[Any]] = None):
         self.name = name
         self.instructions = instructions
         self.tools = tools
+        self.tool_instances = tool_instances  # Tools bound to this session's workspace; created per action when None
         self.assistant_id = self.create_assistant(name, instructions, tools)
 
     @staticmethod
@@ -117,11 +118,14 @@ class BaseAssistant:
             tool_outputs = []
             logging.info(f"Debug: Processing {len(tool_calls)} tool calls for submission.")
 
-            from core.units import TerminalTool, FilesTool
+            if self.tool_instances is not None:
+                tool_instances = self.tool_instances
+            else:
+                from core.units import AsyncTerminalTool, FilesTool
 
-            # Access to all tools as per file_context_0 and file_context_1
-            terminal_tool = TerminalTool()
-            files_tool = FilesTool()
+                # Access to all tools as per file_context_0 and file_context_1
+                # The async terminal tool waits without blocking the event loop shared with other runs
+                tool_instances = [AsyncTerminalTool(), FilesTool()]
 
             for tool_call in tool_calls:
                 function_name = tool_call.function.name
@@ -132,7 +136,7 @@ class BaseAssistant:
                 try:
                     # Attempt to find the function in any tool instance
                     function = None
-                    for tool_instance in [terminal_tool, files_tool]:
+                    for tool_instance in tool_instances:
                         if hasattr(tool_instance, function_name):
                             function = getattr(tool_instance, function_name)
                             logging.info(f"Debug: Found function {function_name} in {type(tool_instance).__name__}")
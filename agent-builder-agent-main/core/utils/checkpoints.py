@@ -0,0 +1,228 @@
+import os
+import json
+import time
+import uuid
+import fcntl
+import shutil
+import hashlib
+import tempfile
+import threading
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Tuple
+
+from .file_reader import HASH_CHUNK_BYTES
+from .workspace_manifest import ManifestEntry, WorkspaceManifest, MANIFEST_DIR, WATCH_DEPTH
+
+CHECKPOINTS_DIR = "checkpoints"
+OBJECTS_DIR = "objects"
+OBJECTS_INDEX_FILE = "objects.json"
+FICLONE = 0x40049409  # ioctl that shares extents copy-on-write (btrfs, XFS, bcachefs)
+
+
+class CheckpointError(Exception):
+    pass
+
+
+@dataclass
+class Checkpoint:
+    id: str
+    created_at: float
+    label: Optional[str] = None
+    files: Dict[str, str] = field(default_factory=dict)  # path relative to root -> content hash
+    modes: Dict[str, int] = field(default_factory=dict)
+
+    def summary(self) -> Dict[str, object]:
+        return {"id": self.id, "label": self.label, "created_at": self.created_at, "files": len(self.files)}
+
+
+def _clone_or_copy(source_path: str, dest_path: str):
+    """
+    Copies source_path to dest_path as a reflink where the filesystem supports it, so the copy costs no
+    data blocks, and byte for byte otherwise. Either way later writes to one file never reach the other.
+    """
+    try:
+        with open(source_path, "rb") as source, open(dest_path, "wb") as dest:
+            fcntl.ioctl(dest.fileno(), FICLONE, source.fileno())
+        shutil.copystat(source_path, dest_path)
+    except OSError:
+        shutil.copy2(source_path, dest_path)
+
+
+def _hash_path(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CheckpointStore:
+    """
+    Snapshots of a workspace kept as content-addressed blobs under .kortix/objects, keyed by the hashes the
+    WorkspaceManifest already tracks. A checkpoint is a small JSON file mapping paths to hashes; a blob is
+    only created for content that no earlier checkpoint stored, so checkpointing an unchanged tree copies
+    nothing. Blobs are reflinked where the filesystem supports it and copied otherwise.
+
+    use_hardlinks=True links blobs to the workspace files instead. That avoids the copy, but a linked blob
+    shares its inode with the file, so any in-place write (shell redirection, sed -i, editors) also changes
+    the checkpoint and it can no longer be restored. Only opt in when workspace files are exclusively
+    replaced through atomic renames. The (size, mtime_ns, inode) signature of every blob is recorded when
+    it is stored; a blob whose signature changed is re-hashed before use and replaced or reported as
+    corrupted. Without use_hardlinks, blobs still linked by an older store are copied out on next use.
+    """
+
+    def __init__(self, manifest: WorkspaceManifest, store_dir: Optional[str] = None, use_hardlinks: bool = False):
+        self.manifest = manifest
+        self.use_hardlinks = use_hardlinks
+        self.root = manifest.root
+        self.store_dir = store_dir or os.path.join(self.root, MANIFEST_DIR)
+        self.objects_dir = os.path.join(self.store_dir, OBJECTS_DIR)
+        self.checkpoints_dir = os.path.join(self.store_dir, CHECKPOINTS_DIR)
+        self.index_path = os.path.join(self.store_dir, OBJECTS_INDEX_FILE)
+        self.lock = threading.Lock()
+        self.signatures: Dict[str, Tuple[int, int, int]] = {}
+        try:
+            with open(self.index_path, "r") as index_file:
+                self.signatures = {blob_hash: tuple(signature) for blob_hash, signature in json.load(index_file).items()}
+        except (OSError, ValueError):
+            self.signatures = {}
+
+    def _blob_path(self, blob_hash: str) -> str:
+        return os.path.join(self.objects_dir, blob_hash[:2], blob_hash[2:])
+
+    def _save_json(self, path: str, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(file_descriptor, "w") as temp_file:
+            json.dump(data, temp_file)
+        os.replace(temp_path, path)
+
+    def _blob_intact(self, blob_hash: str) -> bool:
+        """
+        True when the blob exists and still holds blob_hash. Only blobs whose stat changed since they were stored are re-hashed.
+        """
+        blob_path = self._blob_path(blob_hash)
+        try:
+            stat = os.stat(blob_path)
+        except OSError:
+            return False
+        if stat.st_nlink > 1 and not self.use_hardlinks:
+            # Still shares its inode with a workspace file; break the link before it is overwritten in place
+            if _hash_path(blob_path) != blob_hash:
+                return False
+            temp_path = f"{blob_path}.{uuid.uuid4().hex[:8]}.tmp"
+            _clone_or_copy(blob_path, temp_path)
+            os.replace(temp_path, blob_path)
+            stat = os.stat(blob_path)
+            self.signatures[blob_hash] = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+            return True
+        signature = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        if self.signatures.get(blob_hash) == signature:
+            return True
+        if _hash_path(blob_path) != blob_hash:
+            return False
+        self.signatures[blob_hash] = signature
+        return True
+
+    def _store_blob(self, source_path: str, entry: ManifestEntry) -> bool:
+        """
+        Stores source_path as the blob for entry.hash unless an intact blob already exists. Returns True when a blob was written.
+        """
+        blob_hash = entry.hash
+        if self._blob_intact(blob_hash):
+            return False
+        blob_path = self._blob_path(blob_hash)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        temp_path = f"{blob_path}.{uuid.uuid4().hex[:8]}.tmp"
+        if self.use_hardlinks:
+            try:
+                os.link(source_path, temp_path)
+            except OSError:
+                # Cross-device workspaces or filesystems without hardlinks
+                _clone_or_copy(source_path, temp_path)
+        else:
+            _clone_or_copy(source_path, temp_path)
+        os.replace(temp_path, blob_path)
+        if not entry.same_stat(os.stat(source_path)):
+            # The file changed between the scan and the copy
+            os.remove(blob_path)
+            raise CheckpointError(f"{os.path.relpath(source_path, self.root)} changed while the checkpoint was taken")
+        stat = os.stat(blob_path)
+        self.signatures[blob_hash] = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        return True
+
+    def create(self, label: Optional[str] = None) -> Checkpoint:
+        """
+        Records the current state of every tracked file under the workspace root.
+        """
+        with self.lock:
+            self.manifest.scan(self.root, WATCH_DEPTH)
+            with self.manifest.lock:
+                entries = dict(self.manifest.entries)
+            checkpoint = Checkpoint(id=f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}", created_at=time.time(), label=label)
+            for path, entry in entries.items():
+                absolute_path = os.path.join(self.root, path)
+                try:
+                    self._store_blob(absolute_path, entry)
+                    checkpoint.modes[path] = os.stat(absolute_path).st_mode & 0o7777
+                except FileNotFoundError:
+                    continue
+                checkpoint.files[path] = entry.hash
+            self._save_json(self.index_path, {blob_hash: list(signature) for blob_hash, signature in self.signatures.items()})
+            self._save_json(os.path.join(self.checkpoints_dir, f"{checkpoint.id}.json"), asdict(checkpoint))
+        return checkpoint
+
+    def get(self, checkpoint_id: str) -> Checkpoint:
+        path = os.path.join(self.checkpoints_dir, f"{os.path.basename(checkpoint_id)}.json")
+        try:
+            with open(path, "r") as checkpoint_file:
+                return Checkpoint(**json.load(checkpoint_file))
+        except (OSError, ValueError, TypeError):
+            raise CheckpointError(f"Checkpoint {checkpoint_id} does not exist")
+
+    def list(self) -> List[Checkpoint]:
+        if not os.path.isdir(self.checkpoints_dir):
+            return []
+        checkpoints = []
+        for file_name in os.listdir(self.checkpoints_dir):
+            if file_name.endswith(".json"):
+                try:
+                    checkpoints.append(self.get(file_name[:-len(".json")]))
+                except CheckpointError:
+                    continue
+        return sorted(checkpoints, key=lambda checkpoint: checkpoint.created_at)
+
+    def restore(self, checkpoint_id: str) -> Dict[str, List[str]]:
+        """
+        Brings the workspace back to the checkpoint. Only files whose hash differs are rewritten (copied from
+        their blob and renamed into place); tracked files that did not exist at the checkpoint are removed.
+        Excluded paths (node_modules, .kortix, ...) are never touched.
+        """
+        checkpoint = self.get(checkpoint_id)
+        with self.lock:
+            self.manifest.scan(self.root, WATCH_DEPTH)
+            with self.manifest.lock:
+                current = {path: entry.hash for path, entry in self.manifest.entries.items()}
+            to_write = [path for path, blob_hash in checkpoint.files.items() if current.get(path) != blob_hash]
+            corrupted = [path for path in to_write if not self._blob_intact(checkpoint.files[path])]
+            if corrupted:
+                raise CheckpointError(f"Checkpoint {checkpoint_id} has corrupted blobs for: {', '.join(sorted(corrupted))}")
+            restored, removed = [], []
+            for path in sorted(to_write):
+                absolute_path = os.path.join(self.root, path)
+                directory = os.path.dirname(absolute_path)
+                os.makedirs(directory, exist_ok=True)
+                file_descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+                os.close(file_descriptor)
+                shutil.copyfile(self._blob_path(checkpoint.files[path]), temp_path)
+                os.chmod(temp_path, checkpoint.modes.get(path, 0o644))
+                os.replace(temp_path, absolute_path)
+                restored.append(path)
+            for path in sorted(set(current) - set(checkpoint.files)):
+                try:
+                    os.remove(os.path.join(self.root, path))
+                except FileNotFoundError:
+                    pass
+                removed.append(path)
+            self.manifest.refresh_paths(restored + removed)
+        return {"restored": restored, "removed": removed}
@@ -0,0 +1,266 @@
+import os
+import re
+import json
+import difflib
+import tempfile
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+# Edits are requested as SEARCH/REPLACE blocks (or a unified diff) and applied locally, so the model only
+# writes the lines that change. Blocks are anchored exactly first, then ignoring trailing whitespace, then
+# ignoring indentation, and finally by the most similar window of lines.
+
+SEARCH_MARKER = "<<<<<<< SEARCH"
+DIVIDER_MARKER = "======="
+REPLACE_MARKER = ">>>>>>> REPLACE"
+FUZZY_THRESHOLD = 0.85  # Minimum similarity for the last-resort anchoring
+FUZZY_AMBIGUITY_MARGIN = 0.02  # A separate window scoring this close to the best one makes the anchoring ambiguous
+
+EDIT_FILE_SYSTEM_PROMPT = f"""You are a brilliant and meticulous engineer. You edit existing files by describing only the changes, never by rewriting the whole file.
+
+Respond with one or more SEARCH/REPLACE blocks in exactly this format:
+
+{SEARCH_MARKER}
+the exact existing lines to change, with enough surrounding lines to be unique
+{DIVIDER_MARKER}
+the new lines that replace them
+{REPLACE_MARKER}
+
+Rules:
+- The SEARCH section must match the current file exactly, including indentation and comments.
+- Keep each block small: include only the lines that change plus a few lines of context.
+- To delete code, leave the REPLACE section empty. To append to the end of the file, leave the SEARCH section empty.
+- Use several blocks for changes in different places; they are applied in order.
+- Instead of blocks you may answer with a unified diff (lines starting with ---, +++, @@, space, + and -).
+- Do not output anything else."""
+
+
+class EditError(Exception):
+    pass
+
+
+@dataclass
+class EditBlock:
+    search: str
+    replace: str
+
+
+def parse_search_replace_blocks(text: str) -> List[EditBlock]:
+    """
+    Extracts the SEARCH/REPLACE blocks from a model response, ignoring any surrounding prose or code fences.
+    """
+    blocks = []
+    lines = text.splitlines(keepends=True)
+    index = 0
+    while index < len(lines):
+        if lines[index].strip() != SEARCH_MARKER:
+            index += 1
+            continue
+        search, replace, section = [], [], "search"
+        index += 1
+        while index < len(lines):
+            marker = lines[index].strip()
+            if section == "search" and marker == DIVIDER_MARKER:
+                section = "replace"
+            elif section == "replace" and marker == REPLACE_MARKER:
+                break
+            elif section == "search":
+                search.append(lines[index])
+            else:
+                replace.append(lines[index])
+            index += 1
+        else:
+            raise EditError("Unterminated SEARCH/REPLACE block: every block must end with " + REPLACE_MARKER)
+        blocks.append(EditBlock("".join(search), "".join(replace)))
+        index += 1
+    return blocks
+
+
+def parse_unified_diff(text: str) -> List[EditBlock]:
+    """
+    Converts the hunks of a unified diff into edit blocks (context and removed lines become the search
+    text, context and added lines the replacement). Line numbers in the hunk headers are ignored because
+    models rarely get them right; the hunks are anchored by their content instead.
+    """
+    blocks = []
+    search, replace, in_hunk = [], [], False
+
+    def close_hunk():
+        if search or replace:
+            blocks.append(EditBlock("".join(search), "".join(replace)))
+
+    for line in text.splitlines(keepends=True):
+        if line.startswith("@@"):
+            close_hunk()
+            search, replace, in_hunk = [], [], True
+        elif line.startswith(("--- ", "+++ ", "diff ", "index ", "```")):
+            close_hunk()
+            search, replace, in_hunk = [], [], False
+        elif in_hunk:
+            if line.startswith("\\"):  # "\ No newline at end of file"
+                continue
+            body = line[1:] if line[:1] in (" ", "+", "-") else line
+            if line.startswith("-"):
+                search.append(body)
+            elif line.startswith("+"):
+                replace.append(body)
+            else:
+                search.append(body if body.strip() or body.endswith("\n") else "\n")
+                replace.append(body if body.strip() or body.endswith("\n") else "\n")
+    close_hunk()
+    return blocks
+
+
+def parse_edit_response(text: str) -> List[EditBlock]:
+    blocks = parse_search_replace_blocks(text)
+    if not blocks and re.search(r"^@@", text, re.MULTILINE):
+        blocks = parse_unified_diff(text)
+    if not blocks:
+        raise EditError("No SEARCH/REPLACE blocks or unified diff hunks found in the response")
+    return blocks
+
+
+def _leading_whitespace(line: str) -> str:
+    return line[:len(line) - len(line.lstrip())]
+
+
+def _find_line_window(file_lines: List[str], search_lines: List[str], normalize) -> List[int]:
+    target = [normalize(line) for line in search_lines]
+    normalized = [normalize(line) for line in file_lines]
+    width = len(target)
+    return [start for start in range(len(file_lines) - width + 1) if normalized[start:start + width] == target]
+
+
+def _reindent(replace_lines: List[str], file_indent: str, search_indent: str) -> List[str]:
+    """
+    Shifts the replacement by the indentation difference between the file and the search text.
+    """
+    if file_indent == search_indent:
+        return replace_lines
+    shifted = []
+    for line in replace_lines:
+        if not line.strip():
+            shifted.append(line)
+        elif line.startswith(search_indent):
+            shifted.append(file_indent + line[len(search_indent):])
+        else:
+            shifted.append(file_indent + line.lstrip())
+    return shifted
+
+
+def _best_fuzzy_window(file_lines: List[str], search_lines: List[str]) -> Tuple[Optional[int], float, Optional[int]]:
+    """
+    Returns the start and similarity of the most similar window, and the start of a window that does not
+    overlap it but scores within FUZZY_AMBIGUITY_MARGIN, if there is one (e.g. two near-identical functions).
+    """
+    width = len(search_lines)
+    target = "".join(line.strip() + "\n" for line in search_lines)
+    matcher = difflib.SequenceMatcher(autojunk=False)
+    matcher.set_seq2(target)
+    candidates = []
+    for start in range(len(file_lines) - width + 1):
+        matcher.set_seq1("".join(line.strip() + "\n" for line in file_lines[start:start + width]))
+        if matcher.real_quick_ratio() < FUZZY_THRESHOLD or matcher.quick_ratio() < FUZZY_THRESHOLD:
+            continue
+        ratio = matcher.ratio()
+        if ratio >= FUZZY_THRESHOLD:
+            candidates.append((start, ratio))
+    if not candidates:
+        return None, 0.0, None
+    best_start, best_ratio = max(candidates, key=lambda candidate: candidate[1])
+    rival = next((start for start, ratio in candidates if abs(start - best_start) >= width and ratio >= best_ratio - FUZZY_AMBIGUITY_MARGIN), None)
+    return best_start, best_ratio, rival
+
+
+def _ensure_newline(text: str) -> str:
+    return text if not text or text.endswith("\n") else text + "\n"
+
+
+def apply_edit_block(content: str, block: EditBlock) -> str:
+    """
+    Applies one block to content. Raises EditError when the search text cannot be anchored or is ambiguous.
+    """
+    if not block.search.strip():
+        return _ensure_newline(content) + block.replace
+
+    occurrences = content.count(block.search)
+    if occurrences == 1:
+        return content.replace(block.search, block.replace, 1)
+    if occurrences > 1:
+        raise EditError(f"SEARCH text matches {occurrences} places; include more surrounding lines to make it unique:\n{block.search}")
+
+    file_lines = _ensure_newline(content).splitlines(keepends=True)
+    search_lines = _ensure_newline(block.search).splitlines(keepends=True)
+    while search_lines and not search_lines[0].strip():
+        search_lines.pop(0)
+    while search_lines and not search_lines[-1].strip():
+        search_lines.pop()
+    replace_lines = _ensure_newline(block.replace).splitlines(keepends=True)
+    width = len(search_lines)
+
+    for normalize in (str.rstrip, str.strip):
+        starts = _find_line_window(file_lines, search_lines, normalize)
+        if len(starts) > 1:
+            raise EditError(f"SEARCH text matches {len(starts)} places; include more surrounding lines to make it unique:\n{block.search}")
+        if starts:
+            start = starts[0]
+            break
+    else:
+        start, _, rival = _best_fuzzy_window(file_lines, search_lines)
+        if start is None:
+            raise EditError(f"SEARCH text does not match the file:\n{block.search}")
+        if rival is not None:
+            raise EditError(f"SEARCH text does not match the file exactly and is similar to lines {min(start, rival) + 1} and {max(start, rival) + 1}; copy the exact lines to change:\n{block.search}")
+
+    first_line = next((line for line in search_lines if line.strip()), "")
+    file_first_line = next((line for line in file_lines[start:start + width] if line.strip()), "")
+    replace_lines = _reindent(replace_lines, _leading_whitespace(file_first_line), _leading_whitespace(first_line))
+    edited = "".join(file_lines[:start] + replace_lines + file_lines[start + width:])
+    if not content.endswith("\n") and edited.endswith("\n"):
+        edited = edited[:-1]  # The lines were split with a newline added to the last one; keep the file's missing final newline
+    return edited
+
+
+def apply_edit_blocks(content: str, blocks: List[EditBlock]) -> str:
+    for index, block in enumerate(blocks):
+        try:
+            content = apply_edit_block(content, block)
+        except EditError as e:
+            raise EditError(f"Block {index + 1} of {len(blocks)} failed: {e}")
+    return content
+
+
+def validate_content(path: str, content: str) -> Optional[str]:
+    """
+    Returns an error message when content is not valid for the file type (Python and JSON are checked).
+    """
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        if extension == ".py":
+            compile(content, path, "exec")
+        elif extension == ".json":
+            json.loads(content)
+    except SyntaxError as e:
+        return f"SyntaxError in {path} line {e.lineno}: {e.msg}"
+    except ValueError as e:
+        return f"Invalid JSON in {path}: {e}"
+    return None
+
+
+def write_atomic(path: str, content: str):
+    """
+    Writes content to a temporary file next to path and renames it over path, so readers never see a partial file.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    file_descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, "w") as temp_file:
+            temp_file.write(content)
+        if os.path.exists(path):
+            os.chmod(temp_path, os.stat(path).st_mode & 0o7777)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -0,0 +1,136 @@
+import os
+import sys
+import shutil
+import resource
+import tempfile
+import subprocess
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from .terminal_backends import TerminalBackend, TmuxTerminalBackend, DockerExecTerminalBackend, LocalPtyTerminalBackend
+from .terminal_logs import LOG_MAX_BYTES, LOG_SEGMENTS
+from .workspace_utils import get_docker_client
+
+SHELL = "/bin/bash"
+# Run as `python -c SET_LIMITS_EXEC <limit>=<value>... -- argv...`; soft limits are capped at the hard ones
+SET_LIMITS_EXEC = (
+    "import os, resource, sys\n"
+    "separator = sys.argv.index('--')\n"
+    "for limit, value in (argument.split('=') for argument in sys.argv[1:separator]):\n"
+    "    _, hard = resource.getrlimit(int(limit))\n"
+    "    resource.setrlimit(int(limit), (int(value) if hard == resource.RLIM_INFINITY else min(int(value), hard), hard))\n"
+    "os.execvp(sys.argv[separator + 1], sys.argv[separator + 1:])"
+)
+UNSHARE_NAMESPACES = ("--user", "--map-root-user", "--pid", "--fork", "--mount-proc")  # No root needed; the shell sees only its own processes
+
+
+class ExecutionBackend(ABC):
+    """
+    Where a session's files live and where its commands run. FilesTool works on workspace_path on the
+    host, and TerminalTool runs its shells through create_terminal_backend, so the tools do not depend on
+    Docker or tmux being available.
+    """
+
+    workspace_path: str  # Host directory holding the session's files
+    logs_dir: Optional[str] = None  # Where terminal logs go; None keeps TerminalTool.logs_dir
+
+    @abstractmethod
+    def create_terminal_backend(self, log_max_bytes: int = LOG_MAX_BYTES, log_segments: int = LOG_SEGMENTS) -> TerminalBackend:
+        pass
+
+    def close(self):
+        pass
+
+
+class DockerExecutionBackend(ExecutionBackend):
+    """
+    Commands run in a workspace container whose /app is the host directory workspace_path, as set up by
+    docker-compose or leased from the WorkspaceManager.
+    """
+
+    def __init__(self, container_name: str, workspace_path: str, terminal_backend: str = "tmux", client=None):
+        self.container_name = container_name
+        self.workspace_path = workspace_path
+        self.terminal_backend = terminal_backend
+        self.client = client or get_docker_client()
+
+    def create_terminal_backend(self, log_max_bytes: int = LOG_MAX_BYTES, log_segments: int = LOG_SEGMENTS) -> TerminalBackend:
+        if self.terminal_backend == "docker_exec":
+            return DockerExecTerminalBackend(self.container_name, client=self.client, log_max_bytes=log_max_bytes, log_segments=log_segments)
+        if self.terminal_backend == "tmux":
+            return TmuxTerminalBackend(self.container_name, log_max_bytes=log_max_bytes, log_segments=log_segments)
+        raise ValueError(f"Unknown terminal backend: {self.terminal_backend}")
+
+
+@dataclass
+class ResourceLimits:
+    """
+    rlimits applied to every process started by a LocalProcessExecutionBackend; None leaves a limit unchanged.
+    """
+    cpu_seconds: Optional[int] = 600
+    memory_bytes: Optional[int] = 4 * 1024 ** 3  # Address space, so it also caps runaway allocations
+    file_size_bytes: Optional[int] = 1024 ** 3
+    open_files: Optional[int] = 1024
+    processes: Optional[int] = None  # RLIMIT_NPROC counts every process of the user, not just the sandbox's
+
+    def wrap(self, argv: List[str]) -> List[str]:
+        """
+        Prefixes argv with a small Python exec wrapper that sets the limits and then execs argv, so they
+        apply from the first instruction of the command without a preexec_fn in the (threaded) parent.
+        """
+        limits = [f"{limit}={value}" for limit, value in ((resource.RLIMIT_CPU, self.cpu_seconds), (resource.RLIMIT_AS, self.memory_bytes), (resource.RLIMIT_FSIZE, self.file_size_bytes), (resource.RLIMIT_NOFILE, self.open_files), (resource.RLIMIT_NPROC, self.processes)) if value is not None]
+        return [sys.executable, "-c", SET_LIMITS_EXEC, *limits, "--", *argv]
+
+
+@lru_cache(maxsize=None)
+def unshare_available(namespaces: Tuple[str, ...] = UNSHARE_NAMESPACES) -> bool:
+    """
+    Whether unprivileged `unshare` with these namespaces works here; it is often disabled in containers.
+    """
+    if shutil.which("unshare") is None:
+        return False
+    try:
+        return subprocess.run(["unshare", *namespaces, "true"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+
+class LocalProcessExecutionBackend(ExecutionBackend):
+    """
+    Runs the session as local processes in a private temporary directory, with rlimits and, where the
+    kernel allows unprivileged user namespaces, its own user and PID namespace through unshare. There is
+    nothing to start, so sessions are ready in milliseconds and tests need neither Docker nor tmux. This
+    is a lightweight sandbox against accidents, not a security boundary: files outside the workspace and
+    the network remain reachable.
+    """
+
+    def __init__(self, workspace_path: Optional[str] = None, limits: Optional[ResourceLimits] = None, use_unshare: bool = True, env: Optional[Dict[str, str]] = None):
+        self.root = tempfile.mkdtemp(prefix="agent-session-")
+        self.workspace_path = workspace_path or os.path.join(self.root, "workspace")
+        self.logs_dir = os.path.join(self.root, "terminal_logs")
+        os.makedirs(self.workspace_path, exist_ok=True)
+        os.makedirs(self.logs_dir, exist_ok=True)
+        self.limits = limits or ResourceLimits()
+        self.use_unshare = use_unshare and unshare_available()
+        self.env = {
+            "PATH": os.environ.get("PATH", "/usr/local/bin:/usr/bin:/bin"),
+            "HOME": self.workspace_path,
+            "TMPDIR": self.root,
+            "TERM": "xterm",
+            "LANG": os.environ.get("LANG", "C.UTF-8"),
+            "PS1": "$ ",
+            **(env or {}),
+        }
+
+    def _argv(self, *command: str) -> List[str]:
+        # The limits are set outside unshare, so the process it forks inherits them
+        return self.limits.wrap([*(("unshare", *UNSHARE_NAMESPACES) if self.use_unshare else ()), *command])
+
+    def create_terminal_backend(self, log_max_bytes: int = LOG_MAX_BYTES, log_segments: int = LOG_SEGMENTS) -> TerminalBackend:
+        return LocalPtyTerminalBackend(self._argv(SHELL, "--noprofile", "--norc", "-i"), self.workspace_path, self.env, log_max_bytes, log_segments)
+
+    def close(self):
+        # A workspace passed in by the caller lives outside root and is kept
+        shutil.rmtree(self.root, ignore_errors=True)
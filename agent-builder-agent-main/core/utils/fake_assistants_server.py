@@ -0,0 +1,239 @@
+import json
+import random
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+from .llm_backends import FakeLLMBackend, LLMBackend
+
+# Local stand-in for the OpenAI Assistants v2 endpoints used by BaseAssistant in agent_base.py.
+# Point the OpenAI client at it with OPENAI_BASE_URL=http://127.0.0.1:8765/v1 (any OPENAI_API_KEY works).
+# Runs are answered by an LLMBackend, so a scripted FakeLLMBackend drives tool calls and replies.
+
+
+def _new_id(prefix: str) -> str:
+    return f"{prefix}_{uuid.uuid4().hex[:24]}"
+
+
+class FakeAssistantsState:
+    def __init__(self, backend: Optional[LLMBackend] = None, run_latency_s: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.backend = backend or FakeLLMBackend()
+        self.run_latency_s = run_latency_s
+        self.error_rate = error_rate
+        self.assistants: Dict[str, Dict[str, Any]] = {}
+        self.threads: Dict[str, Dict[str, Any]] = {}
+        self.messages: Dict[str, List[Dict[str, Any]]] = {}
+        self.runs: Dict[str, Dict[str, Any]] = {}
+        self.transcripts: Dict[str, List[Dict[str, Any]]] = {}  # Tool call/result turns per run
+        self._rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def maybe_fail(self):
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise HTTPException(status_code=500, detail="Injected fake server error")
+
+    def add_message(self, thread_id: str, role: str, content: str, run_id: Optional[str] = None, assistant_id: Optional[str] = None) -> Dict[str, Any]:
+        message = {
+            "id": _new_id("msg"),
+            "object": "thread.message",
+            "created_at": int(time.time()),
+            "thread_id": thread_id,
+            "role": role,
+            "content": [{"type": "text", "text": {"value": content, "annotations": []}}],
+            "assistant_id": assistant_id,
+            "run_id": run_id,
+            "attachments": [],
+            "metadata": {},
+            "status": "completed",
+        }
+        self.messages[thread_id].append(message)
+        return message
+
+    def advance_run(self, run: Dict[str, Any]):
+        """
+        Moves a queued run forward once its simulated latency has passed: the backend either requests
+        tool calls (requires_action) or answers with an assistant message (completed).
+        """
+        if run["status"] not in ("queued", "in_progress"):
+            return
+        if time.time() - run["_queued_at"] < self.run_latency_s:
+            run["status"] = "in_progress"
+            return
+        assistant = self.assistants[run["assistant_id"]]
+        instructions = assistant["instructions"] or ""
+        if run.get("additional_instructions"):
+            instructions = f"{instructions}\n{run['additional_instructions']}"
+        chat_messages = [{"role": "system", "content": instructions}]
+        for message in self.messages[run["thread_id"]]:
+            chat_messages.append({"role": message["role"], "content": message["content"][0]["text"]["value"]})
+        chat_messages.extend(self.transcripts[run["id"]])
+        try:
+            response = self.backend.completion(model=run["model"], messages=chat_messages, tools=assistant["tools"] or None)
+        except Exception as e:
+            run["status"] = "failed"
+            run["last_error"] = {"code": "server_error", "message": str(e)}
+            return
+        message = response.choices[0].message
+        if message.tool_calls:
+            tool_calls = [{"id": call.id, "type": "function", "function": {"name": call.function.name, "arguments": call.function.arguments}} for call in message.tool_calls]
+            self.transcripts[run["id"]].append({"role": "assistant", "content": None, "tool_calls": tool_calls})
+            run["status"] = "requires_action"
+            run["required_action"] = {"type": "submit_tool_outputs", "submit_tool_outputs": {"tool_calls": tool_calls}}
+        else:
+            self.add_message(run["thread_id"], "assistant", message.content or "", run_id=run["id"], assistant_id=run["assistant_id"])
+            run["status"] = "completed"
+            run["required_action"] = None
+            run["completed_at"] = int(time.time())
+
+
+def _public(run: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in run.items() if not key.startswith("_")}
+
+
+def create_app(state: Optional[FakeAssistantsState] = None) -> FastAPI:
+    state = state or FakeAssistantsState()
+    app = FastAPI()
+    app.state.fake = state
+
+    @app.exception_handler(HTTPException)
+    async def openai_error(request: Request, exc: HTTPException):
+        return JSONResponse(status_code=exc.status_code, content={"error": {"message": exc.detail, "type": "server_error"}})
+
+    def get_thread_messages(thread_id: str) -> List[Dict[str, Any]]:
+        if thread_id not in state.threads:
+            raise HTTPException(status_code=404, detail=f"No thread found with id '{thread_id}'")
+        return state.messages[thread_id]
+
+    def get_run_or_404(thread_id: str, run_id: str) -> Dict[str, Any]:
+        run = state.runs.get(run_id)
+        if run is None or run["thread_id"] != thread_id:
+            raise HTTPException(status_code=404, detail=f"No run found with id '{run_id}'")
+        return run
+
+    @app.post("/v1/assistants")
+    async def create_assistant(request: Request):
+        body = await request.json()
+        with state.lock:
+            state.maybe_fail()
+            assistant = {
+                "id": _new_id("asst"),
+                "object": "assistant",
+                "created_at": int(time.time()),
+                "name": body.get("name"),
+                "description": None,
+                "model": body.get("model", "gpt-4o"),
+                "instructions": body.get("instructions"),
+                "tools": body.get("tools", []),
+                "temperature": body.get("temperature"),
+                "metadata": {},
+            }
+            state.assistants[assistant["id"]] = assistant
+        return assistant
+
+    @app.post("/v1/threads")
+    async def create_thread():
+        with state.lock:
+            state.maybe_fail()
+            thread = {"id": _new_id("thread"), "object": "thread", "created_at": int(time.time()), "metadata": {}, "tool_resources": {}}
+            state.threads[thread["id"]] = thread
+            state.messages[thread["id"]] = []
+        return thread
+
+    @app.post("/v1/threads/{thread_id}/messages")
+    async def create_message(thread_id: str, request: Request):
+        body = await request.json()
+        with state.lock:
+            state.maybe_fail()
+            get_thread_messages(thread_id)
+            content = body.get("content", "")
+            if not isinstance(content, str):
+                content = json.dumps(content)
+            return state.add_message(thread_id, body.get("role", "user"), content)
+
+    @app.get("/v1/threads/{thread_id}/messages")
+    async def list_messages(thread_id: str):
+        with state.lock:
+            state.maybe_fail()
+            messages = list(reversed(get_thread_messages(thread_id)))  # The API lists newest first by default
+        return {
+            "object": "list",
+            "data": messages,
+            "first_id": messages[0]["id"] if messages else None,
+            "last_id": messages[-1]["id"] if messages else None,
+            "has_more": False,
+        }
+
+    @app.post("/v1/threads/{thread_id}/runs")
+    async def create_run(thread_id: str, request: Request):
+        body = await request.json()
+        with state.lock:
+            state.maybe_fail()
+            get_thread_messages(thread_id)
+            assistant = state.assistants.get(body.get("assistant_id"))
+            if assistant is None:
+                raise HTTPException(status_code=404, detail=f"No assistant found with id '{body.get('assistant_id')}'")
+            run = {
+                "id": _new_id("run"),
+                "object": "thread.run",
+                "created_at": int(time.time()),
+                "thread_id": thread_id,
+                "assistant_id": assistant["id"],
+                "status": "queued",
+                "required_action": None,
+                "last_error": None,
+                "model": assistant["model"],
+                "instructions": assistant["instructions"],
+                "additional_instructions": body.get("additional_instructions"),
+                "tools": assistant["tools"],
+                "metadata": {},
+                "completed_at": None,
+                "_queued_at": time.time(),
+            }
+            state.runs[run["id"]] = run
+            state.transcripts[run["id"]] = []
+        return _public(run)
+
+    @app.get("/v1/threads/{thread_id}/runs/{run_id}")
+    async def retrieve_run(thread_id: str, run_id: str):
+        with state.lock:
+            state.maybe_fail()
+            run = get_run_or_404(thread_id, run_id)
+            state.advance_run(run)
+            return _public(run)
+
+    @app.post("/v1/threads/{thread_id}/runs/{run_id}/submit_tool_outputs")
+    async def submit_tool_outputs(thread_id: str, run_id: str, request: Request):
+        body = await request.json()
+        with state.lock:
+            state.maybe_fail()
+            run = get_run_or_404(thread_id, run_id)
+            if run["status"] != "requires_action":
+                raise HTTPException(status_code=400, detail=f"Run {run_id} is not waiting for tool outputs")
+            for tool_output in body.get("tool_outputs", []):
+                state.transcripts[run_id].append({"role": "tool", "tool_call_id": tool_output["tool_call_id"], "content": tool_output.get("output", "")})
+            run["status"] = "queued"
+            run["required_action"] = None
+            run["_queued_at"] = time.time()
+            return _public(run)
+
+    return app
+
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve a fake OpenAI Assistants API for offline load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixture", help="JSON fixture with scripted replies for FakeLLMBackend")
+    parser.add_argument("--run-latency", type=float, default=0.0, help="Seconds a run stays in progress")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    args = parser.parse_args()
+
+    fake_state = FakeAssistantsState(FakeLLMBackend(fixture_path=args.fixture), run_latency_s=args.run_latency, error_rate=args.error_rate)
+    uvicorn.run(create_app(fake_state), host=args.host, port=args.port)
@@ -0,0 +1,126 @@
+import os
+import mmap
+import codecs
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+SNIFF_BYTES = 8192  # Bytes inspected to decide whether a file is binary
+MMAP_THRESHOLD_BYTES = 1024 * 1024  # Files at least this large are mapped instead of read
+MAX_FILE_BYTES = 2 * 1024 * 1024  # Larger files are hashed but their contents are not loaded
+MAX_TOTAL_BYTES = 64 * 1024 * 1024  # Cap on the contents loaded into memory
+PARALLEL_THRESHOLD = 8  # Fewer files than this are read on the calling thread
+HASH_CHUNK_BYTES = 1024 * 1024
+
+SKIP_BINARY = "binary"
+SKIP_TOO_LARGE = "too_large"
+SKIP_TOTAL_CAP = "total_cap"
+
+
+def hash_bytes(data) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def decode_text(data: bytes) -> Optional[str]:
+    """
+    Decodes file bytes the way open(..., 'r', encoding='utf-8') would, returning None for non UTF-8 files.
+    """
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def looks_binary(head: bytes) -> bool:
+    """
+    Treats a file as binary if its first bytes contain NUL or are not valid UTF-8
+    (a multi-byte character cut off at the end of the sample is allowed).
+    """
+    if b"\0" in head:
+        return True
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+    except UnicodeDecodeError:
+        return True
+    return False
+
+
+@dataclass
+class FileReadResult:
+    path: str
+    hash: Optional[str] = None
+    text: Optional[str] = None
+    skip_reason: Optional[str] = None
+    error: Optional[str] = None
+
+
+def _hash_file(file, size: int) -> str:
+    if size >= MMAP_THRESHOLD_BYTES:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return hash_bytes(mapped)
+    digest = hashlib.blake2b(digest_size=16)
+    file.seek(0)
+    for chunk in iter(lambda: file.read(HASH_CHUNK_BYTES), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_file(absolute_path: str, relative_path: str, size: int, load_contents: bool = True, max_file_bytes: int = MAX_FILE_BYTES) -> FileReadResult:
+    """
+    Hashes one file and, unless it is binary, too large or load_contents is false, decodes its text.
+    Binary files are detected from the first SNIFF_BYTES; large files are memory-mapped.
+    """
+    result = FileReadResult(relative_path)
+    try:
+        with open(absolute_path, "rb") as file:
+            if size == 0:
+                result.hash = hash_bytes(b"")
+                result.text = "" if load_contents else None
+                return result
+            head = file.read(SNIFF_BYTES)
+            if looks_binary(head):
+                result.skip_reason = SKIP_BINARY
+            elif size > max_file_bytes:
+                result.skip_reason = SKIP_TOO_LARGE
+            elif not load_contents:
+                result.skip_reason = SKIP_TOTAL_CAP
+            if result.skip_reason:
+                result.hash = _hash_file(file, size)
+                return result
+            if size >= MMAP_THRESHOLD_BYTES:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    data = mapped[:]
+            else:
+                data = head + file.read()
+    except (OSError, ValueError) as e:
+        result.error = str(e)
+        return result
+    result.hash = hash_bytes(data)
+    result.text = decode_text(data)
+    if result.text is None:
+        result.skip_reason = SKIP_BINARY
+    return result
+
+
+def read_files(root: str, files: List[Tuple[str, int]], max_file_bytes: int = MAX_FILE_BYTES, max_total_bytes: int = MAX_TOTAL_BYTES, max_workers: Optional[int] = None) -> Dict[str, FileReadResult]:
+    """
+    Reads (relative path, size) pairs under root concurrently on a thread pool.
+    Contents are loaded in order until max_total_bytes is used up; the remaining files are only hashed.
+    """
+    budget = max_total_bytes
+    jobs = []
+    for relative_path, size in files:
+        load_contents = size <= max_file_bytes and size <= budget
+        if load_contents:
+            budget -= size
+        jobs.append((os.path.join(root, relative_path), relative_path, size, load_contents, max_file_bytes))
+
+    if len(jobs) < PARALLEL_THRESHOLD:
+        results = [read_file(*job) for job in jobs]
+    else:
+        workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(lambda job: read_file(*job), jobs))
+    return {result.path: result for result in results}
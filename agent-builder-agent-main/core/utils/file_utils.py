@@ -1,5 +1,8 @@
 import os
-from pathlib import Path
+import re
+import fnmatch
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 EXCLUDED_FILES = [
     ".DS_Store",
@@ -25,7 +28,8 @@ EXCLUDED_DIRS = [
     "dist",
     "build",
     "coverage",
-    "terminal_logs"
+    "terminal_logs",
+    ".kortix",
 ]
 EXCLUDED_EXT = [
     ".ico",
@@ -40,37 +44,308 @@ EXCLUDED_EXT = [
 ]
 
 
+EXCLUDED_GLOBS = []  # fnmatch patterns matched against the relative path and the base name
+
+
+def _compile_gitignore_pattern(pattern: str) -> Optional[Tuple[re.Pattern, bool, bool]]:
+    """
+    Compiles one .gitignore line into (regex over paths relative to the .gitignore directory, negated, dir_only).
+    """
+    pattern = pattern.rstrip("\n").rstrip()
+    if not pattern or pattern.startswith("#"):
+        return None
+    negated = pattern.startswith("!")
+    if negated:
+        pattern = pattern[1:]
+    elif pattern.startswith("\\"):
+        pattern = pattern[1:]
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    if not pattern:
+        return None
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            regex += "/.*"
+            i += 3
+        elif pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                regex += "\\["
+                i += 1
+            else:
+                regex += "[" + pattern[i + 1:end].replace("!", "^", 1) + "]"
+                i = end + 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    prefix = "" if anchored else "(?:.*/)?"
+    return re.compile(f"^{prefix}{regex}$"), negated, dir_only
+
+
+class ExclusionMatcher:
+    """
+    Compiled form of the exclusion lists, built once per workspace root:
+    - EXCLUDED_DIRS as a prefix trie of path components anchored at root (the _should_exclude rule)
+      plus a set of directory names excluded at any depth,
+    - EXCLUDED_FILES as a name set, EXCLUDED_EXT as a suffix tuple and EXCLUDED_GLOBS as one regex,
+    - optionally the rules of every .gitignore file in the workspace.
+    A path is excluded if any of its ancestor directories is. Directory results are cached per directory
+    until clear_cache() is called.
+    """
+
+    def __init__(self, root: str, excluded_dirs: Iterable[str] = None, excluded_files: Iterable[str] = None, excluded_ext: Iterable[str] = None, excluded_globs: Iterable[str] = None, use_gitignore: bool = False):
+        self.root = os.path.abspath(root)
+        self._root_prefix = self.root.rstrip(os.sep) + os.sep
+        self.use_gitignore = use_gitignore
+        excluded_dirs = EXCLUDED_DIRS if excluded_dirs is None else excluded_dirs
+        self._trie: Dict[str, dict] = {}
+        for dir_name in excluded_dirs:
+            node = self._trie
+            for part in os.path.normpath(dir_name).split(os.sep):
+                node = node.setdefault(part, {})
+            node[None] = True  # Marks the end of an excluded prefix
+        self._dir_names = frozenset(name for name in excluded_dirs if os.sep not in os.path.normpath(name))
+        self._file_names = frozenset(EXCLUDED_FILES if excluded_files is None else excluded_files)
+        self._suffixes = tuple(EXCLUDED_EXT if excluded_ext is None else excluded_ext)
+        globs = list(EXCLUDED_GLOBS if excluded_globs is None else excluded_globs)
+        self._glob = re.compile("|".join(f"(?:{fnmatch.translate(glob)})" for glob in globs)) if globs else None
+        self._dir_cache: Dict[str, bool] = {}
+        self._gitignore_cache: Dict[str, List[Tuple[str, re.Pattern, bool, bool]]] = {}
+        self._lock = threading.Lock()
+
+    def clear_cache(self):
+        with self._lock:
+            self._dir_cache.clear()
+            self._gitignore_cache.clear()
+
+    def _relative(self, path) -> str:
+        path = os.fspath(path)
+        if path.startswith(self._root_prefix):
+            return path[len(self._root_prefix):].rstrip(os.sep)
+        if os.path.isabs(path):
+            path = os.path.relpath(path, self.root)
+        path = os.path.normpath(path)
+        return "" if path == "." else path
+
+    def _in_trie(self, parts: List[str]) -> bool:
+        node = self._trie
+        for part in parts:
+            node = node.get(part)
+            if node is None:
+                return False
+            if None in node:
+                return True
+        return False
+
+    def _gitignore_rules(self, dir_rel: str) -> List[Tuple[str, re.Pattern, bool, bool]]:
+        """
+        Returns the rules that apply inside dir_rel: those of every .gitignore from root down to dir_rel.
+        """
+        rules = self._gitignore_cache.get(dir_rel)
+        if rules is not None:
+            return rules
+        rules = list(self._gitignore_rules(os.path.dirname(dir_rel))) if dir_rel else []
+        try:
+            with open(os.path.join(self.root, dir_rel, ".gitignore"), "r", encoding="utf-8", errors="ignore") as gitignore:
+                for line in gitignore:
+                    compiled = _compile_gitignore_pattern(line)
+                    if compiled:
+                        rules.append((dir_rel, *compiled))
+        except OSError:
+            pass
+        self._gitignore_cache[dir_rel] = rules
+        return rules
+
+    def _gitignored(self, rel_path: str, is_dir: bool) -> bool:
+        ignored = False
+        for base, regex, negated, dir_only in self._gitignore_rules(os.path.dirname(rel_path)):
+            if dir_only and not is_dir:
+                continue
+            candidate = rel_path[len(base) + 1:] if base else rel_path
+            if regex.match(candidate):
+                ignored = not negated
+        return ignored
+
+    def _matches_glob(self, rel_path: str) -> bool:
+        return self._glob is not None and bool(self._glob.match(rel_path) or self._glob.match(os.path.basename(rel_path)))
+
+    def _excluded_dir(self, rel_path: str) -> bool:
+        """
+        A directory is excluded if it or any of its ancestors matches, so paths checked outside a walk
+        (e.g. watcher events deep inside node_modules) are excluded too. Must be called with the lock held.
+        """
+        if not rel_path:
+            return False
+        cached = self._dir_cache.get(rel_path)
+        if cached is None:
+            cached = (
+                self._excluded_dir(os.path.dirname(rel_path))
+                or os.path.basename(rel_path) in self._dir_names
+                or self._in_trie(rel_path.split(os.sep))
+                or self._matches_glob(rel_path)
+                or (self.use_gitignore and self._gitignored(rel_path, True))
+            )
+            self._dir_cache[rel_path] = cached
+        return cached
+
+    def is_excluded_dir(self, path) -> bool:
+        rel_path = self._relative(path)
+        with self._lock:
+            return self._excluded_dir(rel_path)
+
+    def is_excluded_file(self, path) -> bool:
+        rel_path = self._relative(path)
+        name = os.path.basename(rel_path)
+        if name in self._file_names or name.endswith(self._suffixes):
+            return True
+        if self._matches_glob(rel_path):
+            return True
+        with self._lock:
+            if self._excluded_dir(os.path.dirname(rel_path)):
+                return True
+            return self.use_gitignore and self._gitignored(rel_path, False)
+
+
+_matchers: Dict[Tuple[str, bool], ExclusionMatcher] = {}
+_matchers_lock = threading.Lock()
+
+
+def get_exclusion_matcher(root_path, use_gitignore: bool = False) -> ExclusionMatcher:
+    """
+    Returns the shared matcher for root_path, compiling it on first use.
+    """
+    key = (os.path.abspath(root_path), use_gitignore)
+    with _matchers_lock:
+        if key not in _matchers:
+            _matchers[key] = ExclusionMatcher(key[0], use_gitignore=use_gitignore)
+        return _matchers[key]
+
+
+def release_exclusion_matchers(root_path):
+    """
+    Drops the shared matchers of root_path, with and without .gitignore rules.
+    """
+    roots = {os.path.abspath(root_path), os.path.realpath(root_path)}
+    with _matchers_lock:
+        for key in [key for key in _matchers if key[0] in roots]:
+            del _matchers[key]
+
+
 def _should_exclude(root_path, path):
     """
     Check if a file or directory should be excluded based on the exclusions and depth.
     """
-    for dir_name in EXCLUDED_DIRS:
-        if os.path.commonpath(
-            [path, os.path.join(root_path, dir_name)]
-        ) == os.path.normpath(os.path.join(root_path, dir_name)):
-            return True
-    return False
+    matcher = get_exclusion_matcher(root_path)
+    rel_path = matcher._relative(path)
+    return bool(rel_path) and matcher._in_trie(rel_path.split(os.sep))
+
+
+def iter_files(root_path, depth, matcher: Optional[ExclusionMatcher] = None, with_stat: bool = False, start_path=None) -> Iterator:
+    """
+    Lazily yields the paths (relative to root_path) of the included files under start_path (defaults to
+    root_path) whose directory is at most depth levels below start_path; depth 0 yields only the files
+    directly in start_path. Excluded and too-deep directories are pruned before they are opened.
+    With with_stat, (path, os.stat_result) pairs are yielded from the scandir entries, so no path has to
+    be resolved again. Symlinked directories are not followed.
+    """
+    root_path = os.path.abspath(root_path)
+    matcher = matcher or get_exclusion_matcher(root_path)
+    root_prefix = root_path if root_path.endswith(os.sep) else root_path + os.sep
+    stack = [(os.path.abspath(start_path) if start_path else root_path, 0)]
+    while stack:
+        directory, level = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        if level < depth and not entry.is_symlink() and not matcher.is_excluded_dir(entry.path):
+                            stack.append((entry.path, level + 1))
+                        continue
+                    if not entry.is_file() or matcher.is_excluded_file(entry.path):
+                        continue
+                    relative_path = entry.path[len(root_prefix):]
+                    yield (relative_path, entry.stat()) if with_stat else relative_path
+                except OSError:
+                    continue
 
 
-def find_files(root_path, depth):
+def find_files(root_path, depth, use_gitignore=False):
     """
     Recursively find files in the given directory up to a certain depth,
     excluding specified files, directories, and file extensions.
+    Single-component EXCLUDED_DIRS names (node_modules, dist, ...) are excluded at any depth, as in the
+    FilesTool workspace listing; entries containing a path separator stay anchored at root_path.
     """
-    found_files = []
-
-    for root, dirs, files in Path(root_path).walk():
-        # Calculate current depth
-        current_depth = root.relative_to(root_path).parts
-        if len(current_depth) > depth:
-            break
-        for file in files:
-            if file in EXCLUDED_FILES or any(
-                file.endswith(ext) for ext in EXCLUDED_EXT
-            ):
-                continue
-            file_path = root / file
-            if not _should_exclude(root_path, file_path):
-                found_files.append(str(file_path.relative_to(root_path)))
+    return list(iter_files(root_path, depth, get_exclusion_matcher(root_path, use_gitignore)))
+
+if __name__ == "__main__":
+    # Benchmark: walk a tree with a large excluded node_modules using the old per-entry commonpath checks
+    # and the compiled matcher.
+    import shutil
+    import tempfile
+    import time
+
+    def legacy_should_exclude(root_path, path):
+        for dir_name in EXCLUDED_DIRS:
+            if os.path.commonpath([path, os.path.join(root_path, dir_name)]) == os.path.normpath(os.path.join(root_path, dir_name)):
+                return True
+        return False
+
+    def legacy_walk(root_path):
+        found = []
+        for root, dirs, files in os.walk(root_path):
+            dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRS and not legacy_should_exclude(root_path, os.path.join(root, d))]
+            files = [f for f in files if f not in EXCLUDED_FILES and not any(f.endswith(ext) for ext in EXCLUDED_EXT) and not legacy_should_exclude(root_path, os.path.join(root, f))]
+            for file in files:
+                if not legacy_should_exclude(root_path, os.path.join(root, file)):
+                    found.append(os.path.relpath(os.path.join(root, file), root_path))
+        return found
+
+    def matcher_walk(root_path, use_gitignore=False):
+        matcher = ExclusionMatcher(root_path, use_gitignore=use_gitignore)
+        found = []
+        for root, dirs, files in os.walk(root_path):
+            dirs[:] = [d for d in dirs if not matcher.is_excluded_dir(os.path.join(root, d))]
+            found.extend(os.path.relpath(os.path.join(root, f), root_path) for f in files if not matcher.is_excluded_file(os.path.join(root, f)))
+        return found
+
+    bench_root = tempfile.mkdtemp(prefix="exclusion-bench-")
+    try:
+        for i in range(5000):
+            package_dir = os.path.join(bench_root, "node_modules", f"pkg{i % 500}", "lib")
+            os.makedirs(package_dir, exist_ok=True)
+            open(os.path.join(package_dir, f"m{i}.js"), "w").close()
+        for i in range(5000):
+            source_dir = os.path.join(bench_root, "src", f"module{i % 100}")
+            os.makedirs(source_dir, exist_ok=True)
+            open(os.path.join(source_dir, f"file{i}.py"), "w").close()
+            open(os.path.join(source_dir, f"icon{i}.png"), "w").close()
+        with open(os.path.join(bench_root, ".gitignore"), "w") as gitignore:
+            gitignore.write("*.log\n/src/module9*/\n")
 
-    return found_files
+        for name, walk in [("legacy commonpath", legacy_walk), ("compiled matcher", matcher_walk), ("compiled matcher + .gitignore", lambda r: matcher_walk(r, True)), ("iter_files (scandir)", lambda r: list(iter_files(r, 1000, ExclusionMatcher(r))))]:
+            start = time.perf_counter()
+            found = walk(bench_root)
+            print(f"{name:32} {len(found):6} files in {(time.perf_counter() - start) * 1000:8.1f} ms")
+    finally:
+        shutil.rmtree(bench_root)
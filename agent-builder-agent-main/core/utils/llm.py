@@ -7,45 +7,190 @@ import openai
 from openai import OpenAIError
 import time
 import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from .llm_telemetry import LLMCallRecord, telemetry, current_session_id
+from .tokens import fit_messages_to_context
+from .llm_backends import LLMBackend, backend_from_env
 
 # Load environment variables
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 GROQ_API_KEY = os.getenv('GROQ_API_KEY')
 
+# Full request/response payload logging is expensive (it serialises the whole prompt), so it is opt-in
+LLM_VERBOSE = os.getenv("LLM_VERBOSE", "").lower() in ("1", "true", "yes")
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+if LLM_VERBOSE:
+    litellm.set_verbose = True
+
+_backend: Optional[LLMBackend] = None
+
+
+def set_llm_backend(backend: Optional[LLMBackend]):
+    """
+    Routes make_llm_api_call through the given backend, e.g. a FakeLLMBackend for offline load tests.
+    Passing None restores the backend selected by the LLM_BACKEND environment variable.
+    """
+    global _backend
+    _backend = backend
+
+
+def get_llm_backend() -> LLMBackend:
+    global _backend
+    if _backend is None:
+        _backend = backend_from_env()
+    return _backend
+
 ## Models
 # Anthropic models: claude-3-opus-20240229, claude-3-sonnet-20240229, claude-3-haiku-20240307
 # OpenAI models: gpt-4-turbo-preview, gpt-4-vision-preview, gpt-4, gpt-3.5-turbo
 
-def make_llm_api_call(messages, model_name, json_mode=False, temperature=0, max_tokens=None, tools=None, tool_choice="auto"):
-    litellm.set_verbose=True
+def _usage_value(usage, *names):
+    """
+    Reads the first present numeric field from a usage object or dict, following dotted paths.
+    """
+    for name in names:
+        value = usage
+        for part in name.split("."):
+            if value is None:
+                break
+            value = value.get(part) if isinstance(value, dict) else getattr(value, part, None)
+        if isinstance(value, (int, float)):
+            return int(value)
+    return 0
+
+
+def _supports_cache_control(model_name):
+    """
+    Anthropic models only cache prompt prefixes that are explicitly marked; OpenAI caches long prefixes automatically.
+    """
+    name = model_name.lower()
+    return name.startswith("anthropic/") or "claude" in name
+
+
+def _mark_cacheable(message):
+    content = message.get("content")
+    if isinstance(content, str):
+        blocks = [{"type": "text", "text": content}]
+    elif isinstance(content, list) and content:
+        blocks = [dict(block) for block in content]
+    else:
+        return message
+    blocks[-1]["cache_control"] = {"type": "ephemeral"}
+    return {**message, "content": blocks}
+
+
+def apply_prompt_caching(messages, model_name):
+    """
+    Marks the end of the leading run of system messages, the static prefix shared by every call, with a
+    cache-control breakpoint for providers that need one. Messages are never reordered: system messages
+    placed later in the thread keep their position and meaning. The caller's messages are not modified.
+    """
+    prefix_length = 0
+    while prefix_length < len(messages) and messages[prefix_length].get("role") == "system":
+        prefix_length += 1
+    marked = list(messages)
+    if prefix_length and _supports_cache_control(model_name):
+        marked[prefix_length - 1] = _mark_cacheable(marked[prefix_length - 1])
+    return marked
+
+
+def _build_call_record(response, model_name, session_id, started_at, attempt_started_at, finished_at, retries, error=None):
+    usage = getattr(response, "usage", None) if response is not None else None
+    # OpenAI reports cache reads under prompt_tokens_details, Anthropic as cache_read_input_tokens
+    cached_tokens = _usage_value(usage, "prompt_tokens_details.cached_tokens", "cache_read_input_tokens") if usage is not None else 0
+    cache_write_tokens = _usage_value(usage, "cache_creation_input_tokens") if usage is not None else 0
+    hidden_params = getattr(response, "_hidden_params", None) or {}
+    cost = 0.0
+    if response is not None:
+        try:
+            cost = float(litellm.completion_cost(completion_response=response) or 0.0)
+        except Exception:
+            cost = 0.0
+    latency = finished_at - attempt_started_at
+    return LLMCallRecord(
+        session_id=session_id,
+        model=model_name,
+        started_at=started_at,
+        latency_s=round(latency, 4),
+        total_time_s=round(finished_at - started_at, 4),
+        time_to_first_token_s=None,  # Calls are not streamed, so the first token arrives with the whole response
+        prompt_tokens=_usage_value(usage, "prompt_tokens") if usage is not None else 0,
+        completion_tokens=_usage_value(usage, "completion_tokens") if usage is not None else 0,
+        total_tokens=_usage_value(usage, "total_tokens") if usage is not None else 0,
+        cached_tokens=cached_tokens,
+        cache_write_tokens=cache_write_tokens,
+        cache_hit=bool(cached_tokens) or bool(hidden_params.get("cache_hit")),
+        retries=retries,
+        cost_usd=cost,
+        success=error is None,
+        error=error,
+    )
+
+
+def make_llm_api_call(messages, model_name, json_mode=False, temperature=0, max_tokens=None, tools=None, tool_choice="auto", session_id=None, prompt_caching=True, context_guard=True):
+    session_id = session_id or current_session_id()
+    started_at = time.time()
+    timing = {"attempt_started_at": started_at, "retries": 0}
+    original_messages = messages
+    prepared = {"budget_factor": 1.0}
+
+    def prepare_messages():
+        """
+        Trims the prompt to the model's context window before dispatch, then marks its static prefix for caching.
+        """
+        request_messages = original_messages
+        if context_guard:
+            request_messages, trim_report = fit_messages_to_context(request_messages, model_name, max_tokens, tools, prepared["budget_factor"])
+            if trim_report.trimmed:
+                logger.info(f"{trim_report.summary()}. Dropped: {trim_report.dropped_messages} Truncated: {trim_report.truncated_messages}")
+        if prompt_caching:
+            request_messages = apply_prompt_caching(request_messages, model_name)
+        prepared["messages"] = request_messages
 
     def attempt_api_call(api_call_func, max_attempts=3):
+        last_error = None
         for attempt in range(max_attempts):
             try:
+                timing["attempt_started_at"] = time.time()
+                timing["retries"] = attempt
                 response = api_call_func()
                 response_content = response.choices[0].message['content'] if json_mode else response
                 if json_mode:
                     if not json.loads(response_content):
                         logger.info(f"Invalid JSON received, retrying attempt {attempt + 1}")
+                        last_error = "Invalid JSON received"
                         continue
                     else:
-                        return response
+                        return response, attempt
                 else:
-                    return response
+                    return response, attempt
             except OpenAIError as e:
+                last_error = str(e)
+                if context_guard and isinstance(e, litellm.ContextWindowExceededError):
+                    # Our estimate undercounted; resending the same prompt cannot succeed, so trim harder and retry at once
+                    prepared["budget_factor"] *= 0.75
+                    logger.info(f"Context window exceeded, retrying attempt {attempt + 1} with {prepared['budget_factor']:.0%} of the window.")
+                    prepare_messages()
+                    continue
                 logger.info(f"API call failed, retrying attempt {attempt + 1}. Error: {e}")
                 time.sleep(5)
             except json.JSONDecodeError:
                 logger.error(f"JSON decoding failed, retrying attempt {attempt + 1}")
+                last_error = "JSON decoding failed"
                 time.sleep(5)
+        timing["error"] = last_error
         raise Exception("Failed to make API call after multiple attempts.")
 
     def api_call():
+        messages = prepared["messages"]
         api_call_params = {
             "model": model_name,
             "messages": messages,
@@ -58,16 +203,76 @@ def make_llm_api_call(messages, model_name, json_mode=False, temperature=0, max_
             api_call_params["tool_choice"] = tool_choice
 
         # Log the API request
-        logger.info(f"Sending API request: {json.dumps(api_call_params, indent=2)}")
+        if LLM_VERBOSE:
+            logger.info(f"Sending API request: {json.dumps(api_call_params, indent=2)}")
+        else:
+            logger.debug("Sending API request: model=%s messages=%d tools=%d", model_name, len(messages), len(tools or []))
 
-        response = completion(**api_call_params)
+        response = get_llm_backend().completion(**api_call_params)
 
         # Log the API response
-        logger.info(f"Received API response: {response}")
+        if LLM_VERBOSE:
+            logger.info(f"Received API response: {response}")
 
         return response
 
-    return attempt_api_call(api_call)
+    # Recorded in finally so that errors other than OpenAIError (timeouts, litellm exceptions, a prompt that
+    # cannot be trimmed to the context window) are counted too
+    response, error = None, None
+    try:
+        prepare_messages()
+        response, _ = attempt_api_call(api_call)
+        return response
+    except BaseException as e:
+        error = timing.pop("error", None) or str(e) or type(e).__name__
+        raise
+    finally:
+        telemetry.record(_build_call_record(response, model_name, session_id, started_at, timing["attempt_started_at"], time.time(), timing.get("retries", 0), error=error))
+
+@dataclass
+class LLMBatchResult:
+    index: int
+    response: Any = None
+    error: Optional[str] = None
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+
+def make_llm_batch(requests: List[Dict[str, Any]], max_concurrency: int = 8, progress_callback: Optional[Callable[[int, int, LLMBatchResult], None]] = None) -> List[LLMBatchResult]:
+    """
+    Runs independent LLM calls concurrently and returns one LLMBatchResult per request, in input order.
+    Each request is a dict of make_llm_api_call keyword arguments (messages, model_name, json_mode, ...).
+    A failing request is reported in its own result instead of failing the batch.
+    progress_callback(completed, total, result) is called as each request finishes.
+    """
+    results: List[Optional[LLMBatchResult]] = [None] * len(requests)
+    if not requests:
+        return []
+
+    def run_request(index, request):
+        try:
+            return LLMBatchResult(index=index, response=make_llm_api_call(**request))
+        except Exception as e:
+            logger.info(f"Batch request {index} failed: {e}")
+            return LLMBatchResult(index=index, error=str(e))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(requests)))) as executor:
+        # Copy the context per task so telemetry is attributed to the caller's session
+        futures = [
+            executor.submit(contextvars.copy_context().run, run_request, index, request)
+            for index, request in enumerate(requests)
+        ]
+        for completed, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            results[result.index] = result
+            if progress_callback:
+                try:
+                    progress_callback(completed, len(requests), result)
+                except Exception as e:
+                    logger.info(f"Batch progress callback failed: {e}")
+    return results
 
 # Sample Usage
 if __name__ == "__main__":
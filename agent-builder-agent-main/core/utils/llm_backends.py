@@ -0,0 +1,147 @@
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from openai import OpenAIError
+
+from .tokens import count_messages_tokens, count_text_tokens
+
+
+class LLMBackend(ABC):
+    """
+    Completion provider used by make_llm_api_call. Receives the litellm completion() parameters
+    and returns a litellm-compatible response.
+    """
+
+    @abstractmethod
+    def completion(self, **params) -> Any:
+        pass
+
+
+class LiteLLMBackend(LLMBackend):
+    def completion(self, **params) -> Any:
+        from litellm import completion
+        return completion(**params)
+
+
+class FakeLLMError(OpenAIError):
+    """Injected provider failure; subclasses OpenAIError so it takes the normal retry path."""
+
+
+class _AttrDict(dict):
+    """A dict that also supports attribute access, like litellm's response objects."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+def _fake_tool_call(tool_call: Dict[str, Any]) -> _AttrDict:
+    arguments = tool_call.get("arguments", {})
+    return _AttrDict(
+        id=tool_call.get("id") or f"call_{uuid.uuid4().hex[:24]}",
+        type="function",
+        function=_AttrDict(
+            name=tool_call["name"],
+            arguments=arguments if isinstance(arguments, str) else json.dumps(arguments),
+        ),
+    )
+
+
+def build_fake_response(model: str, messages: List[Dict[str, Any]], content: Optional[str] = None, tool_calls: Optional[List[Dict[str, Any]]] = None) -> _AttrDict:
+    """
+    Builds a response shaped like litellm's ModelResponse, with usage estimated by the local token counter.
+    """
+    message = _AttrDict(role="assistant", content=content, tool_calls=[_fake_tool_call(call) for call in tool_calls] if tool_calls else None)
+    prompt_tokens = count_messages_tokens(messages)
+    completion_tokens = count_text_tokens(content or "") + sum(count_text_tokens(call.function.arguments) for call in message.tool_calls or [])
+    return _AttrDict(
+        id=f"chatcmpl-fake-{uuid.uuid4().hex[:12]}",
+        object="chat.completion",
+        created=int(time.time()),
+        model=model,
+        choices=[_AttrDict(index=0, message=message, finish_reason="tool_calls" if tool_calls else "stop")],
+        usage=_AttrDict(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+            prompt_tokens_details=_AttrDict(cached_tokens=0),
+        ),
+    )
+
+
+class FakeLLMBackend(LLMBackend):
+    """
+    Deterministic offline provider for load tests of the agent loop.
+
+    Responses come from, in order of precedence, a responder callable, a script or a JSON fixture file.
+    Script/fixture entries are either a string (the message content) or a dict with optional
+    "content", "tool_calls" ([{"name": ..., "arguments": {...}}]), "latency_s" and "error" keys.
+    Once the script is exhausted it starts over when loop is true, otherwise a default reply is returned.
+    Latency, jitter and the injected error rate are driven by a seeded RNG, so runs are reproducible.
+    """
+
+    def __init__(self, script: Optional[List[Union[str, Dict[str, Any]]]] = None, fixture_path: Optional[str] = None, responder: Optional[Callable[[Dict[str, Any]], Union[str, Dict[str, Any]]]] = None, latency_s: float = 0.0, latency_jitter_s: float = 0.0, error_rate: float = 0.0, seed: int = 0, loop: bool = True):
+        if fixture_path:
+            with open(fixture_path, "r") as fixture_file:
+                script = json.load(fixture_file)
+        self.script = list(script or [])
+        self.responder = responder
+        self.latency_s = latency_s
+        self.latency_jitter_s = latency_jitter_s
+        self.error_rate = error_rate
+        self.loop = loop
+        self.calls: List[Dict[str, Any]] = []
+        self._rng = random.Random(seed)
+        self._position = 0
+        self._lock = threading.Lock()
+
+    def _next_entry(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        if self.responder:
+            entry = self.responder(params)
+        elif self.script and (self.loop or self._position < len(self.script)):
+            entry = self.script[self._position % len(self.script)]
+            self._position += 1
+        else:
+            json_mode = (params.get("response_format") or {}).get("type") == "json_object"
+            entry = json.dumps({"fake": True}) if json_mode else "OK"
+        return {"content": entry} if isinstance(entry, str) else dict(entry)
+
+    def completion(self, **params) -> Any:
+        with self._lock:
+            self.calls.append(params)
+            entry = self._next_entry(params)
+            latency = entry.get("latency_s", self.latency_s) + self._rng.uniform(0, self.latency_jitter_s)
+            fail = bool(entry.get("error")) or self._rng.random() < self.error_rate
+        if latency > 0:
+            time.sleep(latency)
+        if fail:
+            raise FakeLLMError(entry.get("error") or "Injected fake LLM failure")
+        content = entry.get("content")
+        if content is not None and not isinstance(content, str):
+            content = json.dumps(content)
+        return build_fake_response(params.get("model", "fake"), params.get("messages", []), content, entry.get("tool_calls"))
+
+
+def backend_from_env() -> LLMBackend:
+    """
+    Selects the backend from LLM_BACKEND: unset or "litellm" for the real providers, "fake" for the
+    default fake provider, or "fake:<fixture.json>" for a fixture-driven one. LLM_FAKE_LATENCY_S and
+    LLM_FAKE_ERROR_RATE tune the fake provider.
+    """
+    spec = os.getenv("LLM_BACKEND", "litellm")
+    if not spec.startswith("fake"):
+        return LiteLLMBackend()
+    _, _, fixture_path = spec.partition(":")
+    return FakeLLMBackend(
+        fixture_path=fixture_path or None,
+        latency_s=float(os.getenv("LLM_FAKE_LATENCY_S", "0")),
+        error_rate=float(os.getenv("LLM_FAKE_ERROR_RATE", "0")),
+    )
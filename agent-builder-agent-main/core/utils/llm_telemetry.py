@@ -0,0 +1,133 @@
+import sys
+import threading
+from collections import defaultdict, deque
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_SESSION_ID = "default"
+
+
+@dataclass
+class LLMCallRecord:
+    session_id: str
+    model: str
+    started_at: float
+    latency_s: float  # Wall time of the attempt that produced the response
+    total_time_s: float  # Wall time including retries and backoff sleeps
+    time_to_first_token_s: Optional[float]  # Only measured for streamed calls; None otherwise
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    cached_tokens: int = 0  # Prompt tokens served from the provider's prefix cache
+    cache_write_tokens: int = 0  # Prompt tokens written to the provider's prefix cache
+    cache_hit: bool = False
+    retries: int = 0
+    cost_usd: float = 0.0
+    success: bool = True
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def current_session_id() -> str:
+    """
+    Returns the id of the active Unit session, or the default session when no Unit has been created.
+    Looks the session context up lazily so that importing the LLM helpers does not open the logs database.
+    """
+    base = sys.modules.get("core.framework.base")
+    if base is None:
+        return DEFAULT_SESSION_ID
+    return base.session_context.get() or DEFAULT_SESSION_ID
+
+
+class LLMTelemetry:
+    """
+    Thread-safe, in-memory store of per-call LLM telemetry grouped by session.
+    Sinks receive every record as it is added, e.g. to persist it in the logs database.
+    """
+
+    def __init__(self, max_calls_per_session: int = 5000):
+        self.max_calls_per_session = max_calls_per_session
+        self._calls: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.max_calls_per_session))
+        self._sinks: List[Callable[[LLMCallRecord], None]] = []
+        self._lock = threading.Lock()
+
+    def add_sink(self, sink: Callable[[LLMCallRecord], None]):
+        with self._lock:
+            if sink not in self._sinks:
+                self._sinks.append(sink)
+
+    def record(self, record: LLMCallRecord):
+        with self._lock:
+            self._calls[record.session_id].append(record)
+            sinks = list(self._sinks)
+        for sink in sinks:
+            try:
+                sink(record)
+            except Exception:
+                # Telemetry must never break the LLM call path
+                pass
+
+    def get_calls(self, session_id: Optional[str] = None) -> List[LLMCallRecord]:
+        session_id = session_id or current_session_id()
+        with self._lock:
+            return list(self._calls.get(session_id, ()))
+
+    def sessions(self) -> List[str]:
+        with self._lock:
+            return list(self._calls.keys())
+
+    def summarize(self, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Aggregates the calls of a session: totals, latency percentiles and a per-model breakdown.
+        """
+        session_id = session_id or current_session_id()
+        calls = self.get_calls(session_id)
+        summary = _aggregate(calls)
+        summary["session_id"] = session_id
+        by_model = defaultdict(list)
+        for call in calls:
+            by_model[call.model].append(call)
+        summary["by_model"] = {model: _aggregate(model_calls) for model, model_calls in by_model.items()}
+        return summary
+
+    def clear(self, session_id: Optional[str] = None):
+        with self._lock:
+            if session_id is None:
+                self._calls.clear()
+            else:
+                self._calls.pop(session_id, None)
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _aggregate(calls: List[LLMCallRecord]) -> Dict[str, Any]:
+    latencies = sorted(call.latency_s for call in calls)
+    successful = [call for call in calls if call.success]
+    first_token_times = [call.time_to_first_token_s for call in successful if call.time_to_first_token_s is not None]
+    return {
+        "calls": len(calls),
+        "failed_calls": len(calls) - len(successful),
+        "retries": sum(call.retries for call in calls),
+        "prompt_tokens": sum(call.prompt_tokens for call in calls),
+        "completion_tokens": sum(call.completion_tokens for call in calls),
+        "total_tokens": sum(call.total_tokens for call in calls),
+        "cached_tokens": sum(call.cached_tokens for call in calls),
+        "cache_write_tokens": sum(call.cache_write_tokens for call in calls),
+        "cache_hits": sum(1 for call in calls if call.cache_hit),
+        "cost_usd": round(sum(call.cost_usd for call in calls), 6),
+        "total_latency_s": round(sum(latencies), 4),
+        "avg_latency_s": round(sum(latencies) / len(latencies), 4) if latencies else 0.0,
+        "p50_latency_s": round(_percentile(latencies, 50), 4),
+        "p95_latency_s": round(_percentile(latencies, 95), 4),
+        "avg_time_to_first_token_s": round(sum(first_token_times) / len(first_token_times), 4) if first_token_times else None,
+    }
+
+
+telemetry = LLMTelemetry()
@@ -0,0 +1,177 @@
+import os
+import re
+import math
+import heapq
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from .file_reader import SKIP_BINARY, SKIP_TOO_LARGE
+from .workspace_manifest import WorkspaceManifest
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_LINE_HITS = 5  # Matching lines returned per file
+SNIPPET_CHARS = 200
+
+_WORD = re.compile(r"[A-Za-z0-9_]+")
+_COMPOUND = re.compile(r"\b[A-Za-z0-9_]*(?:[A-Za-z0-9]_[A-Za-z0-9]|[a-z0-9][A-Z]|[A-Z][A-Z][a-z])[A-Za-z0-9_]*\b")
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z0-9]+|[A-Z0-9]+")
+
+
+@lru_cache(maxsize=65536)
+def _expand_word(word: str) -> Tuple[str, ...]:
+    lowered = word.lower()
+    parts = [part.lower() for piece in word.split("_") for part in _CAMEL.findall(piece) if len(part) > 1]
+    return (lowered, *parts) if len(parts) > 1 else (lowered,)
+
+
+def count_terms(text: str) -> Counter:
+    """
+    Lowercased identifier term counts; snake_case and camelCase identifiers also count their parts,
+    so "readFile" and "read_file" both match a query for "read file".
+    """
+    terms = Counter(_WORD.findall(text.lower()))
+    # Only compound identifiers need splitting, and they are found by the regex engine rather than a Python loop over every word
+    for word, count in Counter(_COMPOUND.findall(text)).items():
+        for term in _expand_word(word)[1:]:
+            terms[term] += count
+    return terms
+
+
+def tokenize(text: str) -> List[str]:
+    return [term for word in _WORD.findall(text) for term in _expand_word(word)]
+
+
+@dataclass
+class SearchHit:
+    path: str
+    score: float
+    lines: List[Dict[str, object]] = field(default_factory=list)  # [{"line": 1-based number, "text": snippet}]
+
+
+class SearchIndex:
+    """
+    BM25 inverted index over the text files tracked by a WorkspaceManifest (so the same exclusion rules
+    apply). update() only re-tokenizes files whose manifest hash changed; a file's postings are removed
+    before it is re-added, so the index never needs a full rebuild.
+    """
+
+    def __init__(self, manifest: WorkspaceManifest):
+        self.manifest = manifest
+        self.hashes: Dict[str, str] = {}
+        self.doc_terms: Dict[str, Counter] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.postings: Dict[str, Dict[str, int]] = {}  # term -> {path: term frequency}
+        self.total_length = 0
+        self.lock = threading.RLock()
+
+    def _read_text(self, path: str) -> Optional[str]:
+        text = self.manifest.contents.get(path)
+        if text is not None:
+            return text
+        try:
+            with open(os.path.join(self.manifest.root, path), "r", encoding="utf-8", errors="replace") as text_file:
+                return text_file.read()
+        except OSError:
+            return None
+
+    def _remove(self, path: str):
+        for term in self.doc_terms.pop(path, ()):
+            documents = self.postings[term]
+            del documents[path]
+            if not documents:
+                del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(path, 0)
+        self.hashes.pop(path, None)
+
+    def _add(self, path: str, file_hash: str, text: str):
+        terms = count_terms(text)
+        for term, count in terms.items():
+            self.postings.setdefault(term, {})[path] = count
+        self.doc_terms[path] = terms
+        self.doc_lengths[path] = sum(terms.values())
+        self.total_length += self.doc_lengths[path]
+        self.hashes[path] = file_hash
+
+    def update(self) -> int:
+        """
+        Syncs the index with the manifest entries and returns how many files were (re-)indexed or dropped.
+        """
+        with self.manifest.lock:
+            hashes = {path: entry.hash for path, entry in self.manifest.entries.items() if entry.skip_reason not in (SKIP_BINARY, SKIP_TOO_LARGE)}
+        changed = 0
+        with self.lock:
+            for path in [path for path in self.hashes if path not in hashes]:
+                self._remove(path)
+                changed += 1
+            for path, file_hash in hashes.items():
+                if self.hashes.get(path) == file_hash:
+                    continue
+                text = self._read_text(path)
+                self._remove(path)
+                if text is not None:
+                    self._add(path, file_hash, text)
+                changed += 1
+        return changed
+
+    def _idf(self, term: str) -> float:
+        document_frequency = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.doc_lengths) - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def _line_hits(self, path: str, weights: Dict[str, float]) -> List[Dict[str, object]]:
+        text = self._read_text(path) or ""
+        scored = []
+        for line_number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            lowered = line.lower()
+            if not any(term in lowered for term in weights):
+                continue
+            line_terms = set(tokenize(line))
+            score = sum(weight for term, weight in weights.items() if term in line_terms)
+            if score > 0:
+                scored.append((-score, line_number, line.strip()[:SNIPPET_CHARS]))
+        return [{"line": line_number, "text": snippet} for _, line_number, snippet in heapq.nsmallest(MAX_LINE_HITS, scored)]
+
+    def search(self, query: str, k: int = 10) -> List[SearchHit]:
+        """
+        Ranks files by BM25 over the query terms and returns the top k with their best matching lines.
+        """
+        with self.lock:
+            terms = set(tokenize(query))
+            if not terms or not self.doc_lengths:
+                return []
+            average_length = self.total_length / len(self.doc_lengths) or 1
+            weights = {term: self._idf(term) for term in terms if term in self.postings}
+            scores: Dict[str, float] = {}
+            for term, idf in weights.items():
+                for path, frequency in self.postings[term].items():
+                    length_norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[path] / average_length)
+                    scores[path] = scores.get(path, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + length_norm)
+            top = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], item[0]))
+        return [SearchHit(path, round(score, 4), self._line_hits(path, weights)) for path, score in top]
+
+
+_indexes: Dict[str, SearchIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(manifest: WorkspaceManifest) -> SearchIndex:
+    """
+    Returns the process-wide index over manifest, so FilesTools created per action share it and only
+    re-tokenize the files that changed since the previous search.
+    """
+    with _indexes_lock:
+        index = _indexes.get(manifest.root)
+        if index is None or index.manifest is not manifest:
+            index = SearchIndex(manifest)
+            _indexes[manifest.root] = index
+        return index
+
+
+def release_search_index(root: str):
+    with _indexes_lock:
+        _indexes.pop(os.path.realpath(root), None)
@@ -0,0 +1,208 @@
+import os
+import ast
+import json
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from .workspace_manifest import DeferredSave, WorkspaceManifest, MANIFEST_DIR
+
+SYMBOLS_FILE = "symbols.json"
+INDEX_VERSION = 1
+
+
+@dataclass
+class Symbol:
+    name: str
+    qualname: str  # Dotted name within the module, e.g. "FilesTool.read_file"
+    kind: str  # class, function, method or variable
+    path: str  # File path relative to the workspace root
+    start_line: int  # First line, including decorators
+    end_line: int
+    signature: Optional[str] = None
+    doc: Optional[str] = None  # First line of the docstring
+
+
+@dataclass
+class ModuleSymbols:
+    hash: str
+    module: str  # Dotted module name derived from the path
+    symbols: List[Symbol] = field(default_factory=list)
+    imports: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def _module_name(path: str) -> str:
+    module = os.path.splitext(path)[0].replace(os.sep, ".")
+    return module[:-len(".__init__")] if module.endswith(".__init__") else module
+
+
+def _first_doc_line(node) -> Optional[str]:
+    doc = ast.get_docstring(node)
+    return doc.strip().splitlines()[0] if doc and doc.strip() else None
+
+
+def _signature(node) -> str:
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns is not None else ""
+    return f"{prefix} {node.name}({ast.unparse(node.args)}){returns}"
+
+
+def parse_module(path: str, source: str, file_hash: str) -> ModuleSymbols:
+    """
+    Extracts classes, functions, methods, module-level assignments and imports from Python source.
+    """
+    result = ModuleSymbols(hash=file_hash, module=_module_name(path))
+    try:
+        tree = ast.parse(source, filename=path)
+    except (SyntaxError, ValueError) as e:
+        result.error = f"{type(e).__name__}: {e}"
+        return result
+
+    def visit(nodes, prefix: str, in_class: bool):
+        for node in nodes:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                qualname = f"{prefix}{node.name}"
+                start_line = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list])
+                if isinstance(node, ast.ClassDef):
+                    bases = ", ".join(ast.unparse(base) for base in node.bases)
+                    result.symbols.append(Symbol(node.name, qualname, "class", path, start_line, node.end_lineno, f"class {node.name}({bases})" if bases else f"class {node.name}", _first_doc_line(node)))
+                    visit(node.body, qualname + ".", True)
+                else:
+                    result.symbols.append(Symbol(node.name, qualname, "method" if in_class else "function", path, start_line, node.end_lineno, _signature(node), _first_doc_line(node)))
+                    visit(node.body, qualname + ".", False)
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)) and not prefix:
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for target in targets:
+                    if isinstance(target, ast.Name):
+                        result.symbols.append(Symbol(target.id, target.id, "variable", path, node.lineno, node.end_lineno))
+            elif isinstance(node, ast.Import) and not prefix:
+                result.imports.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and not prefix:
+                module = "." * node.level + (node.module or "")
+                result.imports.extend(f"{module}.{alias.name}" if module else alias.name for alias in node.names)
+            elif isinstance(node, (ast.If, ast.Try)) and not prefix:
+                # Conditional definitions and imports (if TYPE_CHECKING, try/except ImportError)
+                visit(node.body + node.orelse + getattr(node, "finalbody", []) + [child for handler in getattr(node, "handlers", []) for child in handler.body], prefix, in_class)
+
+    visit(tree.body, "", False)
+    return result
+
+
+class SymbolIndex:
+    """
+    AST index of the Python files tracked by a WorkspaceManifest. update() only re-parses files whose
+    manifest hash changed since they were indexed, and the index is persisted next to the manifest so a
+    new process starts warm.
+    """
+
+    def __init__(self, manifest: WorkspaceManifest, index_path: Optional[str] = None):
+        self.manifest = manifest
+        self.index_path = index_path or os.path.join(manifest.root, MANIFEST_DIR, SYMBOLS_FILE)
+        self.modules: Dict[str, ModuleSymbols] = {}
+        self.lock = threading.RLock()
+        self.deferred_save = DeferredSave(self.save)
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.index_path, "r") as index_file:
+                data = json.load(index_file)
+            if data.get("version") != INDEX_VERSION:
+                return
+            self.modules = {
+                path: ModuleSymbols(**{**module, "symbols": [Symbol(**symbol) for symbol in module["symbols"]]})
+                for path, module in data["modules"].items()
+            }
+        except (OSError, ValueError, TypeError, KeyError):
+            self.modules = {}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        with self.lock:
+            # Shallow dicts instead of dataclasses.asdict, which deep-copies every symbol
+            modules = {path: {**vars(module), "symbols": [vars(symbol) for symbol in module.symbols]} for path, module in self.modules.items()}
+            serialized = json.dumps({"version": INDEX_VERSION, "modules": modules})
+        file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.index_path), suffix=".tmp")
+        with os.fdopen(file_descriptor, "w") as temp_file:
+            temp_file.write(serialized)
+        os.replace(temp_path, self.index_path)
+
+    def _read_source(self, path: str) -> Optional[str]:
+        source = self.manifest.contents.get(path)
+        if source is not None:
+            return source
+        try:
+            with open(os.path.join(self.manifest.root, path), "r", encoding="utf-8", errors="replace") as source_file:
+                return source_file.read()
+        except OSError:
+            return None
+
+    def update(self) -> int:
+        """
+        Syncs the index with the manifest entries and returns how many modules were (re-)parsed or dropped.
+        """
+        with self.manifest.lock:
+            hashes = {path: entry.hash for path, entry in self.manifest.entries.items() if path.endswith(".py")}
+        changed = 0
+        with self.lock:
+            for path in [path for path in self.modules if path not in hashes]:
+                del self.modules[path]
+                changed += 1
+            for path, file_hash in hashes.items():
+                indexed = self.modules.get(path)
+                if indexed is not None and indexed.hash == file_hash:
+                    continue
+                source = self._read_source(path)
+                if source is None:
+                    continue
+                self.modules[path] = parse_module(path, source, file_hash)
+                changed += 1
+        if changed:
+            self.deferred_save.request()
+        return changed
+
+    def find(self, query: str, kind: Optional[str] = None, limit: int = 50) -> List[Symbol]:
+        """
+        Finds symbols by name: exact names and qualified names first, then qualified-name suffixes, then
+        case-insensitive substrings.
+        """
+        lowered = query.lower()
+        ranked = []
+        with self.lock:
+            for module in self.modules.values():
+                for symbol in module.symbols:
+                    if kind and symbol.kind != kind:
+                        continue
+                    full_name = f"{module.module}.{symbol.qualname}"
+                    if query in (symbol.name, symbol.qualname, full_name):
+                        rank = 0
+                    elif full_name.endswith("." + query):
+                        rank = 1
+                    elif lowered in full_name.lower():
+                        rank = 2
+                    else:
+                        continue
+                    ranked.append((rank, symbol.path, symbol.start_line, symbol))
+        ranked.sort(key=lambda item: item[:3])
+        return [symbol for *_, symbol in ranked[:limit]]
+
+    def resolve(self, name: str, path: Optional[str] = None) -> List[Symbol]:
+        """
+        Returns the symbols whose name, qualified name or module-qualified name is exactly name, optionally limited to one file.
+        """
+        return [symbol for symbol in self.find(name) if symbol_matches(symbol, name, self.modules[symbol.path].module) and (path is None or symbol.path == path)]
+
+    def read(self, symbol: Symbol) -> str:
+        source = self._read_source(symbol.path) or ""
+        return "".join(source.splitlines(keepends=True)[symbol.start_line - 1:symbol.end_line])
+
+    def imports(self, path: str) -> List[str]:
+        with self.lock:
+            module = self.modules.get(path)
+            return list(module.imports) if module else []
+
+
+def symbol_matches(symbol: Symbol, name: str, module: str) -> bool:
+    return name in (symbol.name, symbol.qualname, f"{module}.{symbol.qualname}")
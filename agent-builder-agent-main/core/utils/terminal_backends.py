@@ -0,0 +1,417 @@
+import os
+import re
+import sys
+import pty
+import time
+import signal
+import asyncio
+import socket
+import select
+import shlex
+import tempfile
+import threading
+import subprocess
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .terminal_logs import TIMESTAMP_FORMAT, WAIT_POLL_INTERVAL_S, LOG_MAX_BYTES, LOG_SEGMENTS, TAIL_BUFFER_BYTES, TailBuffer, rotate_log
+
+READ_CHUNK_BYTES = 4096
+INTERRUPT = "\x03"
+# Run as `python -c CONTROLLING_TTY_EXEC argv...` in a new session: makes the pty on stdin its controlling
+# terminal, so Ctrl+C reaches the foreground job, and execs argv
+CONTROLLING_TTY_EXEC = "import fcntl, os, sys, termios; fcntl.ioctl(0, termios.TIOCSCTTY, 0); os.execvp(sys.argv[1], sys.argv[1:])"
+
+
+class TerminalBackend(ABC):
+    """
+    Runs the interactive shells behind TerminalTool sessions. Every session writes its output to
+    log_file_path with a "%Y-%m-%d-%H:%M:%S " prefix on each line, which is what the log readers expect,
+    and rotates it into gzip segments by renaming once it reaches its size limit.
+    """
+
+    @abstractmethod
+    def start_session(self, session_id: str, log_file_path: str):
+        pass
+
+    @abstractmethod
+    def send_input(self, session_id: str, data: str):
+        """Writes raw keystrokes to the session."""
+
+    def send_command(self, session_id: str, command: str):
+        self.send_input(session_id, command + "\n")
+
+    def interrupt(self, session_id: str):
+        self.send_input(session_id, INTERRUPT)
+
+    @abstractmethod
+    def close_session(self, session_id: str):
+        pass
+
+    @abstractmethod
+    def is_running(self, session_id: str) -> bool:
+        pass
+
+    def wait_for_output(self, session_id: str, timeout_s: float):
+        """
+        Blocks until the session may have produced new output or timeout_s has passed. Backends that cannot
+        observe the output stream poll the log instead.
+        """
+        time.sleep(min(timeout_s, WAIT_POLL_INTERVAL_S))
+
+    async def async_wait_for_output(self, session_id: str, timeout_s: float):
+        """
+        wait_for_output for asyncio, which must not block the event loop.
+        """
+        await asyncio.sleep(min(timeout_s, WAIT_POLL_INTERVAL_S))
+
+    def tail(self, session_id: str, max_bytes: int) -> Optional[str]:
+        """
+        Returns the session's most recent output from memory, or None if the backend does not buffer it.
+        """
+        return None
+
+
+class TimestampedLogWriter:
+    """
+    Appends terminal output to a log, stamping the start of every line like `ts` does. Partial lines
+    (such as a shell prompt) are written immediately instead of waiting for their newline. Once the log
+    reaches max_bytes it is rotated into compressed segments, and the last tail_bytes written are kept
+    in memory for tail queries.
+    """
+
+    def __init__(self, log_file_path: str, max_bytes: int = LOG_MAX_BYTES, segments: int = LOG_SEGMENTS, tail_bytes: int = TAIL_BUFFER_BYTES):
+        self.log_file_path = log_file_path
+        self.max_bytes = max_bytes
+        self.segments = segments
+        self.tail = TailBuffer(tail_bytes)
+        self._file = open(log_file_path, "ab")
+        self._size = self._file.tell()
+        self._at_line_start = True
+        self.lock = threading.Lock()
+
+    def write(self, data: bytes):
+        if not data:
+            return
+        stamp = time.strftime(TIMESTAMP_FORMAT).encode() + b" "
+        lines = data.replace(b"\r\n", b"\n").split(b"\n")
+        parts = []
+        for index, line in enumerate(lines):
+            last = index == len(lines) - 1
+            if last and not line:
+                break
+            if self._at_line_start:
+                parts.append(stamp)
+            parts.append(line)
+            if not last:
+                parts.append(b"\n")
+            self._at_line_start = not last
+        data = b"".join(parts)
+        self.tail.append(data)
+        with self.lock:
+            self._file.write(data)
+            self._file.flush()
+            self._size += len(data)
+            if self._size >= self.max_bytes:
+                self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        try:
+            rotate_log(self.log_file_path, self.segments)
+        except OSError:
+            pass  # Keep appending to the current file rather than losing output
+        self._file = open(self.log_file_path, "ab")
+        self._size = self._file.tell()
+
+    def close(self):
+        with self.lock:
+            self._file.close()
+
+
+class StreamSession:
+    """
+    A shell reached through a bidirectional byte stream. A reader thread copies its output into a
+    TimestampedLogWriter and notifies output_event listeners, so nothing has to poll the process.
+    """
+
+    def __init__(self, read: Callable[[int], bytes], write: Callable[[bytes], None], close: Callable[[], None], log_writer: TimestampedLogWriter, name: str = "terminal"):
+        self._read = read
+        self._write = write
+        self._close = close
+        self.log_writer = log_writer
+        self.output_event = threading.Condition()
+        self.output_count = 0  # Chunks received, so waiters can tell whether output arrived since they last looked
+        self.listeners: Set[Callable[[], None]] = set()  # Called from the reader thread on output and on close
+        self.last_output_at = time.monotonic()
+        self.closed = False
+        self._write_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._pump, name=f"StreamSession({name})", daemon=True)
+        self._thread.start()
+
+    def _pump(self):
+        try:
+            while True:
+                data = self._read(READ_CHUNK_BYTES)
+                if not data:
+                    break
+                self.log_writer.write(data)
+                with self.output_event:
+                    self.last_output_at = time.monotonic()
+                    self.output_count += 1
+                    self.output_event.notify_all()
+                self._notify_listeners()
+        except (OSError, ValueError):
+            pass
+        finally:
+            self.closed = True
+            self.log_writer.close()
+            with self.output_event:
+                self.output_event.notify_all()
+            self._notify_listeners()
+
+    def _notify_listeners(self):
+        for listener in list(self.listeners):
+            listener()
+
+    def write(self, data: bytes):
+        with self._write_lock:
+            self._write(data)
+
+    def close(self):
+        try:
+            self.write(b"exit\n")
+        except OSError:
+            pass
+        self._close()
+        self._thread.join(timeout=2)
+
+    @property
+    def running(self) -> bool:
+        return not self.closed and self._thread.is_alive()
+
+
+class StreamTerminalBackend(TerminalBackend):
+    """
+    Base for backends that keep a StreamSession per terminal session. Subclasses open the byte stream
+    to a new shell in _open_stream; writing input, waiting on output and tailing are shared, and the log
+    writer rotates the log as it writes, whether or not anybody reads it.
+    """
+
+    def __init__(self, log_max_bytes: int = LOG_MAX_BYTES, log_segments: int = LOG_SEGMENTS):
+        self.log_max_bytes = log_max_bytes
+        self.log_segments = log_segments
+        self.sessions: Dict[str, StreamSession] = {}
+        self._seen_output: Dict[str, int] = {}  # output_count of each session when its last wait returned
+
+    @abstractmethod
+    def _open_stream(self, session_id: str) -> Tuple[Callable[[int], bytes], Callable[[bytes], None], Callable[[], None]]:
+        """Starts a shell and returns its read, write and close functions."""
+
+    def start_session(self, session_id: str, log_file_path: str):
+        if session_id in self.sessions:
+            self.close_session(session_id)
+        read, write, close = self._open_stream(session_id)
+        self.sessions[session_id] = StreamSession(read, write, close, TimestampedLogWriter(log_file_path, self.log_max_bytes, self.log_segments), session_id)
+
+    def get_session(self, session_id: str) -> StreamSession:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise KeyError(f"Terminal session {session_id} is not open")
+        return session
+
+    def send_input(self, session_id: str, data: str):
+        self.get_session(session_id).write(data.encode("utf-8"))
+
+    def close_session(self, session_id: str):
+        session = self.sessions.pop(session_id, None)
+        self._seen_output.pop(session_id, None)
+        if session is None:
+            raise KeyError(f"Terminal session {session_id} is not open")
+        session.close()
+
+    def is_running(self, session_id: str) -> bool:
+        session = self.sessions.get(session_id)
+        return session is not None and session.running
+
+    def wait_for_output(self, session_id: str, timeout_s: float):
+        # Returns at once if output arrived since the previous wait, which the caller may not have read yet
+        session = self.get_session(session_id)
+        with session.output_event:
+            if session.running and session.output_count == self._seen_output.get(session_id):
+                session.output_event.wait(timeout_s)
+            self._seen_output[session_id] = session.output_count
+
+    async def async_wait_for_output(self, session_id: str, timeout_s: float):
+        session = self.get_session(session_id)
+        loop = asyncio.get_running_loop()
+        output_arrived = asyncio.Event()
+
+        def listener():
+            loop.call_soon_threadsafe(output_arrived.set)
+
+        session.listeners.add(listener)
+        try:
+            if session.running and session.output_count == self._seen_output.get(session_id):
+                await asyncio.wait_for(output_arrived.wait(), timeout_s)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            session.listeners.discard(listener)
+            self._seen_output[session_id] = session.output_count
+
+    def tail(self, session_id: str, max_bytes: int) -> Optional[str]:
+        return self.get_session(session_id).log_writer.tail.read(max_bytes)
+
+
+class TmuxTerminalBackend(StreamTerminalBackend):
+    """
+    One tmux session per terminal session, running `docker exec -it`. tmux pipe-pane copies the pane's
+    output into a FIFO, and the session's reader thread stamps and appends it to the log like the other
+    stream backends, so the log is rotated as it is written and `ts` is not needed. Input goes through
+    `tmux send-keys`.
+    """
+
+    def __init__(self, container_name: str, log_max_bytes: int = LOG_MAX_BYTES, log_segments: int = LOG_SEGMENTS):
+        super().__init__(log_max_bytes, log_segments)
+        self.container_name = container_name
+        self.fifo_dir = tempfile.mkdtemp(prefix="tmux-output-")
+
+    def shell_command(self) -> str:
+        return f"docker exec -it {self.container_name} /bin/bash"
+
+    def _open_stream(self, session_id: str):
+        fifo_path = os.path.join(self.fifo_dir, f"{session_id}.fifo")
+        if os.path.exists(fifo_path):
+            os.remove(fifo_path)
+        os.mkfifo(fifo_path, 0o600)
+        fifo = os.open(fifo_path, os.O_RDWR)  # Read-write, so opening does not block and `cat` restarting is not an EOF
+        try:
+            subprocess.run(["tmux", "kill-session", "-t", session_id], stderr=subprocess.DEVNULL)  # Ignore errors if session does not exist
+            # One tmux invocation, so the pipe is in place before the shell prints anything
+            subprocess.run(["tmux", "new-session", "-d", "-s", session_id, self.shell_command(), ";", "pipe-pane", "-t", session_id, f"cat > {shlex.quote(fifo_path)}"], check=True)
+        except (OSError, subprocess.CalledProcessError):
+            os.close(fifo)
+            os.remove(fifo_path)
+            raise
+        wake_read, wake_write = os.pipe()
+
+        def read(size: int) -> bytes:
+            ready, _, _ = select.select([fifo, wake_read], [], [])
+            if wake_read not in ready:
+                return os.read(fifo, size)
+            os.close(fifo)
+            os.close(wake_read)
+            return b""
+
+        def write(data: bytes):
+            # -l sends text literally and the argument list avoids a shell, so quotes in commands survive
+            command = []
+            for part in re.split(r"(\x03|\n)", data.decode("utf-8", errors="replace")):
+                keys = ["C-c"] if part == INTERRUPT else ["Enter"] if part == "\n" else ["-l", part] if part else None
+                if keys:
+                    command += [";", "send-keys", "-t", session_id, *keys] if command else ["tmux", "send-keys", "-t", session_id, *keys]
+            if command:
+                subprocess.run(command, check=True)
+
+        def close():
+            subprocess.run(["tmux", "kill-session", "-t", session_id], stderr=subprocess.DEVNULL)
+            os.write(wake_write, b"\0")
+            os.close(wake_write)
+            try:
+                os.remove(fifo_path)
+            except OSError:
+                pass
+
+        return read, write, close
+
+    def is_running(self, session_id: str) -> bool:
+        return super().is_running(session_id) and subprocess.run(["tmux", "has-session", "-t", session_id], stderr=subprocess.DEVNULL).returncode == 0
+
+
+class DockerExecTerminalBackend(StreamTerminalBackend):
+    """
+    Keeps one interactive `docker exec` PTY per session open through the Docker SDK. Commands are written
+    straight to the exec socket and a reader thread streams the output into the log, so no process is
+    spawned and no shell quoting happens per command.
+    """
+
+    def __init__(self, container_name: str, client=None, shell: str = "/bin/bash", log_max_bytes: int = LOG_MAX_BYTES, log_segments: int = LOG_SEGMENTS):
+        super().__init__(log_max_bytes, log_segments)
+        if client is None:
+            import docker
+            client = docker.from_env()
+        self.client = client
+        self.container_name = container_name
+        self.shell = shell
+
+    def _open_stream(self, session_id: str):
+        exec_id = self.client.api.exec_create(self.container_name, [self.shell], stdin=True, tty=True, environment={"TERM": "xterm"})["Id"]
+        stream = self.client.api.exec_start(exec_id, tty=True, socket=True)
+        raw_socket = getattr(stream, "_sock", stream)
+
+        def close():
+            try:
+                raw_socket.shutdown(socket.SHUT_RDWR)  # Unblocks the reader thread
+            except OSError:
+                pass
+            stream.close()
+
+        return raw_socket.recv, raw_socket.sendall, close
+
+
+class LocalPtyTerminalBackend(StreamTerminalBackend):
+    """
+    Runs each session's shell as a local process on its own pseudo-terminal, e.g. inside the sandbox of a
+    LocalProcessExecutionBackend. argv may be prefixed with wrappers such as unshare or a resource limit
+    wrapper; the shell is started without a preexec_fn, which is unsafe in a threaded process.
+    """
+
+    def __init__(self, argv: List[str], cwd: str, env: Optional[Dict[str, str]] = None, log_max_bytes: int = LOG_MAX_BYTES, log_segments: int = LOG_SEGMENTS):
+        super().__init__(log_max_bytes, log_segments)
+        self.argv = argv
+        self.cwd = cwd
+        self.env = env
+
+    def _open_stream(self, session_id: str):
+        master, slave = pty.openpty()
+        try:
+            process = subprocess.Popen([sys.executable, "-c", CONTROLLING_TTY_EXEC, *self.argv], stdin=slave, stdout=slave, stderr=slave, cwd=self.cwd, env=self.env, start_new_session=True, close_fds=True)
+        except OSError:
+            os.close(master)
+            raise
+        finally:
+            os.close(slave)
+        wake_read, wake_write = os.pipe()
+
+        def read(size: int) -> bytes:
+            # Only the reader thread closes the terminal, so no other thread can touch a reused descriptor
+            ready, _, _ = select.select([master, wake_read], [], [])
+            if wake_read not in ready:
+                try:
+                    data = os.read(master, size)
+                    if data:
+                        return data
+                except OSError:
+                    pass  # EIO once every process holding the terminal has exited
+            os.close(master)  # Hangs up the terminal, which ends the shell's jobs
+            os.close(wake_read)
+            return b""
+
+        def write(data: bytes):
+            while data:
+                data = data[os.write(master, data):]
+
+        def close():
+            os.write(wake_write, b"\0")
+            os.close(wake_write)
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+            try:
+                process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                pass
+
+        return read, write, close
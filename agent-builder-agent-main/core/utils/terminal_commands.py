@@ -0,0 +1,111 @@
+import re
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+from .terminal_logs import strip_timestamps
+
+# run_command wraps a command so the shell itself reports where its stdout and stderr start and end and
+# what it exited with. The markers are printed with printf('__KX_%s_<token>__', 'END'), so the echoed
+# command line never contains a complete marker and cannot be mistaken for the real one.
+
+MARKER_PREFIX = "__KX_"
+
+RUN_WAIT = "wait"
+RUN_INTERRUPT = "interrupt"
+RUN_DONE = "done"
+
+
+@dataclass
+class CommandResult:
+    exit_code: int
+    stdout: str
+    stderr: str
+
+
+def new_token() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def _capture_paths(token: str):
+    return f"${{TMPDIR:-/tmp}}/.kx_{token}.out", f"${{TMPDIR:-/tmp}}/.kx_{token}.err"
+
+
+def report_suffix(token: str, exit_code_expression: str = "$?") -> str:
+    """
+    Shell that prints the captured output between markers, followed by the exit code, and removes the capture files.
+    """
+    stdout_path, stderr_path = _capture_paths(token)
+    return (
+        f"__kx_rc={exit_code_expression}; "
+        f"printf '\\n{MARKER_PREFIX}%s_{token}__\\n' OUT; cat {stdout_path} 2>/dev/null; "
+        f"printf '\\n{MARKER_PREFIX}%s_{token}__\\n' ERR; cat {stderr_path} 2>/dev/null; "
+        f"printf '\\n{MARKER_PREFIX}%s_{token}__ %s\\n' END \"$__kx_rc\"; "
+        f"rm -f {stdout_path} {stderr_path}"
+    )
+
+
+def wrap_command(command: str, token: str) -> str:
+    """
+    Runs command in the current shell (so cd and exports persist) with stdout and stderr captured to files.
+    The newline before the closing brace keeps trailing comments and heredocs in command intact.
+    """
+    stdout_path, stderr_path = _capture_paths(token)
+    return f"{{ {command}\n}} >{stdout_path} 2>{stderr_path}; {report_suffix(token)}"
+
+
+def parse_command_output(text: str, token: str) -> Optional[CommandResult]:
+    """
+    Extracts the result of a wrapped command from terminal output, or returns None while it is still running.
+    """
+    text = strip_timestamps(text.replace("\r\n", "\n").replace("\r", ""))
+    match = re.search(
+        rf"\n{MARKER_PREFIX}OUT_{token}__\n(.*?)\n?\n{MARKER_PREFIX}ERR_{token}__\n(.*?)\n?\n{MARKER_PREFIX}END_{token}__ (-?\d+)\n",
+        text,
+        re.DOTALL,
+    )
+    if match is None:
+        return None
+    return CommandResult(int(match.group(3)), match.group(1), match.group(2))
+
+
+class CommandRun:
+    """
+    State of one run_command. step() takes the output read since its previous call and returns what to
+    do next: RUN_WAIT for up to `remaining` seconds, RUN_INTERRUPT once timeout_s has passed (send Ctrl+C,
+    then report_command, so the command reports what it captured), or RUN_DONE when the result is in or
+    the interrupted command did not report within report_timeout_s. Reading and waiting are left to the
+    caller, like LogWait.poll, so the blocking and asyncio tools share it.
+    """
+
+    def __init__(self, command: str, timeout_s: float, report_timeout_s: float):
+        self.command = command
+        self.token = new_token()
+        self.wrapped_command = wrap_command(command, self.token)
+        self.report_command = report_suffix(self.token, "130")
+        self.report_timeout_s = report_timeout_s
+        self.started_at = time.monotonic()
+        self.deadline = self.started_at + timeout_s
+        self.remaining = timeout_s
+        self.output = ""
+        self.result: Optional[CommandResult] = None
+        self.timed_out = False
+
+    def step(self, new_output: str) -> str:
+        self.output += new_output
+        self.result = parse_command_output(self.output, self.token)
+        if self.result is not None:
+            return RUN_DONE
+        self.remaining = self.deadline - time.monotonic()
+        if self.remaining > 0:
+            return RUN_WAIT
+        if self.timed_out:
+            return RUN_DONE
+        self.timed_out = True
+        self.deadline = time.monotonic() + self.report_timeout_s
+        return RUN_INTERRUPT
+
+    @property
+    def duration(self) -> float:
+        return time.monotonic() - self.started_at
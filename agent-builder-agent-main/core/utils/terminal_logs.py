@@ -0,0 +1,376 @@
+import os
+import re
+import asyncio
+import time
+import gzip
+import bisect
+import shutil
+import threading
+from typing import Dict, List, Optional, Tuple
+
+TIMESTAMP_FORMAT = "%Y-%m-%d-%H:%M:%S"  # Prefix written by `ts` in front of every terminal log line
+TIMESTAMP_PREFIX = re.compile(r"^\d{4}-\d{2}-\d{2}-\d{2}:\d{2}:\d{2} ?", re.MULTILINE)
+WAIT_POLL_INTERVAL_S = 0.025
+WAIT_WINDOW_BYTES = 64 * 1024  # Recent output kept for matching until_regex across reads
+
+INDEX_EVERY_BYTES = 16 * 1024  # Spacing of the sparse timestamp -> offset index
+READ_CHUNK_BYTES = 256 * 1024
+
+LOG_MAX_BYTES = 8 * 1024 * 1024  # Size at which a session log is rotated into a compressed segment
+LOG_SEGMENTS = 3  # Compressed segments kept per session (<log>.1.gz is the newest)
+LOG_COMPRESS_LEVEL = 6
+TAIL_BUFFER_BYTES = 64 * 1024
+
+WAIT_IDLE = "idle"
+WAIT_REGEX = "regex"
+WAIT_TIMEOUT = "timeout"
+
+
+def strip_timestamps(text: str) -> str:
+    return TIMESTAMP_PREFIX.sub("", text)
+
+
+class LogWait:
+    """
+    Tracks a log for wait_for_log_output: each poll() checks whether the log has not grown for idle_ms,
+    until_regex matches the output written after start_offset (defaults to the current end of the log),
+    or timeout_s has passed, and returns which condition ended the wait (WAIT_IDLE, WAIT_REGEX or
+    WAIT_TIMEOUT) or None to keep waiting. Timestamps are stripped before matching, so patterns can
+    anchor on the shell output itself. Polling is separate from sleeping so threads and event loops
+    can share it.
+    """
+
+    def __init__(self, log_file_path: str, timeout_s: float, idle_ms: Optional[int] = None, until_regex: Optional[str] = None, start_offset: Optional[int] = None):
+        self.log_file_path = log_file_path
+        self.idle_ms = idle_ms
+        self.pattern = re.compile(until_regex, re.MULTILINE) if until_regex else None
+        started_at = time.monotonic()
+        self.deadline = started_at + timeout_s
+        self.offset = self._size() if start_offset is None else start_offset
+        self.last_size, self.last_growth_at = self.offset, started_at
+        self.window = ""
+
+    def _size(self) -> int:
+        try:
+            return os.stat(self.log_file_path).st_size
+        except OSError:
+            return 0
+
+    def poll(self) -> Optional[str]:
+        now = time.monotonic()
+        current_size = self._size()
+        if current_size != self.last_size:
+            if self.pattern is not None and current_size > self.offset:
+                with open(self.log_file_path, "rb") as log_file:
+                    log_file.seek(self.offset)
+                    self.window = (self.window + log_file.read(current_size - self.offset).decode("utf-8", errors="replace"))[-WAIT_WINDOW_BYTES:]
+                self.offset = current_size
+                if self.pattern.search(strip_timestamps(self.window)):
+                    return WAIT_REGEX
+            elif current_size < self.offset:
+                self.offset = current_size  # The log was truncated or rotated
+            self.last_size, self.last_growth_at = current_size, now
+        if self.idle_ms is not None and (now - self.last_growth_at) * 1000 >= self.idle_ms:
+            return WAIT_IDLE
+        if now >= self.deadline:
+            return WAIT_TIMEOUT
+        return None
+
+
+def wait_for_log_output(log_file_path: str, timeout_s: float, idle_ms: Optional[int] = None, until_regex: Optional[str] = None, start_offset: Optional[int] = None) -> str:
+    """
+    Blocks until the log has not grown for idle_ms, until_regex matches the new output, or timeout_s
+    has passed, whichever comes first, and returns which condition ended the wait (see LogWait).
+    """
+    wait = LogWait(log_file_path, timeout_s, idle_ms, until_regex, start_offset)
+    while True:
+        reason = wait.poll()
+        if reason is not None:
+            return reason
+        time.sleep(WAIT_POLL_INTERVAL_S)
+
+
+async def async_wait_for_log_output(log_file_path: str, timeout_s: float, idle_ms: Optional[int] = None, until_regex: Optional[str] = None, start_offset: Optional[int] = None) -> str:
+    """
+    wait_for_log_output for asyncio: sleeps with asyncio.sleep, so other tasks keep running meanwhile.
+    """
+    wait = LogWait(log_file_path, timeout_s, idle_ms, until_regex, start_offset)
+    while True:
+        reason = wait.poll()
+        if reason is not None:
+            return reason
+        await asyncio.sleep(WAIT_POLL_INTERVAL_S)
+
+
+class TailBuffer:
+    """
+    Ring buffer of the most recent capacity bytes written to a log, for tail queries that must not
+    depend on how much a session has printed over its lifetime.
+    """
+
+    def __init__(self, capacity: int = TAIL_BUFFER_BYTES):
+        self.capacity = capacity
+        self._buffer = bytearray()
+        self._trimmed = False
+        self.lock = threading.Lock()
+
+    def append(self, data: bytes):
+        with self.lock:
+            self._buffer += data
+            if len(self._buffer) > 2 * self.capacity:  # Trimming in batches keeps appends amortized O(len(data))
+                del self._buffer[:-self.capacity]
+                self._trimmed = True
+
+    def read(self, max_bytes: int) -> str:
+        with self.lock:
+            available = min(len(self._buffer), self.capacity)
+            data = bytes(self._buffer[-min(max_bytes, available):]) if available else b""
+            truncated = self._trimmed or len(data) < len(self._buffer)
+        return _decode_tail(data, truncated)
+
+
+def _decode_tail(data: bytes, truncated: bool) -> str:
+    if truncated:
+        newline = data.find(b"\n")
+        data = data[newline + 1:] if newline >= 0 else data  # Start at a line boundary
+    return data.decode("utf-8", errors="replace")
+
+
+def segment_path(log_file_path: str, number: int) -> str:
+    return f"{log_file_path}.{number}.gz"
+
+
+def rotate_log(log_file_path: str, segments: int = LOG_SEGMENTS):
+    """
+    Moves the log into gzip segment 1, shifting older segments up and dropping those beyond segments.
+    The log is removed afterwards, so the writer must reopen it.
+    """
+    if segments > 0:
+        oldest = segment_path(log_file_path, segments)
+        if os.path.exists(oldest):
+            os.remove(oldest)
+        for number in range(segments - 1, 0, -1):
+            if os.path.exists(segment_path(log_file_path, number)):
+                os.replace(segment_path(log_file_path, number), segment_path(log_file_path, number + 1))
+        temp_path = segment_path(log_file_path, 1) + ".tmp"
+        with open(log_file_path, "rb") as source, gzip.open(temp_path, "wb", compresslevel=LOG_COMPRESS_LEVEL) as target:
+            shutil.copyfileobj(source, target)
+        os.replace(temp_path, segment_path(log_file_path, 1))
+    os.remove(log_file_path)
+
+
+class SessionLogReader:
+    """
+    Incremental reader for one `ts`-stamped terminal log. It keeps a byte cursor for "since last read"
+    queries and a sparse index of (timestamp, line offset) entries, roughly one per INDEX_EVERY_BYTES,
+    which is extended from the last indexed offset on every query. A time-range query seeks to the last
+    indexed line before the range and scans at most one index interval before reaching it, so queries
+    do not slow down as the log grows.
+
+    The log file is kept open, so when the writer rotates it by renaming, the unread rest of the old
+    file is still returned by read_new. Time ranges that start before the current file are read from
+    the compressed segments.
+    """
+
+    def __init__(self, log_file_path: str, index_every_bytes: int = INDEX_EVERY_BYTES, segments: int = LOG_SEGMENTS):
+        self.log_file_path = log_file_path
+        self.index_every_bytes = index_every_bytes
+        self.segments = segments
+        self.cursor = 0
+        self.history_start: Optional[int] = None  # Set by mark(forget_history=True): read_range starts here and skips the segments
+        self.index: List[Tuple[float, int]] = []
+        self.indexed_offset = 0
+        self._file = None
+        self._inode: Optional[int] = None
+        self._pending = b""  # Unread output of a rotated file, returned by the next read_new
+        self._timestamps: Dict[bytes, float] = {}
+        self.lock = threading.Lock()
+
+    def _parse_timestamp(self, line: bytes) -> Optional[float]:
+        prefix = line[:19]
+        if len(prefix) < 19 or prefix[4:5] != b"-" or prefix[10:11] != b"-" or prefix[13:14] != b":" or not prefix[:4].isdigit():
+            return None
+        timestamp = self._timestamps.get(prefix)
+        if timestamp is None:
+            try:
+                timestamp = time.mktime(time.strptime(prefix.decode("ascii"), TIMESTAMP_FORMAT))
+            except (ValueError, UnicodeDecodeError):
+                return None
+            if len(self._timestamps) > 4096:
+                self._timestamps.clear()
+            self._timestamps[prefix] = timestamp
+        return timestamp
+
+    def _reset(self):
+        self.cursor = self.indexed_offset = 0
+        self.index = []
+        if self.history_start is not None:
+            self.history_start = 0  # A new file holds only output written after the mark
+
+    def _sync(self) -> int:
+        """
+        Follows rotation and truncation of the log and returns the current log size.
+        """
+        try:
+            stat = os.stat(self.log_file_path)
+        except OSError:
+            return 0
+        if self._file is None or stat.st_ino != self._inode:
+            if self._file is not None:
+                self._file.seek(self.cursor)
+                self._pending += self._file.read()
+                self._file.close()
+            try:
+                self._file = open(self.log_file_path, "rb")
+            except OSError:
+                self._file = None
+                return 0
+            self._inode = os.fstat(self._file.fileno()).st_ino
+            self._reset()
+            stat = os.fstat(self._file.fileno())
+        elif stat.st_size < self.indexed_offset or stat.st_size < self.cursor:
+            self._reset()
+        return stat.st_size
+
+    def _extend_index(self, log_file, size: int):
+        log_file.seek(self.indexed_offset)
+        while self.indexed_offset < size:
+            chunk = log_file.read(min(READ_CHUNK_BYTES, size - self.indexed_offset))
+            end = chunk.rfind(b"\n")
+            if end < 0:
+                if len(chunk) < READ_CHUNK_BYTES:
+                    break  # Only a partial line is left
+                end = len(chunk) - 1
+            position = 0
+            while position <= end:
+                line_end = chunk.find(b"\n", position, end + 1)
+                if line_end < 0:
+                    line_end = end  # A chunk inside a line longer than READ_CHUNK_BYTES (e.g. \r progress output)
+                offset = self.indexed_offset + position
+                if not self.index or offset - self.index[-1][1] >= self.index_every_bytes:
+                    timestamp = self._parse_timestamp(chunk[position:line_end])
+                    if timestamp is not None and (not self.index or timestamp >= self.index[-1][0]):
+                        self.index.append((timestamp, offset))
+                position = line_end + 1
+            self.indexed_offset += end + 1
+            log_file.seek(self.indexed_offset)
+
+    def _filter_lines(self, lines, start_time: float, end_time: float, observed: List[str], within_range: bool) -> Tuple[bool, bool]:
+        """
+        Appends the lines in the time range to observed. Returns the within_range state for the next
+        line and whether a line after end_time was reached.
+        """
+        for line in lines:
+            timestamp = self._parse_timestamp(line)
+            if timestamp is not None:
+                if timestamp > end_time:
+                    return within_range, True
+                within_range = timestamp >= start_time
+            if within_range:
+                observed.append(line.rstrip(b"\n").decode("utf-8", errors="replace"))
+        return within_range, False
+
+    def _segments_before(self, start_time: float) -> List[str]:
+        """
+        Returns the rotated segments (oldest first) that may hold lines at or after start_time.
+        """
+        needed = []
+        for number in range(1, self.segments + 1):
+            path = segment_path(self.log_file_path, number)
+            try:
+                with gzip.open(path, "rb") as segment:
+                    first_line = segment.readline()
+            except (OSError, EOFError):
+                break
+            needed.append(path)
+            first_timestamp = self._parse_timestamp(first_line)
+            if first_timestamp is not None and first_timestamp <= start_time:
+                break
+        return needed[::-1]
+
+    def read_range(self, start_time: float, end_time: float) -> str:
+        """
+        Returns the lines stamped between start_time and end_time (inclusive), plus the unstamped lines
+        that follow them, in the same format as the log.
+        """
+        with self.lock:
+            size = self._sync()
+            observed, within_range = [], False
+            if self._file is not None:
+                self._extend_index(self._file, size)
+            if self.history_start is None and (not self.index or self.index[0][0] > start_time):
+                for path in self._segments_before(start_time):
+                    try:
+                        with gzip.open(path, "rb") as segment:
+                            within_range, done = self._filter_lines(segment, start_time, end_time, observed, within_range)
+                    except (OSError, EOFError):
+                        continue
+                    if done:
+                        return "\n".join(observed)
+                start_offset = 0
+            else:
+                position = bisect.bisect_left(self.index, (start_time, -1)) - 1
+                start_offset = self.index[position][1] if position >= 0 else 0
+                start_offset = max(start_offset, self.history_start or 0)
+            if self._file is not None and size > start_offset:
+                self._filter_lines(self._iter_lines(start_offset, size), start_time, end_time, observed, within_range)
+        return "\n".join(observed)
+
+    def _iter_lines(self, start: int, end: int):
+        self._file.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            line = self._file.readline(remaining)
+            if not line:
+                break
+            remaining -= len(line)
+            yield line
+
+    def read_new(self) -> str:
+        """
+        Returns everything written since the previous read_new (or mark) call and advances the cursor.
+        """
+        with self.lock:
+            size = self._sync()
+            data, self._pending = self._pending, b""
+            if self._file is not None and size > self.cursor:
+                self._file.seek(self.cursor)
+                data += self._file.read(size - self.cursor)
+                self.cursor = size
+        return data.decode("utf-8", errors="replace")
+
+    def mark(self, forget_history: bool = False):
+        """
+        Moves the cursor to the end of the log, so the next read_new only returns later output. With
+        forget_history, read_range no longer returns anything written so far either, e.g. once a reused
+        shell starts serving a new session.
+        """
+        with self.lock:
+            self.cursor = self._sync()
+            self._pending = b""
+            if forget_history:
+                self.history_start = self.cursor
+
+    def tail(self, max_bytes: int) -> str:
+        """
+        Returns the last max_bytes of the current log file, starting at a line boundary.
+        """
+        with self.lock:
+            size = self._sync()
+            if self._file is None or size == 0:
+                return ""
+            start = max(0, size - max_bytes)
+            self._file.seek(start)
+            data = self._file.read(size - start)
+        return _decode_tail(data, start > 0)
+
+    @property
+    def size(self) -> int:
+        with self.lock:
+            return self._sync()
+
+    def close(self):
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,132 @@
+import re
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from .terminal_logs import TIMESTAMP_PREFIX
+
+MAX_OUTPUT_LINES = 200  # Lines returned after folding; the rest of the middle is elided
+HEAD_FRACTION = 0.3  # Share of MAX_OUTPUT_LINES kept from the start, the rest comes from the end
+MIN_REPEAT_RUN = 3  # Identical consecutive lines folded from this run length on
+MAX_LINE_CHARS = 2000
+ERROR_CONTEXT_BEFORE = 2
+ERROR_CONTEXT_AFTER = 3
+ERROR_TAIL_LINES = 5  # Final lines kept by errors_only so the command's outcome stays visible
+
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-?]*[ -/]*[@-~]|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)|\x1b[@-Z\\-_]|[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+ERROR_LINE = re.compile(r"error|exception|traceback|fail|fatal|panic|warn|assert|errno|denied|refused|not found|segmentation fault|exit code|exit status", re.IGNORECASE)
+
+
+@dataclass
+class CompactionStats:
+    original_chars: int = 0
+    compacted_chars: int = 0
+    original_lines: int = 0
+    compacted_lines: int = 0
+    ansi_sequences: int = 0  # Escape sequences and stray control characters
+    overwritten_lines: int = 0  # Carriage-return redraws (progress bars) dropped
+    folded_lines: int = 0
+    elided_lines: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return self.compacted_chars != self.original_chars
+
+    def summary(self) -> str:
+        return (
+            f"[output compacted: {self.original_chars} -> {self.compacted_chars} chars, {self.original_lines} -> {self.compacted_lines} lines; "
+            f"{self.ansi_sequences} escape sequences, {self.overwritten_lines} progress redraws, "
+            f"{self.folded_lines} repeated lines and {self.elided_lines} other lines removed]"
+        )
+
+
+def _collapse_carriage_returns(line: str) -> Tuple[str, int]:
+    """
+    Keeps what a terminal would show for a line redrawn with carriage returns: the last non-empty redraw.
+    """
+    if "\r" not in line:
+        return line, 0
+    redraws = [part for part in line.split("\r") if part]
+    if not redraws:
+        return "", 0
+    # The timestamp written before the first redraw belongs to the whole line
+    prefix = TIMESTAMP_PREFIX.match(redraws[0])
+    last = redraws[-1]
+    if prefix and len(redraws) > 1 and not TIMESTAMP_PREFIX.match(last):
+        last = prefix.group(0) + last
+    return last, len(redraws) - 1
+
+
+def _fold_repeats(lines: List[str], stats: CompactionStats) -> List[str]:
+    folded, index = [], 0
+    while index < len(lines):
+        key = TIMESTAMP_PREFIX.sub("", lines[index], count=1)
+        end = index + 1
+        while end < len(lines) and TIMESTAMP_PREFIX.sub("", lines[end], count=1) == key:
+            end += 1
+        run = end - index
+        if run >= MIN_REPEAT_RUN and key.strip():
+            folded.append(lines[index])
+            folded.append(f"[... previous line repeated {run - 1} more times]")
+            stats.folded_lines += run - 1
+        else:
+            folded.extend(lines[index:end])
+        index = end
+    return folded
+
+
+def _error_lines(lines: List[str]) -> Tuple[List[str], int]:
+    """
+    Keeps lines that look like errors or warnings with some context, indented continuations such as
+    traceback frames, and the final lines of the output. Returns the kept lines and how many were omitted.
+    """
+    keep = [False] * len(lines)
+    for index, line in enumerate(lines):
+        if ERROR_LINE.search(line):
+            for neighbour in range(max(0, index - ERROR_CONTEXT_BEFORE), min(len(lines), index + ERROR_CONTEXT_AFTER + 1)):
+                keep[neighbour] = True
+            following = index + 1
+            while following < len(lines) and TIMESTAMP_PREFIX.sub("", lines[following], count=1)[:1].isspace():
+                keep[following] = True
+                following += 1
+    for index in range(max(0, len(lines) - ERROR_TAIL_LINES), len(lines)):
+        keep[index] = True
+    selected, skipped = [], 0
+    for line, kept in zip(lines, keep):
+        if kept:
+            if skipped:
+                selected.append(f"[... {skipped} lines without errors omitted]")
+                skipped = 0
+            selected.append(line)
+        else:
+            skipped += 1
+    return selected, keep.count(False)
+
+
+def compact_terminal_output(text: str, max_lines: int = MAX_OUTPUT_LINES, errors_only: bool = False) -> Tuple[str, CompactionStats]:
+    """
+    Shrinks terminal output before it is shown to the model: strips ANSI escapes and control
+    characters, keeps only the final state of carriage-return progress lines, folds runs of identical
+    lines, optionally keeps only error-looking lines with context, and elides the middle of whatever is
+    still longer than max_lines. Returns the compacted text and what was removed.
+    """
+    stats = CompactionStats(original_chars=len(text), original_lines=text.count("\n") + 1 if text else 0)
+    text, stats.ansi_sequences = ANSI_ESCAPE.subn("", text.replace("\r\n", "\n"))
+    lines = []
+    for line in text.split("\n"):
+        line, overwritten = _collapse_carriage_returns(line)
+        stats.overwritten_lines += overwritten
+        lines.append(line if len(line) <= MAX_LINE_CHARS else line[:MAX_LINE_CHARS] + " [... line truncated]")
+    lines = _fold_repeats(lines, stats)
+    if errors_only:
+        lines, omitted = _error_lines(lines)
+        stats.elided_lines += omitted
+    if len(lines) > max_lines:
+        head = int(max_lines * HEAD_FRACTION)
+        tail = max_lines - head
+        elided = len(lines) - head - tail
+        stats.elided_lines += elided
+        lines = lines[:head] + [f"[... {elided} lines elided ...]"] + lines[-tail:]
+    compacted = "\n".join(lines)
+    stats.compacted_chars = len(compacted)
+    stats.compacted_lines = len(lines) if compacted else 0
+    return compacted, stats
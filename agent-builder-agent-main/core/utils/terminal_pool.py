@@ -0,0 +1,223 @@
+import os
+import time
+import uuid
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .terminal_backends import TerminalBackend
+from .terminal_commands import MARKER_PREFIX, new_token
+from .terminal_logs import WAIT_TIMEOUT, SessionLogReader, wait_for_log_output
+
+# Captured once per shell, so a reset can restore the environment the shell started with
+BASELINE_COMMAND = "__KX_BASE_ENV=$(export -p)"
+# Kills the previous session's jobs, drops its aliases, functions and exported variables and returns home
+RESET_COMMAND = (
+    "kill -9 $(jobs -p) 2>/dev/null; wait 2>/dev/null; unalias -a; unset -f $(compgen -A function) 2>/dev/null; "
+    "[ -n \"$__KX_BASE_ENV\" ] && { for __kx_var in $(compgen -e); do unset \"$__kx_var\" 2>/dev/null; done; eval \"$__KX_BASE_ENV\" 2>/dev/null; }; "
+    "cd ~ && clear"
+)
+REAP_INTERVAL_S = 5
+PROMPT_TIMEOUT_S = 2  # Time allowed for a shell to react to Ctrl+C
+PROMPT_IDLE_MS = 150  # Output quiet for this long after Ctrl+C means the shell is back at its prompt
+COMMAND_TIMEOUT_S = 5  # Time allowed for the baseline and reset commands to report back
+
+
+@dataclass
+class PooledSession:
+    shell_id: str  # Name of the shell in the backend; stays the same while the shell is reused
+    log_file_path: str
+    idle_since: float
+    reader: Optional[SessionLogReader] = None  # Created by the first tool that reads the log; lives as long as the shell
+
+
+def new_session_id() -> str:
+    return f"session_{uuid.uuid4().hex[:8]}"
+
+
+class SessionPool:
+    """
+    Keeps warm_size shells started ahead of time, so acquire() hands out a running session instead of
+    waiting for tmux or `docker exec`. A maintenance thread refills the pool after every acquire and
+    closes released sessions beyond warm_size once they have been idle for idle_timeout_s.
+
+    Every acquire issues a new random session ID mapped to the shell it leases, so a reused shell never
+    brings back an old ID, and IDs that were released are rejected by lease(). Released shells are reset
+    before they are reused: their jobs are killed, the environment is restored and the cwd moved home.
+    """
+
+    def __init__(self, backend: TerminalBackend, logs_dir: str, warm_size: int = 2, idle_timeout_s: float = 300, reset_command: str = RESET_COMMAND):
+        self.backend = backend
+        self.logs_dir = logs_dir
+        self.warm_size = warm_size
+        self.idle_timeout_s = idle_timeout_s
+        self.reset_command = reset_command
+        self.idle: List[PooledSession] = []
+        self.in_use: Dict[str, PooledSession] = {}  # Public session ID -> leased shell
+        self.starting = 0
+        self.closed = False
+        self.condition = threading.Condition()
+        self._thread = threading.Thread(target=self._maintain, name="SessionPool", daemon=True)
+        self._thread.start()
+
+    def _start_session(self) -> PooledSession:
+        shell_id = new_session_id()
+        log_file_path = os.path.join(self.logs_dir, f"{shell_id}.log")
+        self.backend.start_session(shell_id, log_file_path)
+        session = PooledSession(shell_id, log_file_path, time.monotonic())
+        if not self._run_and_wait(session, BASELINE_COMMAND):
+            self._close(session)
+            raise RuntimeError(f"Terminal session {shell_id} did not start")
+        return session
+
+    def _run_and_wait(self, session: PooledSession, command: str) -> bool:
+        """
+        Sends command followed by a marker and waits until the shell prints the marker, i.e. it ran the
+        whole line. Returns False if the shell did not get there within COMMAND_TIMEOUT_S.
+        """
+        token = new_token()
+        start_offset = self._log_size(session)
+        self.backend.send_command(session.shell_id, f"{command}; printf '{MARKER_PREFIX}%s_{token}__\\n' DONE")
+        reason = wait_for_log_output(session.log_file_path, COMMAND_TIMEOUT_S, until_regex=f"{MARKER_PREFIX}DONE_{token}__", start_offset=start_offset)
+        return reason != WAIT_TIMEOUT
+
+    def _wait_for_prompt(self, session: PooledSession, start_offset: int):
+        """
+        Waits until the shell has reacted to an interrupt and gone quiet again. Input sent while readline
+        is still resetting after Ctrl+C loses its first bytes.
+        """
+        wait_for_log_output(session.log_file_path, PROMPT_TIMEOUT_S, until_regex=r"\S", start_offset=start_offset)
+        wait_for_log_output(session.log_file_path, PROMPT_TIMEOUT_S, idle_ms=PROMPT_IDLE_MS)
+
+    @staticmethod
+    def _log_size(session: PooledSession) -> int:
+        try:
+            return os.stat(session.log_file_path).st_size
+        except OSError:
+            return 0
+
+    def _close(self, session: PooledSession):
+        try:
+            self.backend.close_session(session.shell_id)
+        except Exception:
+            pass  # The shell already exited
+        if session.reader is not None:
+            session.reader.close()
+
+    def _maintain(self):
+        while True:
+            with self.condition:
+                if self.closed:
+                    return
+                missing = self.warm_size - len(self.idle) - self.starting
+                if missing <= 0:
+                    now = time.monotonic()
+                    expired = [session for session in self.idle[self.warm_size:] if now - session.idle_since >= self.idle_timeout_s]
+                    self.idle = [session for session in self.idle if session not in expired]
+                    if not expired:
+                        self.condition.wait(REAP_INTERVAL_S)
+                        continue
+                else:
+                    expired = []
+                    self.starting += 1
+            for session in expired:
+                self._close(session)
+            if expired:
+                continue
+            try:
+                session = self._start_session()
+            except Exception:
+                with self.condition:
+                    self.starting -= 1
+                    self.condition.wait(REAP_INTERVAL_S)  # Retry later instead of spinning on a broken backend
+                continue
+            with self.condition:
+                self.starting -= 1
+                self.idle.append(session)
+                self.condition.notify_all()
+
+    def acquire(self) -> str:
+        """
+        Leases a running shell, starting one directly if no warm shell is available, and returns the new
+        session's ID.
+        """
+        session, exited = None, []
+        with self.condition:
+            while self.idle:
+                candidate = self.idle.pop(0)
+                if self.backend.is_running(candidate.shell_id):
+                    session = candidate
+                    break
+                exited.append(candidate)
+            self.condition.notify_all()  # Wake the maintenance thread to refill
+        for candidate in exited:
+            self._close(candidate)
+        if session is None:
+            session = self._start_session()
+        session_id = new_session_id()
+        with self.condition:
+            self.in_use[session_id] = session
+        return session_id
+
+    def lease(self, session_id: str) -> PooledSession:
+        """
+        Returns the shell leased to session_id; raises KeyError for IDs that were released or never issued.
+        """
+        with self.condition:
+            session = self.in_use.get(session_id)
+        if session is None:
+            raise KeyError(f"Terminal session {session_id} is not open")
+        return session
+
+    def release(self, session_id: str, reset: bool = True):
+        """
+        Ends a session and returns its shell to the pool. With reset, running commands are interrupted and
+        the shell is reset once it is back at its prompt; shells that exited or fail to reset are closed.
+        """
+        with self.condition:
+            session = self.in_use.pop(session_id, None)
+        if session is None:
+            raise KeyError(f"Terminal session {session_id} is not open")
+        if not self.backend.is_running(session.shell_id):
+            self._close(session)
+            return
+        if reset:
+            start_offset = self._log_size(session)
+            self.backend.interrupt(session.shell_id)
+            self._wait_for_prompt(session, start_offset)
+            if not self._run_and_wait(session, self.reset_command):
+                self._close(session)
+                return
+        with self.condition:
+            session.idle_since = time.monotonic()
+            self.idle.insert(0, session)  # Most recently used first, so the oldest sessions are reaped
+            self.condition.notify_all()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            sessions = self.idle + list(self.in_use.values())
+            self.idle, self.in_use = [], {}
+            self.condition.notify_all()
+        for session in sessions:
+            self._close(session)
+
+
+_pools: Dict[Tuple[Any, ...], SessionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_session_pool(key: Tuple[Any, ...], create_backend: Callable[[], TerminalBackend], logs_dir: str, warm_size: int = 2, idle_timeout_s: float = 300) -> SessionPool:
+    """
+    Returns the process-wide pool for key (the container or execution backend the shells run in),
+    creating it with a backend from create_backend on first use or after the previous pool was closed.
+    Tools created per call share it, so they reuse its warm shells and can reach each other's sessions.
+    """
+    with _pools_lock:
+        for closed_key in [pool_key for pool_key, pool in _pools.items() if pool.closed]:
+            del _pools[closed_key]
+        pool = _pools.get(key)
+        if pool is None:
+            pool = SessionPool(create_backend(), logs_dir, warm_size, idle_timeout_s)
+            _pools[key] = pool
+        return pool
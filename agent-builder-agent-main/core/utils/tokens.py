@@ -0,0 +1,245 @@
+import json
+import math
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Context windows in tokens; matched on the exact name first, then on the longest known prefix
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-4o": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4-turbo-preview": 128000,
+    "gpt-4-vision-preview": 128000,
+    "gpt-4-32k": 32768,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+    "claude-3-opus": 200000,
+    "claude-3-sonnet": 200000,
+    "claude-3-haiku": 200000,
+    "claude-3-5-sonnet": 200000,
+    "llama3-70b-8192": 8192,
+    "llama3-8b-8192": 8192,
+    "mixtral-8x7b-32768": 32768,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+DEFAULT_COMPLETION_RESERVE = 4096  # Tokens kept free for the answer when max_tokens is not given
+MESSAGE_OVERHEAD_TOKENS = 4  # Role and separator tokens added per chat message
+TOOL_OUTPUT_TOKEN_LIMIT = 2000  # Tool outputs above this are cut to head and tail before older messages are dropped
+CHARS_PER_TOKEN = 3.5  # Conservative heuristic used when tiktoken is not installed
+
+
+class ContextWindowError(Exception):
+    """Raised when a prompt cannot be trimmed to fit the model's context window."""
+
+
+@dataclass
+class ContextTrimReport:
+    model: str
+    context_window: int
+    budget: int
+    tokens_before: int
+    tokens_after: int
+    dropped_messages: List[Dict[str, Any]] = field(default_factory=list)
+    truncated_messages: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def trimmed(self) -> bool:
+        return bool(self.dropped_messages or self.truncated_messages)
+
+    def summary(self) -> str:
+        return (f"Trimmed prompt for {self.model} from {self.tokens_before} to {self.tokens_after} tokens "
+                f"(budget {self.budget}): dropped {len(self.dropped_messages)} messages, "
+                f"truncated {len(self.truncated_messages)} messages")
+
+
+def get_context_window(model_name: str) -> int:
+    name = model_name.split("/")[-1].lower()
+    if name in MODEL_CONTEXT_WINDOWS:
+        return MODEL_CONTEXT_WINDOWS[name]
+    matches = [prefix for prefix in MODEL_CONTEXT_WINDOWS if name.startswith(prefix)]
+    if matches:
+        return MODEL_CONTEXT_WINDOWS[max(matches, key=len)]
+    return DEFAULT_CONTEXT_WINDOW
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=8192)
+def count_text_tokens(text: str) -> int:
+    """
+    Estimates the number of tokens in text. Results are cached per string, so messages that are resent
+    on every turn are only counted once.
+    """
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _content_text(content) -> str:
+    if content is None:
+        return ""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+    return str(content)
+
+
+def count_message_tokens(message: Dict[str, Any]) -> int:
+    tokens = MESSAGE_OVERHEAD_TOKENS + count_text_tokens(_content_text(message.get("content")))
+    if message.get("name"):
+        tokens += count_text_tokens(message["name"])
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call.get("function", {}) if isinstance(tool_call, dict) else getattr(tool_call, "function", None)
+        if isinstance(function, dict):
+            tokens += count_text_tokens(function.get("name", "")) + count_text_tokens(function.get("arguments", ""))
+        elif function is not None:
+            tokens += count_text_tokens(function.name or "") + count_text_tokens(function.arguments or "")
+    return tokens
+
+
+def count_messages_tokens(messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]] = None) -> int:
+    tokens = sum(count_message_tokens(message) for message in messages)
+    if tools:
+        tokens += count_text_tokens(json.dumps(tools, sort_keys=True))
+    return tokens
+
+
+def _truncate_text(text: str, max_tokens: int) -> str:
+    """
+    Keeps the head and the tail of text so that it fits roughly within max_tokens.
+    """
+    tokens = count_text_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    keep_chars = int(len(text) * max_tokens / tokens)
+    truncated = text
+    # The chars-per-token ratio varies across the text, so shrink until the estimate fits
+    for _ in range(5):
+        keep_chars = max(0, keep_chars - 64)
+        head = keep_chars * 2 // 3
+        tail = keep_chars - head
+        removed = len(text) - head - tail
+        truncated = f"{text[:head]}\n...[truncated {removed} characters]...\n{text[len(text) - tail:] if tail else ''}"
+        tokens = count_text_tokens(truncated)
+        if tokens <= max_tokens or keep_chars == 0:
+            break
+        keep_chars = int(keep_chars * max_tokens / tokens)
+    return truncated
+
+
+def _is_pinned(messages: List[Dict[str, Any]], index: int) -> bool:
+    message = messages[index]
+    return message.get("role") == "system" or bool(message.get("pinned")) or index == len(messages) - 1
+
+
+def _drop_group(messages: List[Dict[str, Any]], index: int) -> List[int]:
+    """
+    Returns the indices to drop together with messages[index]: an assistant message that issued tool calls
+    takes its tool results with it, so the remaining thread stays valid for the provider.
+    """
+    group = [index]
+    if messages[index].get("tool_calls"):
+        next_index = index + 1
+        while next_index < len(messages) and messages[next_index].get("role") == "tool":
+            group.append(next_index)
+            next_index += 1
+    return group
+
+
+def fit_messages_to_context(messages: List[Dict[str, Any]], model_name: str, max_tokens: Optional[int] = None, tools: Optional[List[Dict[str, Any]]] = None, budget_factor: float = 1.0) -> Tuple[List[Dict[str, Any]], ContextTrimReport]:
+    """
+    Trims messages so the prompt fits the model's context window, leaving room for the completion.
+    Policy, applied in order until the prompt fits:
+    1. Truncate tool outputs above TOOL_OUTPUT_TOKEN_LIMIT to their head and tail.
+    2. Drop the oldest messages that are not pinned. System messages, messages with "pinned": True
+       and the latest message are pinned.
+    3. Truncate the largest remaining non-system messages.
+    Raises ContextWindowError if the pinned system messages alone do not fit.
+    The "pinned" key is removed from the returned messages; the input list is not modified.
+    """
+    context_window = get_context_window(model_name)
+    reserve = max_tokens if max_tokens is not None else min(DEFAULT_COMPLETION_RESERVE, context_window // 4)
+    tools_tokens = count_messages_tokens([], tools)
+    budget = int(context_window * budget_factor) - reserve - tools_tokens
+    tokens_before = count_messages_tokens(messages)
+    report = ContextTrimReport(model_name, context_window, budget, tokens_before, tokens_before)
+
+    if tokens_before <= budget and not any("pinned" in message for message in messages):
+        return messages, report
+
+    working = [dict(message) for message in messages]
+    pinned = [_is_pinned(working, index) for index in range(len(working))]
+    for message in working:
+        message.pop("pinned", None)
+    sizes = [count_message_tokens(message) for message in working]
+    total = sum(sizes)
+
+    # 1. Truncate oversized tool outputs
+    if total > budget:
+        for index, message in enumerate(working):
+            if message.get("role") == "tool" and sizes[index] > TOOL_OUTPUT_TOKEN_LIMIT + MESSAGE_OVERHEAD_TOKENS:
+                message["content"] = _truncate_text(_content_text(message.get("content")), TOOL_OUTPUT_TOKEN_LIMIT)
+                new_size = count_message_tokens(message)
+                report.truncated_messages.append({"index": index, "role": "tool", "tokens_removed": sizes[index] - new_size})
+                total -= sizes[index] - new_size
+                sizes[index] = new_size
+
+    # 2. Drop the oldest non-pinned messages
+    dropped = set()
+    for index in range(len(working)):
+        if total <= budget:
+            break
+        if index in dropped or pinned[index]:
+            continue
+        group = [i for i in _drop_group(working, index) if not pinned[i]]
+        for i in group:
+            dropped.add(i)
+            total -= sizes[i]
+            report.dropped_messages.append({"index": i, "role": working[i].get("role"), "tokens": sizes[i]})
+    # Tool results whose assistant tool call was dropped are invalid on their own
+    for index, message in enumerate(working):
+        if message.get("role") == "tool" and index not in dropped and not pinned[index]:
+            previous = index - 1
+            while previous >= 0 and working[previous].get("role") == "tool":
+                previous -= 1
+            if previous < 0 or previous in dropped:
+                dropped.add(index)
+                total -= sizes[index]
+                report.dropped_messages.append({"index": index, "role": "tool", "tokens": sizes[index]})
+
+    # 3. Truncate the largest remaining non-system messages
+    remaining = [index for index in range(len(working)) if index not in dropped]
+    for index in sorted(remaining, key=lambda i: sizes[i], reverse=True):
+        if total <= budget:
+            break
+        if working[index].get("role") == "system":
+            continue
+        excess = total - budget
+        target = max(MESSAGE_OVERHEAD_TOKENS, sizes[index] - excess - MESSAGE_OVERHEAD_TOKENS)
+        working[index]["content"] = _truncate_text(_content_text(working[index].get("content")), target)
+        new_size = count_message_tokens(working[index])
+        report.truncated_messages.append({"index": index, "role": working[index].get("role"), "tokens_removed": sizes[index] - new_size})
+        total -= sizes[index] - new_size
+        sizes[index] = new_size
+
+    report.tokens_after = total
+    if total > budget:
+        raise ContextWindowError(f"Prompt needs {total} tokens but only {budget} fit into the context window of {model_name}")
+    return [message for index, message in enumerate(working) if index not in dropped], report
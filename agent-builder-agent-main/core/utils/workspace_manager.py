@@ -0,0 +1,267 @@
+import os
+import time
+import uuid
+import shutil
+import socket
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import docker
+
+from .workspace_utils import WORKSPACE_BUILD_DIR, get_docker_client
+
+logger = logging.getLogger(__name__)
+
+DEV_ENV_IMAGE = "workspace_dev-env"  # Tag docker-compose gives the image built from core/workspace
+WORKSPACES_ROOT = os.path.join(os.path.expanduser("~"), ".agent-builder", "workspaces")
+WORKSPACE_MOUNT = "/app"
+POOL_LABEL = "agent-builder.workspace-pool"
+OWNER_LABEL = "agent-builder.workspace-owner"  # hostname:pid of the process that created the container
+REFILL_RETRY_S = 5
+
+# Kills every process except PID 1 (the container's `sleep infinity`) and empties the workspace mount,
+# returning the container to the state it was created in as far as the session could change it
+RESET_SCRIPT = f"kill -9 -1 2>/dev/null; find {WORKSPACE_MOUNT} -mindepth 1 -delete && test -z \"$(ls -A {WORKSPACE_MOUNT})\""
+# Files the session created in the container belong to root, so the mount is emptied from inside before removal
+EMPTY_MOUNT_SCRIPT = f"find {WORKSPACE_MOUNT} -mindepth 1 -delete"
+
+
+class WorkspaceError(Exception):
+    pass
+
+
+@dataclass
+class Workspace:
+    container_id: str
+    name: str
+    host_path: str  # Host directory bind-mounted at WORKSPACE_MOUNT, what FilesTool edits
+    session_id: Optional[str] = None
+    idle_since: float = 0.0
+
+
+class WorkspaceManager:
+    """
+    Keeps warm_size dev-env containers running ahead of demand and leases one to each session, so
+    concurrent sessions neither share a container nor wait for one to start. Every container gets its
+    own host directory mounted at /app. On release the container is reset in place (processes killed,
+    workspace emptied) and returned to the pool; containers that fail to reset are replaced. One Docker
+    client is shared by the whole manager, and any client with the docker SDK's containers/images API
+    can be passed in.
+    """
+
+    def __init__(self, client=None, image: str = DEV_ENV_IMAGE, workspaces_root: str = WORKSPACES_ROOT, warm_size: int = 2, max_workspaces: int = 8, build_path: str = WORKSPACE_BUILD_DIR):
+        self.client = client or get_docker_client()
+        self.image = image
+        self.workspaces_root = workspaces_root
+        self.warm_size = warm_size
+        self.max_workspaces = max_workspaces
+        self.build_path = build_path
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.idle: List[Workspace] = []
+        self.in_use: Dict[str, Workspace] = {}
+        self.starting = 0
+        self.closed = False
+        self.condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """
+        Builds the image if it is missing, removes containers left behind by dead processes and starts
+        filling the pool in the background.
+        """
+        self.ensure_image()
+        self.remove_stale_containers()
+        with self.condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._maintain, name="WorkspaceManager", daemon=True)
+                self._thread.start()
+
+    def ensure_image(self):
+        try:
+            self.client.images.get(self.image)
+        except docker.errors.ImageNotFound:
+            self.client.images.build(path=self.build_path, tag=self.image, rm=True)
+
+    def remove_stale_containers(self) -> int:
+        """
+        Removes pool containers created on this host by processes that are no longer running.
+        """
+        removed = 0
+        hostname = socket.gethostname()
+        for container in self.client.containers.list(all=True, filters={"label": POOL_LABEL}):
+            owner_host, _, owner_pid = container.labels.get(OWNER_LABEL, "").partition(":")
+            if owner_host != hostname or not owner_pid.isdigit() or _pid_alive(int(owner_pid)):
+                continue
+            try:
+                container.remove(force=True)
+                removed += 1
+            except docker.errors.APIError:
+                pass
+        return removed
+
+    def _total(self) -> int:
+        return len(self.idle) + len(self.in_use) + self.starting
+
+    def _create(self) -> Workspace:
+        name = f"dev-env-{uuid.uuid4().hex[:8]}"
+        host_path = os.path.join(self.workspaces_root, name)
+        os.makedirs(host_path, exist_ok=True)
+        try:
+            container = self.client.containers.run(
+                self.image,
+                command=["sleep", "infinity"],
+                name=name,
+                detach=True,
+                tty=True,
+                stdin_open=True,
+                working_dir=WORKSPACE_MOUNT,
+                volumes={host_path: {"bind": WORKSPACE_MOUNT, "mode": "rw"}},
+                labels={POOL_LABEL: "1", OWNER_LABEL: self.owner},
+            )
+        except Exception:
+            shutil.rmtree(host_path, ignore_errors=True)
+            raise
+        return Workspace(container.id, name, host_path, idle_since=time.monotonic())
+
+    def _discard(self, workspace: Workspace):
+        try:
+            container = self.client.containers.get(workspace.container_id)
+            if container.status == "running":
+                container.exec_run(["/bin/bash", "-c", EMPTY_MOUNT_SCRIPT])
+            container.remove(force=True)
+        except docker.errors.NotFound:
+            pass
+        except docker.errors.APIError:
+            pass  # Left for remove_stale_containers once this process exits
+        shutil.rmtree(workspace.host_path, onerror=_log_removal_error)
+
+    def _maintain(self):
+        while True:
+            with self.condition:
+                while not self.closed and (len(self.idle) + self.starting >= self.warm_size or self._total() >= self.max_workspaces):
+                    self.condition.wait()
+                if self.closed:
+                    return
+                self.starting += 1
+            try:
+                workspace = self._create()
+            except Exception:
+                workspace = None
+            with self.condition:
+                self.starting -= 1
+                if workspace is not None:
+                    self.idle.append(workspace)
+                self.condition.notify_all()
+                if workspace is None:
+                    self.condition.wait(REFILL_RETRY_S)  # Retry later instead of spinning on a broken daemon
+
+    def acquire(self, session_id: str, timeout_s: float = 120) -> Workspace:
+        """
+        Leases a running workspace to session_id. Creates one directly if none is warm and the pool is
+        below max_workspaces, otherwise waits up to timeout_s for one to be released.
+        """
+        deadline = time.monotonic() + timeout_s
+        with self.condition:
+            if session_id in self.in_use:
+                return self.in_use[session_id]
+            while True:
+                if self.idle:
+                    workspace = self.idle.pop(0)
+                    break
+                if self._total() < self.max_workspaces:
+                    workspace = None
+                    self.starting += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self.closed:
+                    raise WorkspaceError(f"No workspace available within {timeout_s} seconds ({self.max_workspaces} in use)")
+                self.condition.wait(remaining)
+        if workspace is None:
+            try:
+                workspace = self._create()
+            finally:
+                with self.condition:
+                    self.starting -= 1
+        with self.condition:
+            workspace.session_id = session_id
+            self.in_use[session_id] = workspace
+            self.condition.notify_all()  # The maintenance thread refills the warm pool
+        return workspace
+
+    def reset(self, workspace: Workspace) -> bool:
+        """
+        Kills the processes the session started and empties its workspace. Returns False if the container
+        could not be reset and has to be replaced.
+        """
+        try:
+            container = self.client.containers.get(workspace.container_id)
+            if container.status != "running":
+                return False
+            exit_code, _ = container.exec_run(["/bin/bash", "-c", RESET_SCRIPT])
+            return exit_code == 0
+        except docker.errors.APIError:
+            return False
+
+    def release(self, session_id: str, reset: bool = True):
+        """
+        Returns the session's workspace to the pool after resetting it. Without reset, or if the reset
+        fails, the container is removed instead and the pool creates a fresh one.
+        """
+        with self.condition:
+            workspace = self.in_use.pop(session_id, None)
+        if workspace is None:
+            raise KeyError(f"No workspace is leased to session {session_id}")
+        reusable = reset and not self.closed and self.reset(workspace)
+        if not reusable:
+            self._discard(workspace)
+        with self.condition:
+            if reusable:
+                workspace.session_id = None
+                workspace.idle_since = time.monotonic()
+                self.idle.append(workspace)
+            self.condition.notify_all()
+
+    def close(self):
+        """
+        Removes every container of the pool, including leased ones.
+        """
+        with self.condition:
+            self.closed = True
+            workspaces = self.idle + list(self.in_use.values())
+            self.idle, self.in_use = [], {}
+            self.condition.notify_all()
+        for workspace in workspaces:
+            self._discard(workspace)
+
+
+def _log_removal_error(function, path, exc_info):
+    if not isinstance(exc_info[1], FileNotFoundError):
+        logger.warning(f"Could not remove workspace path {path}: {exc_info[1]}")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+_workspace_manager: Optional[WorkspaceManager] = None
+_workspace_manager_lock = threading.Lock()
+
+
+def get_workspace_manager() -> WorkspaceManager:
+    """
+    Returns the process-wide WorkspaceManager, starting it on first use.
+    """
+    global _workspace_manager
+    with _workspace_manager_lock:
+        if _workspace_manager is None:
+            _workspace_manager = WorkspaceManager()
+            _workspace_manager.start()
+        return _workspace_manager
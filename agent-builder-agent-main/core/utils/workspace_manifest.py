@@ -0,0 +1,336 @@
+import os
+import json
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Iterator, Tuple
+
+from .file_utils import ExclusionMatcher, get_exclusion_matcher, iter_files, release_exclusion_matchers
+from .file_reader import read_files, hash_bytes, MAX_FILE_BYTES, MAX_TOTAL_BYTES, SKIP_TOTAL_CAP
+
+MANIFEST_DIR = ".kortix"
+MANIFEST_FILE = "manifest.json"
+WATCH_DEPTH = 1000  # Depth used when the whole tree is tracked by a watcher
+SAVE_DELAY_S = 2.0  # Saves after incremental refreshes are coalesced over this window
+
+
+def count_lines(text: str) -> int:
+    return text.count("\n") + (1 if text and not text.endswith("\n") else 0)
+
+
+@dataclass
+class ManifestEntry:
+    size: int
+    mtime_ns: int
+    inode: int
+    hash: str
+    skip_reason: Optional[str] = None  # Why the contents are not cached: binary, too_large or total_cap
+    line_count: Optional[int] = None  # Known once the text has been decoded
+
+    def same_stat(self, stat: os.stat_result) -> bool:
+        return self.size == stat.st_size and self.mtime_ns == stat.st_mtime_ns and self.inode == stat.st_ino
+
+
+@dataclass
+class ScanDelta:
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        return {"added": self.added, "changed": self.changed, "removed": self.removed}
+
+
+class DeferredSave:
+    """
+    Runs save at most once per delay_s, however often it is requested. Persisting a whole index after
+    every changed file would cost O(workspace) per change. The files saved this way are caches, so a save
+    lost at exit only means some files are re-read once.
+    """
+
+    def __init__(self, save: Callable[[], None], delay_s: float = SAVE_DELAY_S):
+        self.save = save
+        self.delay_s = delay_s
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def request(self):
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.delay_s, self._run)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def cancel(self):
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+
+    def _run(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.save()
+        except OSError:
+            pass  # The workspace was removed
+
+
+def walk_workspace_files(root: str, start: str, depth: int, matcher: Optional[ExclusionMatcher] = None) -> Iterator[Tuple[str, os.stat_result]]:
+    """
+    Yields (path relative to root, stat) for every included file under start, applying the exclusions
+    from file_utils.py and the depth semantics of FilesTool.read_directory_contents, which also reads the
+    files one directory level deeper than find_files does.
+    """
+    return iter_files(root, depth + 1, matcher or get_exclusion_matcher(root), with_stat=True, start_path=start)
+
+
+class WorkspaceManifest:
+    """
+    Persisted manifest of (path, size, mtime_ns, inode, hash) for the files under a workspace root.
+    A scan stats every file but only re-reads files whose stat changed, so rescanning an unchanged tree
+    costs no file reads. Decoded text contents are cached in memory alongside the manifest; changed files
+    are read in parallel, binaries and files over max_file_bytes are only hashed, and no more than
+    max_total_bytes of contents are cached.
+    """
+
+    def __init__(self, root: str, manifest_path: Optional[str] = None, use_gitignore: bool = False, max_file_bytes: int = MAX_FILE_BYTES, max_total_bytes: int = MAX_TOTAL_BYTES):
+        self.root = os.path.realpath(root)
+        self.matcher = get_exclusion_matcher(self.root, use_gitignore)
+        self.manifest_path = manifest_path or os.path.join(self.root, MANIFEST_DIR, MANIFEST_FILE)
+        self.max_file_bytes = max_file_bytes
+        self.max_total_bytes = max_total_bytes
+        self.entries: Dict[str, ManifestEntry] = {}
+        self.contents: Dict[str, str] = {}
+        self.content_bytes = 0  # On-disk size of the files whose contents are cached
+        self._content_sizes: Dict[str, int] = {}
+        self.lock = threading.RLock()
+        self.watcher = None  # A running WorkspaceWatcher keeps the manifest current without scans
+        self.deferred_save = DeferredSave(self.save)
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.manifest_path, "r") as manifest_file:
+                data = json.load(manifest_file)
+            self.entries = {path: ManifestEntry(**entry) for path, entry in data.get("entries", {}).items()}
+        except (OSError, ValueError, TypeError):
+            self.entries = {}
+
+    def close(self):
+        """
+        Stops the watcher and drops a pending save, so nothing writes to the workspace afterwards.
+        """
+        with self.lock:
+            watcher, self.watcher = self.watcher, None
+        if watcher is not None:
+            watcher.stop()
+        self.deferred_save.cancel()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        temp_path = f"{self.manifest_path}.tmp"
+        with self.lock:
+            # Shallow dicts instead of dataclasses.asdict, which deep-copies every entry
+            data = {"root": self.root, "entries": {path: dict(vars(entry)) for path, entry in self.entries.items()}}
+        with open(temp_path, "w") as manifest_file:
+            json.dump(data, manifest_file)
+        os.replace(temp_path, self.manifest_path)
+
+    def seed_contents(self, contents: Dict[str, str]):
+        """
+        Adopts previously read contents (e.g. from working memory) for entries whose hash still matches,
+        so a fresh process does not have to re-read unchanged files.
+        """
+        with self.lock:
+            for path, text in contents.items():
+                entry = self.entries.get(path)
+                if entry and path not in self.contents and isinstance(text, str) and self.content_bytes + entry.size <= self.max_total_bytes and hash_bytes(text.encode("utf-8")) == entry.hash:
+                    self._cache_contents(path, text, entry.size)
+                    entry.skip_reason = None
+
+    def _cache_contents(self, path: str, text: str, size: int):
+        self._drop_contents(path)
+        self.entries[path].line_count = count_lines(text)
+        self.contents[path] = text
+        self._content_sizes[path] = size
+        self.content_bytes += size
+
+    def _drop_contents(self, path: str):
+        self.content_bytes -= self._content_sizes.pop(path, 0)
+        self.contents.pop(path, None)
+
+    def _remove(self, path: str):
+        del self.entries[path]
+        self._drop_contents(path)
+
+    def _is_current(self, path: str, stat: os.stat_result) -> bool:
+        """
+        An entry is current when its stat is unchanged and its contents are cached, or were skipped
+        for a reason that still holds.
+        """
+        entry = self.entries.get(path)
+        if entry is None or not entry.same_stat(stat):
+            return False
+        if path in self.contents or entry.skip_reason is None:
+            return path in self.contents
+        return entry.skip_reason != SKIP_TOTAL_CAP or self.content_bytes + entry.size > self.max_total_bytes
+
+    def _update(self, candidates, delta: ScanDelta) -> List[str]:
+        """
+        Re-reads the candidate (path, stat) pairs that are not current, in parallel, and records the delta.
+        Returns every candidate path.
+        """
+        seen, to_read = [], []
+        for path, stat in candidates:
+            seen.append(path)
+            if self._is_current(path, stat):
+                delta.unchanged += 1
+            else:
+                to_read.append((path, stat))
+        if not to_read:
+            return seen
+        for path, _ in to_read:
+            # Contents that are about to be re-read no longer count against the total cap
+            self._drop_contents(path)
+        results = read_files(self.root, [(path, stat.st_size) for path, stat in to_read], self.max_file_bytes, self.max_total_bytes - self.content_bytes)
+        for path, stat in to_read:
+            result = results[path]
+            if result.error is not None:
+                continue
+            entry = self.entries.get(path)
+            self.entries[path] = ManifestEntry(stat.st_size, stat.st_mtime_ns, stat.st_ino, result.hash, result.skip_reason, entry.line_count if entry and entry.hash == result.hash else None)
+            if result.text is not None:
+                self._cache_contents(path, result.text, stat.st_size)
+            if entry is None:
+                delta.added.append(path)
+            elif entry.hash != result.hash:
+                delta.changed.append(path)
+            else:
+                delta.unchanged += 1
+        return seen
+
+    def _in_scope(self, path: str, start_rel: str, depth: int) -> bool:
+        if start_rel not in ("", "."):
+            if not path.startswith(start_rel + os.sep):
+                return False
+            path = path[len(start_rel) + 1:]
+        return os.path.dirname(path).count(os.sep) <= depth
+
+    def scan(self, start: Optional[str] = None, depth: int = 3) -> ScanDelta:
+        """
+        Rescans the files under start (an absolute path inside root, defaults to root) up to depth and
+        returns which entries were added, changed or removed since the last scan.
+        """
+        start = os.path.realpath(start or self.root)
+        start_rel = os.path.relpath(start, self.root)
+        delta = ScanDelta()
+        with self.lock:
+            # .gitignore files may have changed since the last scan
+            self.matcher.clear_cache()
+            seen = set(self._update(walk_workspace_files(self.root, start, depth, self.matcher), delta))
+            for path in list(self.entries):
+                if path not in seen and self._in_scope(path, start_rel, depth):
+                    self._remove(path)
+                    delta.removed.append(path)
+        if delta.has_changes:
+            self.save()
+        return delta
+
+    def refresh_paths(self, paths) -> ScanDelta:
+        """
+        Brings the given paths (relative to root) up to date without walking the rest of the tree.
+        Missing paths drop their entry and everything below them; directories are walked in full.
+        """
+        delta = ScanDelta()
+        with self.lock:
+            if any(os.path.basename(path) == ".gitignore" for path in paths):
+                self.matcher.clear_cache()
+            for path in sorted(set(paths)):
+                absolute_path = os.path.join(self.root, path)
+                if os.path.isdir(absolute_path):
+                    if self.matcher.is_excluded_dir(absolute_path):
+                        continue
+                    candidates = walk_workspace_files(self.root, absolute_path, WATCH_DEPTH, self.matcher)
+                else:
+                    candidates = []
+                    if os.path.isfile(absolute_path) and not self.matcher.is_excluded_file(absolute_path):
+                        try:
+                            candidates = [(path, os.stat(absolute_path))]
+                        except OSError:
+                            candidates = []
+                    if not candidates:
+                        for existing in [p for p in self.entries if p == path or p.startswith(path + os.sep)]:
+                            self._remove(existing)
+                            delta.removed.append(existing)
+                self._update(candidates, delta)
+        if delta.has_changes:
+            self.deferred_save.request()
+        return delta
+
+    def get_listing(self, start: Optional[str] = None, depth: int = 3) -> List[Dict[str, object]]:
+        """
+        Returns the manifest entries in scope as [{path relative to start, size, hash, lines, skipped}], without contents.
+        """
+        start = os.path.realpath(start or self.root)
+        start_rel = os.path.relpath(start, self.root)
+        with self.lock:
+            return [
+                {
+                    "path": os.path.relpath(os.path.join(self.root, path), start),
+                    "size": entry.size,
+                    "hash": entry.hash,
+                    "lines": entry.line_count,
+                    **({"skipped": entry.skip_reason} if entry.skip_reason else {}),
+                }
+                for path, entry in sorted(self.entries.items())
+                if self._in_scope(path, start_rel, depth)
+            ]
+
+    def get_contents(self, start: Optional[str] = None, depth: int = 3) -> Dict[str, str]:
+        """
+        Returns {path relative to start: text} for the cached text files in scope.
+        """
+        start = os.path.realpath(start or self.root)
+        start_rel = os.path.relpath(start, self.root)
+        with self.lock:
+            return {
+                os.path.relpath(os.path.join(self.root, path), start): self.contents[path]
+                for path in sorted(self.entries)
+                if path in self.contents and self._in_scope(path, start_rel, depth)
+            }
+
+
+_manifests: Dict[str, WorkspaceManifest] = {}
+_manifests_lock = threading.Lock()
+
+
+def get_workspace_manifest(root: str, use_gitignore: bool = False) -> WorkspaceManifest:
+    """
+    Returns the process-wide manifest for root, so every FilesTool instance shares one cache.
+    """
+    key = os.path.realpath(root)
+    with _manifests_lock:
+        if key not in _manifests:
+            _manifests[key] = WorkspaceManifest(key, use_gitignore=use_gitignore)
+        elif _manifests[key].matcher.use_gitignore != use_gitignore:
+            _manifests[key].matcher = get_exclusion_matcher(key, use_gitignore)
+        return _manifests[key]
+
+
+def release_workspace_manifest(root: str):
+    """
+    Closes the manifest of root and drops it and root's exclusion matchers from the process-wide caches,
+    e.g. before a session's workspace is removed.
+    """
+    key = os.path.realpath(root)
+    with _manifests_lock:
+        manifest = _manifests.pop(key, None)
+    if manifest is not None:
+        manifest.close()
+    release_exclusion_matchers(key)
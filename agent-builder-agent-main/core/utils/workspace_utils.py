@@ -2,16 +2,42 @@
 
 import subprocess
 import os
+import threading
 import docker
 
+WORKSPACE_BUILD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "workspace")  # docker-compose.yml and Dockerfile of the dev-env
+
+_docker_client = None
+_docker_client_lock = threading.Lock()
+
+
+def get_docker_client():
+    """
+    Returns the process-wide Docker client. Clients hold a connection pool, so they are created once
+    instead of per call.
+    """
+    global _docker_client
+    with _docker_client_lock:
+        if _docker_client is None:
+            _docker_client = docker.from_env()
+        return _docker_client
+
+
+def set_docker_client(client):
+    """
+    Replaces the process-wide Docker client, e.g. with an in-memory fake in tests.
+    """
+    global _docker_client
+    with _docker_client_lock:
+        _docker_client = client
+
+
 def initialise_workspace():
     """
     Initialises the workspace by running docker-compose up in detached mode from the specified workspace directory.
     """
-    workspace_dir = "../workspace"
-    os.chdir(workspace_dir)
     try:
-        subprocess.run("docker-compose up --build -d", shell=True, check=True)
+        subprocess.run(["docker-compose", "up", "--build", "-d"], cwd=WORKSPACE_BUILD_DIR, check=True)
         print("Workspace initialised successfully.")
     except subprocess.CalledProcessError as e:
         print(f"Failed to initialise workspace: {e}")
@@ -19,17 +45,16 @@ def initialise_workspace():
 
 def get_docker_container_id(image_name):
     """
-    Retrieves the Docker container ID for a given image name.
+    Retrieves the ID of the running Docker container whose name matches image_name.
     """
     try:
-        # container_id = subprocess.check_output(f'docker ps -aqf "name={image_name}"', shell=True).decode('utf-8').strip()
-        container_id = "cf76dddca6cd"
-        if container_id:
-            return container_id
+        containers = get_docker_client().containers.list(filters={"name": image_name})
+        if containers:
+            return containers[0].id
         else:
             print("No running container found for the specified image.")
             return None
-    except subprocess.CalledProcessError as e:
+    except docker.errors.DockerException as e:
         print(f"Failed to get Docker container ID: {e}")
         return None
     
@@ -38,8 +63,7 @@ def get_docker_container_id(image_name):
 
 def get_container_merged_dir(container_id: str):
     fallback = os.path.expanduser(f"~/OrbStack/docker/containers/{container_id}")
-    client = docker.from_env()
-    container = client.containers.get(container_id)
+    container = get_docker_client().containers.get(container_id)
     container_info = container.attrs
     merged_dir = container_info["GraphDriver"]["Data"]["MergedDir"]
     if os.path.exists(merged_dir):
@@ -0,0 +1,221 @@
+import os
+import sys
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional, Set
+
+from .file_utils import ExclusionMatcher, get_exclusion_matcher
+
+logger = logging.getLogger(__name__)
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+_EVENT_HEADER = struct.Struct("iIII")
+
+_libc = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        _libc = libc
+    return _libc
+
+
+def inotify_available() -> bool:
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        return hasattr(_load_libc(), "inotify_init1")
+    except OSError:
+        return False
+
+
+class WorkspaceWatcher:
+    """
+    Watches a workspace tree with inotify and reports changed paths (relative to root) in debounced batches.
+    Directories excluded by file_utils.py are never watched. A burst of events (e.g. npm install) is
+    delivered as one batch once the tree has been quiet for debounce_ms, or at the latest after max_delay_ms.
+    on_change(paths, full_rescan) receives full_rescan=True when the kernel queue overflowed and events were lost.
+    """
+
+    def __init__(self, root: str, on_change: Callable[[Set[str], bool], None], debounce_ms: int = 200, max_delay_ms: int = 2000, matcher: Optional[ExclusionMatcher] = None):
+        self.root = os.path.realpath(root)
+        self.matcher = matcher or get_exclusion_matcher(self.root)
+        self.on_change = on_change
+        self.debounce_s = debounce_ms / 1000
+        self.max_delay_s = max_delay_ms / 1000
+        self._fd: Optional[int] = None
+        self._watches: Dict[int, str] = {}  # watch descriptor -> directory relative to root
+        self._pending: Set[str] = set()
+        self._full_rescan = False
+        self._first_event_at: Optional[float] = None
+        self._last_event_at: Optional[float] = None
+        self._lock = threading.RLock()  # Serialises event reads and flushes between the watcher thread and flush()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        if not inotify_available():
+            raise RuntimeError("inotify is not available on this platform")
+        fd = _load_libc().inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._fd = fd
+        self._stop.clear()
+        self._add_tree(self.root)
+        self._thread = threading.Thread(target=self._run, name=f"WorkspaceWatcher({self.root})", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            self._watches.clear()
+
+    def flush(self):
+        """
+        Delivers pending changes now, including events still queued in the kernel, instead of waiting for
+        the debounce. Lets a reader that needs the manifest current catch up on just the changed paths.
+        """
+        with self._lock:
+            if self._fd is None:
+                return
+            while self._read_events():
+                pass
+            if self._pending or self._full_rescan:
+                self._flush()
+
+    def _add_watch(self, directory: str) -> bool:
+        wd = _load_libc().inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error == errno.ENOSPC:
+                logger.warning("inotify watch limit reached; raise fs.inotify.max_user_watches")
+            return False
+        self._watches[wd] = os.path.relpath(directory, self.root)
+        return True
+
+    def _add_tree(self, directory: str):
+        for current_root, dirs, _ in os.walk(directory):
+            if not self._add_watch(current_root):
+                dirs[:] = []
+                continue
+            dirs[:] = [d for d in dirs if not self.matcher.is_excluded_dir(os.path.join(current_root, d))]
+
+    def _remove_tree(self, directory: str):
+        for wd, watched in list(self._watches.items()):
+            if watched == directory or watched.startswith(directory + os.sep):
+                _load_libc().inotify_rm_watch(self._fd, wd)
+                del self._watches[wd]
+
+    def _run(self):
+        poll = select.poll()
+        poll.register(self._fd, select.POLLIN)
+        while not self._stop.is_set():
+            timeout_ms = 500
+            with self._lock:
+                if self._pending or self._full_rescan:
+                    now = time.monotonic()
+                    flush_at = min(self._last_event_at + self.debounce_s, self._first_event_at + self.max_delay_s)
+                    timeout_ms = max(0, int((flush_at - now) * 1000))
+            ready = poll.poll(timeout_ms)
+            with self._lock:
+                if ready:
+                    self._read_events()
+                    # Under a continuous stream of events the poll never times out, so max_delay_ms is enforced here
+                    if self._first_event_at is not None and time.monotonic() >= self._first_event_at + self.max_delay_s:
+                        self._flush()
+                elif self._pending or self._full_rescan:
+                    self._flush()
+
+    def _read_events(self) -> bool:
+        """
+        Reads one buffer of queued events; returns False when there were none.
+        """
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        now = time.monotonic()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            wd, mask, _, name_length = _EVENT_HEADER.unpack_from(buffer, offset)
+            name = buffer[offset + _EVENT_HEADER.size: offset + _EVENT_HEADER.size + name_length].rstrip(b"\0")
+            offset += _EVENT_HEADER.size + name_length
+            self._handle_event(wd, mask, os.fsdecode(name))
+        if self._pending or self._full_rescan:
+            self._first_event_at = self._first_event_at or now
+            self._last_event_at = now
+        return True
+
+    def _handle_event(self, wd: int, mask: int, name: str):
+        if mask & IN_Q_OVERFLOW:
+            self._full_rescan = True
+            return
+        directory = self._watches.get(wd)
+        if directory is None:
+            return
+        if mask & IN_IGNORED:
+            del self._watches[wd]
+            return
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            self._pending.add("" if directory == "." else directory)
+            return
+        path = os.path.normpath(os.path.join(directory, name))
+        absolute_path = os.path.join(self.root, path)
+        if mask & IN_ISDIR:
+            if self.matcher.is_excluded_dir(absolute_path):
+                return
+            if mask & IN_MOVED_FROM:
+                self._remove_tree(path)
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                # Files may already exist in the new directory before its watch is in place
+                self._add_tree(absolute_path)
+        self._pending.add(path)
+
+    def _flush(self):
+        paths, full_rescan = self._pending, self._full_rescan
+        self._pending, self._full_rescan = set(), False
+        self._first_event_at = self._last_event_at = None
+        try:
+            self.on_change(paths, full_rescan)
+        except Exception as e:
+            logger.error(f"Workspace watcher callback failed: {e}")
@@ -0,0 +1,96 @@
+import os
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+import docker
+
+from core.utils.workspace_manager import DEV_ENV_IMAGE
+
+
+class _FakeContainer:
+    def __init__(self, client: "FakeDockerClient", image: str, name: str, labels: Dict[str, str], volumes: Dict[str, Dict[str, str]]):
+        self.client = client
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.image = image
+        self.labels = labels
+        self.volumes = volumes
+        self.status = "running"
+        self.exec_calls: List[Any] = []
+        self.attrs = {"Id": self.id, "Name": f"/{name}", "GraphDriver": {"Data": {"MergedDir": os.path.join(client.root, self.id, "merged")}}}
+
+    def exec_run(self, cmd, **kwargs):
+        self.exec_calls.append(cmd)
+        return self.client.exec_handler(self, cmd)
+
+    def remove(self, force: bool = False):
+        if self.status == "running" and not force:
+            raise docker.errors.APIError(f"Container {self.name} is running")
+        self.client._containers.pop(self.id, None)
+        self.status = "removed"
+
+
+class _FakeContainers:
+    def __init__(self, client: "FakeDockerClient"):
+        self.client = client
+
+    def run(self, image, command=None, name=None, detach=False, labels=None, volumes=None, **kwargs):
+        if image not in self.client.images.tags:
+            raise docker.errors.ImageNotFound(f"No such image: {image}")
+        if self.client.fail_runs > 0:
+            self.client.fail_runs -= 1
+            raise docker.errors.APIError("Injected container start failure")
+        time.sleep(self.client.start_delay_s)
+        container = _FakeContainer(self.client, image, name or uuid.uuid4().hex[:12], dict(labels or {}), dict(volumes or {}))
+        self.client._containers[container.id] = container
+        return container
+
+    def get(self, container_id):
+        for container in self.client._containers.values():
+            if container_id in (container.id, container.name):
+                return container
+        raise docker.errors.NotFound(f"No such container: {container_id}")
+
+    def list(self, all=False, filters=None):
+        filters = filters or {}
+        containers = [container for container in self.client._containers.values() if all or container.status == "running"]
+        if "name" in filters:
+            containers = [container for container in containers if filters["name"] in container.name]
+        if "label" in filters:
+            key, _, value = filters["label"].partition("=")
+            containers = [container for container in containers if key in container.labels and (not value or container.labels[key] == value)]
+        return containers
+
+
+class _FakeImages:
+    def __init__(self, tags: List[str]):
+        self.tags = set(tags)
+        self.builds = 0
+
+    def get(self, tag):
+        if tag not in self.tags:
+            raise docker.errors.ImageNotFound(f"No such image: {tag}")
+        return tag
+
+    def build(self, path=None, tag=None, **kwargs):
+        self.builds += 1
+        self.tags.add(tag)
+        return tag, []
+
+
+class FakeDockerClient:
+    """
+    In-memory stand-in for docker.DockerClient covering what WorkspaceManager and workspace_utils use,
+    so the pool can be exercised without a Docker daemon. exec_handler decides exec_run results; by
+    default every command succeeds. start_delay_s and fail_runs simulate slow and failing starts.
+    """
+
+    def __init__(self, images: Optional[List[str]] = None, start_delay_s: float = 0.0, exec_handler: Optional[Callable[[Any, Any], Any]] = None, root: str = "/var/lib/docker/fake"):
+        self.root = root
+        self.start_delay_s = start_delay_s
+        self.fail_runs = 0
+        self.exec_handler = exec_handler or (lambda container, cmd: (0, b""))
+        self._containers: Dict[str, _FakeContainer] = {}
+        self.containers = _FakeContainers(self)
+        self.images = _FakeImages(images if images is not None else [DEV_ENV_IMAGE])
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from core.units import terminal_tool
+from core.units.terminal_tool import AsyncTerminalTool
+from core.units.working_memory import WorkingMemory
+from core.utils.execution_backends import LocalProcessExecutionBackend, ResourceLimits
+
+
+@pytest.fixture
+def tool(tmp_path, monkeypatch):
+    monkeypatch.setattr(terminal_tool, "WorkingMemory", lambda: WorkingMemory(db_path=str(tmp_path / "working_memory.db")))
+    backend = LocalProcessExecutionBackend(limits=ResourceLimits(open_files=256))
+    tool = AsyncTerminalTool(execution_backend=backend)
+    yield tool
+    tool.close()
+    backend.close()
+
+
+def test_async_run_command(tool):
+    async def scenario():
+        session_id = await tool.new_terminal_session()
+        first = await tool.run_command(session_id, "cd /tmp && echo hello; echo oops >&2; (exit 2)")
+        second = await tool.run_command(session_id, "pwd")
+        interrupted = await tool.run_command(session_id, "echo started; sleep 30", timeout=1)
+        return first, second, interrupted
+
+    first, second, interrupted = asyncio.run(scenario())
+
+    assert first.success and second.success and interrupted.success
+    first, second, interrupted = (json.loads(result.output) for result in (first, second, interrupted))
+    assert (first["exit_code"], first["stdout"], first["stderr"]) == (2, "hello", "oops")
+    assert second["stdout"] == "/tmp"
+    assert interrupted["timed_out"] and interrupted["exit_code"] == 130 and interrupted["stdout"] == "started"
+
+
+def test_async_observe_returns_when_the_regex_matches(tool):
+    async def scenario():
+        session_id = await tool.new_terminal_session()
+        await tool.send_terminal_command(session_id, "sleep 0.3; echo build finished in $((1 + 1))s")
+        started = time.monotonic()
+        logs = await tool.observe_terminal_session(session_id, 5, 10, until_regex=r"finished in 2s")
+        return logs, time.monotonic() - started
+
+    logs, elapsed = asyncio.run(scenario())
+
+    assert "build finished in 2s" in logs
+    assert 0.2 <= elapsed < 5
+
+
+def test_concurrent_observations_do_not_block_each_other(tool):
+    async def scenario():
+        first, second = await asyncio.gather(tool.new_terminal_session(), tool.new_terminal_session())
+        started = time.monotonic()
+        await asyncio.gather(
+            tool.observe_terminal_session(first, 0, 1, idle_ms=5000),
+            tool.observe_terminal_session(second, 0, 1, idle_ms=5000),
+            tool.run_command(second, "echo meanwhile"),
+        )
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) < 1.8
@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+from core.utils.checkpoints import CheckpointError, CheckpointStore
+from core.utils.workspace_manifest import WorkspaceManifest
+
+
+def write(root, relative_path, content):
+    path = os.path.join(root, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def read(root, relative_path):
+    with open(os.path.join(root, relative_path)) as f:
+        return f.read()
+
+
+def blobs(store):
+    return sorted(os.path.join(directory, name) for directory, _, names in os.walk(store.objects_dir) for name in names)
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    root = str(tmp_path / "workspace")
+    write(root, "main.py", "print('v1')\n")
+    write(root, "lib/util.py", "VALUE = 1\n")
+    write(root, "node_modules/pkg/index.js", "module.exports = 1\n")
+    return root
+
+
+@pytest.fixture
+def store(workspace):
+    return CheckpointStore(WorkspaceManifest(workspace))
+
+
+def test_restore_rewrites_changed_files_and_removes_new_ones(workspace, store):
+    os.chmod(os.path.join(workspace, "main.py"), 0o755)
+    checkpoint = store.create("v1")
+    write(workspace, "main.py", "print('v2')\n")
+    write(workspace, "lib/new.py", "NEW = True\n")
+    os.remove(os.path.join(workspace, "lib/util.py"))
+    write(workspace, "node_modules/pkg/index.js", "module.exports = 2\n")
+
+    changes = store.restore(checkpoint.id)
+
+    assert changes == {"restored": ["lib/util.py", "main.py"], "removed": ["lib/new.py"]}
+    assert read(workspace, "main.py") == "print('v1')\n"
+    assert read(workspace, "lib/util.py") == "VALUE = 1\n"
+    assert not os.path.exists(os.path.join(workspace, "lib/new.py"))
+    assert os.stat(os.path.join(workspace, "main.py")).st_mode & 0o777 == 0o755
+    assert read(workspace, "node_modules/pkg/index.js") == "module.exports = 2\n"  # Excluded paths are never touched
+
+
+def test_restore_of_an_unchanged_tree_rewrites_nothing(workspace, store):
+    checkpoint = store.create()
+
+    assert store.restore(checkpoint.id) == {"restored": [], "removed": []}
+
+
+def test_unchanged_content_is_stored_once(workspace, store):
+    store.create("first")
+    stored = blobs(store)
+    write(workspace, "copy.py", "VALUE = 1\n")  # Same content as lib/util.py
+
+    second = store.create("second")
+
+    assert len(stored) == 2
+    assert blobs(store) == stored
+    assert second.files["copy.py"] == second.files["lib/util.py"]
+    assert [checkpoint.label for checkpoint in store.list()] == ["first", "second"]
+
+
+def test_blobs_are_independent_of_later_in_place_writes(workspace, store):
+    checkpoint = store.create()
+    with open(os.path.join(workspace, "main.py"), "a") as f:
+        f.write("print('appended')\n")
+
+    store.restore(checkpoint.id)
+
+    assert read(workspace, "main.py") == "print('v1')\n"
+
+
+def test_corrupted_blob_and_unknown_checkpoint_are_reported(workspace, store):
+    checkpoint = store.create()
+    write(workspace, "main.py", "print('v2')\n")
+    with open(store._blob_path(checkpoint.files["main.py"]), "w") as f:
+        f.write("tampered\n")
+
+    with pytest.raises(CheckpointError, match="corrupted"):
+        store.restore(checkpoint.id)
+    assert read(workspace, "main.py") == "print('v2')\n"
+    with pytest.raises(CheckpointError, match="does not exist"):
+        store.restore("missing")
@@ -0,0 +1,85 @@
+import pytest
+
+from core.utils.edit_engine import EditBlock, EditError, apply_edit_block, apply_edit_blocks, parse_edit_response
+
+SOURCE = '''def load(path):
+    with open(path) as f:
+        return f.read()
+
+
+def save(path, data):
+    with open(path, "w") as f:
+        f.write(data)
+'''
+
+
+def block(search, replace):
+    return f"<<<<<<< SEARCH\n{search}=======\n{replace}>>>>>>> REPLACE\n"
+
+
+def test_parses_blocks_between_prose_and_code_fences():
+    response = "Here is the change:\n```\n" + block("a = 1\n", "a = 2\n") + block("", "b = 3\n") + "```\nDone."
+
+    assert parse_edit_response(response) == [EditBlock("a = 1\n", "a = 2\n"), EditBlock("", "b = 3\n")]
+
+
+def test_rejects_unterminated_blocks_and_responses_without_edits():
+    with pytest.raises(EditError, match="Unterminated"):
+        parse_edit_response("<<<<<<< SEARCH\na = 1\n=======\na = 2\n")
+    with pytest.raises(EditError, match="No SEARCH/REPLACE"):
+        parse_edit_response("I rewrote the file for you.")
+
+
+def test_parses_unified_diff_hunks():
+    diff = "--- a/x.py\n+++ b/x.py\n@@ -1,2 +1,2 @@\n def f():\n-    return 1\n+    return 2\n"
+
+    [parsed] = parse_edit_response(diff)
+
+    assert parsed == EditBlock("def f():\n    return 1\n", "def f():\n    return 2\n")
+    assert apply_edit_block("def f():\n    return 1\n", parsed) == "def f():\n    return 2\n"
+
+
+def test_exact_match_and_ambiguous_exact_match():
+    assert apply_edit_block(SOURCE, EditBlock("        return f.read()\n", "        return f.read().strip()\n")).count("strip()") == 1
+    with pytest.raises(EditError, match="matches 2 places"):
+        apply_edit_block(SOURCE, EditBlock("    with open(", "    with  open("))
+
+
+def test_indentation_insensitive_match_is_reindented():
+    edited = apply_edit_block(SOURCE, EditBlock("with open(path) as f:\n    return f.read()\n", "with open(path, encoding='utf-8') as f:\n    return f.read()\n"))
+
+    assert "    with open(path, encoding='utf-8') as f:\n        return f.read()\n" in edited
+
+
+def test_fuzzy_match_edits_the_most_similar_lines():
+    edited = apply_edit_block(SOURCE, EditBlock("def save(path, data):\n    with open(path, 'w') as f:\n        f.write(data)\n", "def save(path, data):\n    with open(path, 'a') as f:\n        f.write(data)\n"))
+
+    assert "open(path, 'a')" in edited
+    assert edited.startswith("def load(path):\n    with open(path) as f:\n")
+
+
+def test_fuzzy_match_against_two_similar_functions_is_rejected():
+    content = "def read_a(path):\n    data = open(path).read()\n    return data.strip()\n\n\ndef read_b(path):\n    data = open(path).read()\n    return data.strip()\n"
+    search = "def read_x(path):\n    data = open(path).read()\n    return data.strip()\n"
+
+    with pytest.raises(EditError, match="similar to lines 1 and 6"):
+        apply_edit_block(content, EditBlock(search, "def read_x(path):\n    return open(path).read()\n"))
+
+
+def test_unmatched_search_text_is_rejected():
+    with pytest.raises(EditError, match="does not match"):
+        apply_edit_block(SOURCE, EditBlock("class Storage:\n    pass\n", ""))
+
+
+def test_missing_final_newline_is_preserved():
+    content = "a = 1\nb = 2"
+
+    assert apply_edit_block(content, EditBlock("a = 1\n", "a = 10\n")) == "a = 10\nb = 2"
+    assert apply_edit_block(content, EditBlock("  a = 1\n", "a = 10\n")) == "a = 10\nb = 2"
+    assert apply_edit_block(content, EditBlock("b = 2\n", "b = 20\n")) == "a = 1\nb = 20"
+
+
+def test_blocks_apply_in_order_and_report_the_failing_block():
+    assert apply_edit_blocks("x = 1\n", [EditBlock("x = 1\n", "x = 2\n"), EditBlock("x = 2\n", "x = 3\n"), EditBlock("", "y = 4\n")]) == "x = 3\ny = 4\n"
+    with pytest.raises(EditError, match="Block 2 of 2"):
+        apply_edit_blocks("x = 1\n", [EditBlock("x = 1\n", "x = 2\n"), EditBlock("z = 9\n", "")])
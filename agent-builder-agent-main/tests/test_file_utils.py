@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from core.utils.file_utils import ExclusionMatcher, find_files
+
+
+def write(root, relative_path, content=""):
+    path = os.path.join(root, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    root = str(tmp_path)
+    write(root, "main.py")
+    write(root, "a/node_modules/pkg/lib/x.js")
+    write(root, "a/src/app.py")
+    write(root, "generated/deep/nested/out.py")
+    write(root, "logs/run.log")
+    write(root, "packages/ui/button.py")
+    write(root, ".gitignore", "generated/\n*.log\n")
+    return root
+
+
+def test_files_nested_inside_an_excluded_dir_name_are_excluded(workspace):
+    matcher = ExclusionMatcher(workspace)
+
+    assert matcher.is_excluded_file(os.path.join(workspace, "a/node_modules/pkg/lib/x.js"))
+    assert matcher.is_excluded_dir(os.path.join(workspace, "a/node_modules/pkg"))
+    assert not matcher.is_excluded_file(os.path.join(workspace, "a/src/app.py"))
+
+
+def test_files_nested_inside_a_gitignored_dir_are_excluded(workspace):
+    matcher = ExclusionMatcher(workspace, use_gitignore=True)
+
+    assert matcher.is_excluded_file(os.path.join(workspace, "generated/deep/nested/out.py"))
+    assert matcher.is_excluded_dir(os.path.join(workspace, "generated/deep"))
+    assert matcher.is_excluded_file(os.path.join(workspace, "logs/run.log"))
+    assert not matcher.is_excluded_file(os.path.join(workspace, "main.py"))
+    assert not ExclusionMatcher(workspace).is_excluded_file(os.path.join(workspace, "generated/deep/nested/out.py"))
+
+
+def test_root_anchored_exclusions_cover_their_subtrees(workspace):
+    matcher = ExclusionMatcher(workspace, excluded_dirs=["packages/ui"])
+
+    assert matcher.is_excluded_file(os.path.join(workspace, "packages/ui/button.py"))
+    assert not matcher.is_excluded_file(os.path.join(workspace, "a/src/app.py"))
+
+
+def test_find_files_agrees_with_the_matcher(workspace):
+    found = set(find_files(workspace, 10, use_gitignore=True))
+    matcher = ExclusionMatcher(workspace, use_gitignore=True)
+
+    assert found == {"main.py", os.path.join("a", "src", "app.py")}
+    for relative_path in found:
+        assert not matcher.is_excluded_file(os.path.join(workspace, relative_path))
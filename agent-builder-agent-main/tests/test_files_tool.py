@@ -0,0 +1,99 @@
+import json
+import os
+
+import pytest
+
+from core.units import files_tool
+from core.units.files_tool import FilesTool
+from core.units.working_memory import WorkingMemory
+from core.utils import file_utils, workspace_manifest
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.setattr(files_tool, "WorkingMemory", lambda: WorkingMemory(db_path=str(tmp_path / "working_memory.db")))
+    root = tmp_path / "workspace"
+    root.mkdir()
+    (root / "data.txt").write_bytes(b"0123456789")
+    return root
+
+
+def read(tool, **kwargs):
+    result = tool.read_file("data.txt", **kwargs)
+    assert result.success, result.output
+    return json.loads(result.output)
+
+
+def test_byte_range_past_the_end_is_clamped_without_a_continuation(workspace):
+    tool = FilesTool(base_path=str(workspace))
+
+    result = read(tool, start_byte=4, end_byte=100)
+
+    assert result["content"] == "456789"
+    assert result["end_byte"] == 10
+    assert "next_start_byte" not in result
+
+
+def test_byte_range_pages_through_a_file_larger_than_one_read(workspace, monkeypatch):
+    monkeypatch.setattr(files_tool, "MAX_READ_BYTES", 4)
+    tool = FilesTool(base_path=str(workspace))
+
+    chunks, start = [], 0
+    while start is not None:
+        result = read(tool, start_byte=start, end_byte=100)
+        chunks.append(result["content"])
+        start = result.get("next_start_byte")
+
+    assert chunks == ["0123", "4567", "89"]
+
+
+def test_start_byte_past_the_end_is_rejected(workspace):
+    tool = FilesTool(base_path=str(workspace))
+
+    result = tool.read_file("data.txt", start_byte=11)
+
+    assert not result.success
+    assert "past the end" in result.output
+    assert read(tool, start_byte=10)["content"] == ""
+
+
+def test_index_lookups_do_not_start_a_watcher_unless_asked(workspace):
+    (workspace / "app.py").write_text("def handler():\n    return 'ok'\n")
+    tool = FilesTool(base_path=str(workspace))
+
+    assert json.loads(tool.search_workspace("handler").output)[0]["path"] == "app.py"
+    assert tool.find_symbol("handler").success
+
+    assert tool.manifest.watcher is None
+    tool.close()
+
+
+def test_close_stops_the_watcher_and_evicts_the_shared_caches(workspace, monkeypatch):
+    monkeypatch.setattr(FilesTool, "watch_workspace", True)
+    tool = FilesTool(base_path=str(workspace))
+    watcher = tool.manifest.watcher
+    assert watcher is not None and watcher.running
+
+    tool.close()
+
+    assert not watcher.running
+    assert file_utils._matchers.keys().isdisjoint({(str(workspace), False), (str(workspace), True)})
+    assert workspace_manifest.get_workspace_manifest(str(workspace)) is not tool.manifest
+
+
+def test_search_index_is_shared_and_updated_incrementally(workspace):
+    (workspace / "app.py").write_text("def handler():\n    return 'ok'\n")
+    first = FilesTool(base_path=str(workspace))
+    first.search_workspace("handler")
+
+    second = FilesTool(base_path=str(workspace))
+    assert second.search_index is first.search_index
+    assert second.search_index.update() == 0  # Nothing is re-tokenized for a new tool instance
+
+    (workspace / "worker.py").write_text("def handler_task():\n    pass\n")
+    second._sync_manifest()
+    assert second.search_index.update() == 1
+    assert {hit["path"] for hit in json.loads(second.search_workspace("handler").output)} == {"app.py", "worker.py"}
+
+    second.close()
+    assert FilesTool(base_path=str(workspace)).search_index is not first.search_index
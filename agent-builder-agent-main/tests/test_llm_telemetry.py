@@ -0,0 +1,36 @@
+import pytest
+
+from core.utils import llm
+from core.utils.llm_backends import FakeLLMBackend
+from core.utils.llm_telemetry import telemetry
+from core.utils.tokens import ContextWindowError
+
+
+@pytest.fixture
+def session_id():
+    session_id = "test-llm-telemetry"
+    telemetry.clear(session_id)
+    llm.set_llm_backend(FakeLLMBackend(script=["hello"]))
+    yield session_id
+    llm.set_llm_backend(None)
+    telemetry.clear(session_id)
+
+
+def test_non_streamed_call_records_no_time_to_first_token(session_id):
+    llm.make_llm_api_call([{"role": "user", "content": "hi"}], "gpt-4o", session_id=session_id)
+
+    [call] = telemetry.get_calls(session_id)
+    assert call.success
+    assert call.time_to_first_token_s is None
+    assert telemetry.summarize(session_id)["avg_time_to_first_token_s"] is None
+
+
+def test_prompt_that_cannot_fit_the_context_window_is_recorded(session_id):
+    oversized = [{"role": "system", "content": "word " * 200_000}, {"role": "user", "content": "hi"}]
+
+    with pytest.raises(ContextWindowError):
+        llm.make_llm_api_call(oversized, "gpt-4o", max_tokens=1000, session_id=session_id)
+
+    [call] = telemetry.get_calls(session_id)
+    assert not call.success
+    assert "context window" in call.error
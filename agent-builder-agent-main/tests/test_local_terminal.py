@@ -0,0 +1,74 @@
+import json
+import os
+
+import pytest
+
+from core.units import terminal_tool
+from core.units.terminal_tool import TerminalTool
+from core.units.working_memory import WorkingMemory
+from core.utils.execution_backends import LocalProcessExecutionBackend, ResourceLimits
+
+
+@pytest.fixture
+def backend():
+    backend = LocalProcessExecutionBackend(limits=ResourceLimits(open_files=256))
+    yield backend
+    backend.close()
+
+
+@pytest.fixture
+def tool(backend, tmp_path, monkeypatch):
+    monkeypatch.setattr(terminal_tool, "WorkingMemory", lambda: WorkingMemory(db_path=str(tmp_path / "working_memory.db")))
+    tool = TerminalTool(execution_backend=backend)
+    yield tool
+    tool.close()
+
+
+def run(tool, session_id, command, timeout=10):
+    result = tool.run_command(session_id, command, timeout=timeout)
+    assert result.success, result.output
+    return json.loads(result.output)
+
+
+def test_run_command_in_local_sandbox(tool, backend):
+    session_id = tool.new_terminal_session()
+
+    result = run(tool, session_id, "echo hello > greeting.txt && cat greeting.txt && echo oops >&2; (exit 3)")
+
+    assert result["exit_code"] == 3
+    assert result["stdout"] == "hello"
+    assert result["stderr"] == "oops"
+    assert not result["timed_out"]
+    with open(os.path.join(backend.workspace_path, "greeting.txt")) as f:
+        assert f.read() == "hello\n"
+
+
+def test_shell_state_persists_and_limits_apply(tool):
+    session_id = tool.new_terminal_session()
+    run(tool, session_id, "export GREETING=hi && mkdir -p sub && cd sub")
+
+    result = run(tool, session_id, "echo $GREETING $(basename $PWD) $(ulimit -n)")
+
+    assert result["stdout"] == "hi sub 256"
+
+
+def test_run_command_interrupts_on_timeout(tool):
+    session_id = tool.new_terminal_session()
+
+    result = run(tool, session_id, "echo started; sleep 30", timeout=1)
+
+    assert result["timed_out"]
+    assert result["exit_code"] == 130
+    assert result["stdout"] == "started"
+    assert result["duration_s"] < 10
+    assert run(tool, session_id, "echo still usable")["stdout"] == "still usable"  # Ctrl+C reached the job, not the shell
+
+
+def test_closed_session_is_rejected(tool):
+    session_id = tool.new_terminal_session()
+    assert tool.control_c_terminal_session(session_id).success
+
+    result = tool.run_command(session_id, "echo hi")
+
+    assert not result.success
+    assert session_id in result.output
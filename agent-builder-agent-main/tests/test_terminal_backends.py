@@ -0,0 +1,86 @@
+import subprocess
+import time
+from socket import socketpair
+
+import pytest
+
+from core.utils.terminal_backends import DockerExecTerminalBackend
+from core.utils.terminal_logs import TIMESTAMP_PREFIX, strip_timestamps
+
+
+class _FakeExecApi:
+    """
+    Stands in for client.api: every exec runs a local bash whose stdin and stdout are one end of a socket
+    pair, and exec_start returns the other end, like the attached socket of a `docker exec`.
+    """
+
+    def __init__(self):
+        self.exec_configs = []
+        self.processes = []
+
+    def exec_create(self, container, cmd, **kwargs):
+        self.exec_configs.append((container, cmd, kwargs))
+        return {"Id": str(len(self.exec_configs))}
+
+    def exec_start(self, exec_id, tty=False, socket=False):
+        assert tty and socket
+        ours, theirs = socketpair()
+        self.processes.append(subprocess.Popen(["bash"], stdin=theirs, stdout=theirs, stderr=subprocess.STDOUT))
+        theirs.close()
+        return ours
+
+
+class _FakeClient:
+    def __init__(self):
+        self.api = _FakeExecApi()
+
+
+def wait_until(condition, timeout_s: float = 5):
+    deadline = time.monotonic() + timeout_s
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def backend():
+    backend = DockerExecTerminalBackend("workspace", client=_FakeClient())
+    yield backend
+    for session_id in list(backend.sessions):
+        backend.close_session(session_id)
+
+
+def test_commands_go_to_the_exec_socket_and_output_is_stamped(backend, tmp_path):
+    log_path = tmp_path / "session.log"
+    backend.start_session("session_a", str(log_path))
+
+    backend.send_command("session_a", "echo 'quoted \"text\"'; echo second >&2")
+    wait_until(lambda: "second" in log_path.read_text())
+
+    assert backend.client.api.exec_configs == [("workspace", ["/bin/bash"], {"stdin": True, "tty": True, "environment": {"TERM": "xterm"}})]
+    assert strip_timestamps(log_path.read_text()) == 'quoted "text"\nsecond\n'
+    assert len(TIMESTAMP_PREFIX.findall(log_path.read_text())) == 2
+    assert backend.tail("session_a", 1024) == log_path.read_text()
+
+
+def test_wait_for_output_returns_when_output_arrives(backend, tmp_path):
+    backend.start_session("session_a", str(tmp_path / "session.log"))
+    backend.wait_for_output("session_a", 0.01)
+
+    backend.send_command("session_a", "sleep 0.2; echo done")
+    started = time.monotonic()
+    backend.wait_for_output("session_a", 10)
+
+    assert 0.1 <= time.monotonic() - started < 5
+
+
+def test_closed_session_ends_its_shell(backend, tmp_path):
+    backend.start_session("session_a", str(tmp_path / "session.log"))
+    assert backend.is_running("session_a")
+
+    backend.close_session("session_a")
+
+    assert not backend.is_running("session_a")
+    backend.client.api.processes[0].wait(timeout=5)
+    with pytest.raises(KeyError):
+        backend.send_command("session_a", "echo hi")
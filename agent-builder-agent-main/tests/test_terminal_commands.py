@@ -0,0 +1,82 @@
+import os
+import subprocess
+import time
+
+from core.utils.terminal_commands import RUN_DONE, RUN_INTERRUPT, RUN_WAIT, CommandRun, parse_command_output, report_suffix, wrap_command
+
+STAMP = "2026-01-02-03:04:05 "
+
+
+def report(token: str, stdout: str, stderr: str, exit_code: int) -> str:
+    """Terminal output of the report_suffix markers, stamped and with CRLF line endings like a pty writes them."""
+    lines = ["", f"__KX_OUT_{token}__", *stdout.splitlines(), "", f"__KX_ERR_{token}__", *stderr.splitlines(), "", f"__KX_END_{token}__ {exit_code}"]
+    return "".join(f"{STAMP}{line}\r\n" for line in lines)
+
+
+def run_in_bash(script: str, tmp_path) -> str:
+    return subprocess.run(["bash", "-c", script], capture_output=True, text=True, env={**os.environ, "TMPDIR": str(tmp_path)}, timeout=10).stdout
+
+
+def test_wrapped_command_reports_streams_and_exit_code(tmp_path):
+    token = "abc123"
+    command = "cd /; echo out; echo err >&2; printf 'no newline'; (exit 4)  # trailing comment"
+
+    result = parse_command_output(run_in_bash(wrap_command(command, token) + "; echo $PWD", tmp_path), token)
+
+    assert result.exit_code == 4
+    assert result.stdout == "out\nno newline"
+    assert result.stderr == "err"
+    assert os.listdir(tmp_path) == []  # Capture files are removed
+
+
+def test_wrapped_command_keeps_shell_state_and_heredocs(tmp_path):
+    token = "def456"
+    command = "export GREETING=hi\ncat <<EOF\n$GREETING there\nEOF"
+
+    output = run_in_bash(wrap_command(command, token) + "; echo after=$GREETING", tmp_path)
+
+    assert parse_command_output(output, token).stdout == "hi there"
+    assert output.rstrip().endswith("after=hi")
+
+
+def test_echoed_command_line_is_not_mistaken_for_the_result():
+    token = "0123456789ab"
+    echoed = f"{STAMP}$ {wrap_command('make test', token)}\r\n"
+
+    assert parse_command_output(echoed, token) is None
+    assert parse_command_output(echoed + report(token, "", "", 0), "ffffffffffff") is None
+
+
+def test_run_waits_until_the_markers_arrive():
+    run = CommandRun("make", timeout_s=30, report_timeout_s=5)
+    output = f"{STAMP}$ {run.wrapped_command}\r\n" + report(run.token, "built\ndone", "warning: x", 2)
+
+    assert run.step(output[:50]) == RUN_WAIT
+    assert 0 < run.remaining <= 30
+    assert run.step(output[50:-10]) == RUN_WAIT
+    assert run.step(output[-10:]) == RUN_DONE
+    assert (run.result.exit_code, run.result.stdout, run.result.stderr) == (2, "built\ndone", "warning: x")
+    assert not run.timed_out
+
+
+def test_run_interrupts_once_and_collects_the_interrupted_report():
+    run = CommandRun("sleep 30", timeout_s=0.05, report_timeout_s=5)
+    time.sleep(0.1)
+
+    assert run.step(f"{STAMP}partial\r\n") == RUN_INTERRUPT
+    assert run.timed_out
+    assert run.report_command == report_suffix(run.token, "130")
+    assert run.step("^C\r\n") == RUN_WAIT
+    assert run.step(report(run.token, "partial", "", 130)) == RUN_DONE
+    assert run.result.exit_code == 130
+
+
+def test_run_gives_up_when_the_interrupted_command_does_not_report():
+    run = CommandRun("stuck", timeout_s=0.05, report_timeout_s=0.05)
+    time.sleep(0.1)
+    assert run.step("") == RUN_INTERRUPT
+
+    time.sleep(0.1)
+
+    assert run.step("") == RUN_DONE
+    assert run.result is None
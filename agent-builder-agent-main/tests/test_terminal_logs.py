@@ -0,0 +1,254 @@
+import os
+import gzip
+import asyncio
+import threading
+import time
+
+from core.utils.terminal_backends import TimestampedLogWriter
+from core.utils.terminal_logs import (
+    READ_CHUNK_BYTES, TIMESTAMP_FORMAT, TIMESTAMP_PREFIX, WAIT_IDLE, WAIT_REGEX, WAIT_TIMEOUT, SessionLogReader, TailBuffer,
+    async_wait_for_log_output, rotate_log, segment_path, strip_timestamps, wait_for_log_output,
+)
+
+
+def stamp(timestamp: float) -> bytes:
+    return time.strftime(TIMESTAMP_FORMAT, time.localtime(timestamp)).encode() + b" "
+
+
+def call_with_timeout(function, timeout_s: float = 10):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(function()), daemon=True)
+    thread.start()
+    thread.join(timeout_s)
+    assert not thread.is_alive(), f"{function} did not return within {timeout_s} seconds"
+    return result[0]
+
+
+def test_read_range_over_a_line_longer_than_one_read_chunk(tmp_path):
+    started = float(int(time.time()) - 60)
+    log_path = tmp_path / "session.log"
+    progress = b"x\r" * (READ_CHUNK_BYTES // 2 + 1000)  # No newline for more than one chunk
+    log_path.write_bytes(stamp(started) + b"before\n" + stamp(started + 1) + progress + b"\n" + stamp(started + 2) + b"after\n")
+    reader = SessionLogReader(str(log_path))
+
+    observed = call_with_timeout(lambda: reader.read_range(started, started + 2))
+
+    assert observed.split("\n")[0].endswith("before")
+    assert observed.endswith("after")
+    assert len(observed) > READ_CHUNK_BYTES
+    assert call_with_timeout(lambda: reader.read_range(started + 2, started + 2)).endswith("after")
+
+
+def write_lines(log_path, lines):
+    with open(log_path, "ab") as log_file:
+        for timestamp, text in lines:
+            log_file.write(stamp(timestamp) + text.encode() + b"\n")
+
+
+def test_read_new_returns_only_output_since_the_previous_read(tmp_path):
+    log_path = tmp_path / "session.log"
+    log_path.write_bytes(b"")
+    reader = SessionLogReader(str(log_path))
+    now = int(time.time())
+
+    write_lines(log_path, [(now, "first")])
+    assert reader.read_new().endswith("first\n")
+    assert reader.read_new() == ""
+
+    with open(log_path, "ab") as log_file:
+        log_file.write(stamp(now) + b"partial prompt $ ")
+    assert reader.read_new().endswith("partial prompt $ ")
+    write_lines(log_path, [(now, "second")])
+    reader.mark()
+    write_lines(log_path, [(now, "third")])
+    assert reader.read_new().strip().endswith("third")
+    assert "second" not in reader.read_new()
+
+
+def test_read_new_after_truncation_starts_over(tmp_path):
+    log_path = tmp_path / "session.log"
+    write_lines(log_path, [(time.time(), "old output")])
+    reader = SessionLogReader(str(log_path))
+    reader.read_new()
+
+    log_path.write_bytes(b"")
+    write_lines(log_path, [(time.time(), "new")])
+
+    assert reader.read_new().endswith("new\n")
+
+
+def test_timestamp_index_is_sparse_and_ranges_are_exact(tmp_path):
+    log_path = tmp_path / "session.log"
+    started = int(time.time()) - 1000
+    write_lines(log_path, [(started + second, f"line {second:03d} " + "x" * 100) for second in range(600)])
+    reader = SessionLogReader(str(log_path), index_every_bytes=4096)
+
+    observed = reader.read_range(started + 100, started + 102).split("\n")
+
+    assert [line.split()[2] for line in observed] == ["100", "101", "102"]
+    assert 10 <= len(reader.index) <= log_path.stat().st_size // 4096 + 1
+    assert [offset for _, offset in reader.index] == sorted(offset for _, offset in reader.index)
+    assert reader.indexed_offset == log_path.stat().st_size
+
+    write_lines(log_path, [(started + 600, "line 600 appended")])
+    assert reader.read_range(started + 600, started + 600).endswith("line 600 appended")
+    assert reader.read_range(started + 700, started + 800) == ""
+
+
+def test_unstamped_lines_follow_the_stamped_line_before_them(tmp_path):
+    log_path = tmp_path / "session.log"
+    started = int(time.time()) - 10
+    log_path.write_bytes(stamp(started) + b"before\n" + stamp(started + 1) + b"traceback\n    continued\n" + stamp(started + 2) + b"after\n")
+
+    assert strip_timestamps(SessionLogReader(str(log_path)).read_range(started + 1, started + 1)) == "traceback\n    continued"
+
+
+def test_forget_history_hides_earlier_output_from_ranges(tmp_path):
+    log_path = tmp_path / "session.log"
+    now = int(time.time())
+    write_lines(log_path, [(now, "previous session")])
+    reader = SessionLogReader(str(log_path))
+
+    reader.mark(forget_history=True)
+    write_lines(log_path, [(now, "this session")])
+
+    assert strip_timestamps(reader.read_range(now - 5, now + 5)) == "this session"
+
+
+def read_segment(log_path, number):
+    with gzip.open(segment_path(str(log_path), number), "rb") as segment:
+        return segment.read()
+
+
+def test_writer_rotates_into_a_bounded_number_of_segments(tmp_path):
+    log_path = tmp_path / "session.log"
+    writer = TimestampedLogWriter(str(log_path), max_bytes=256, segments=2)
+    for number in range(100):
+        writer.write(f"output line {number:03d}\n".encode())
+    writer.close()
+
+    assert os.path.exists(segment_path(str(log_path), 2))
+    assert not os.path.exists(segment_path(str(log_path), 3))
+    kept = strip_timestamps((read_segment(log_path, 2) + read_segment(log_path, 1) + log_path.read_bytes()).decode()).splitlines()
+    first = int(kept[0].split()[-1])
+    assert first > 0
+    assert kept == [f"output line {number:03d}" for number in range(first, 100)]
+
+
+def test_writer_stamps_partial_lines_once(tmp_path):
+    log_path = tmp_path / "session.log"
+    writer = TimestampedLogWriter(str(log_path))
+    writer.write(b"$ ")
+    writer.write(b"echo hi\r\nhi\n")
+    writer.close()
+
+    assert strip_timestamps(log_path.read_text()) == "$ echo hi\nhi\n"
+    assert len(TIMESTAMP_PREFIX.findall(log_path.read_text())) == 2
+    assert writer.tail.read(1024) == log_path.read_text()
+
+
+def test_read_new_keeps_the_unread_rest_of_a_rotated_log(tmp_path):
+    log_path = tmp_path / "session.log"
+    writer = TimestampedLogWriter(str(log_path), max_bytes=1024, segments=2)
+    reader = SessionLogReader(str(log_path), segments=2)
+    writer.write(b"before rotation\n")
+    assert "before rotation" in reader.read_new()
+
+    for number in range(60):
+        writer.write(f"line {number:02d}\n".encode())
+    writer.close()
+
+    assert os.path.exists(segment_path(str(log_path), 1))
+    assert strip_timestamps(reader.read_new()).splitlines() == [f"line {number:02d}" for number in range(60)]
+    assert reader.read_new() == ""
+
+
+def test_read_range_reads_older_lines_from_segments(tmp_path):
+    log_path = tmp_path / "session.log"
+    started = int(time.time()) - 100
+    write_lines(log_path, [(started + second, f"line {second:02d}") for second in range(10)])
+    rotate_log(str(log_path), segments=2)
+    write_lines(log_path, [(started + second, f"line {second:02d}") for second in range(10, 20)])
+    rotate_log(str(log_path), segments=2)
+    write_lines(log_path, [(started + second, f"line {second:02d}") for second in range(20, 30)])
+    reader = SessionLogReader(str(log_path), segments=2)
+
+    assert strip_timestamps(reader.read_range(started + 5, started + 24)).splitlines() == [f"line {second:02d}" for second in range(5, 25)]
+    assert strip_timestamps(reader.read_range(started + 12, started + 13)).splitlines() == ["line 12", "line 13"]
+
+
+def test_tail_starts_at_a_line_boundary(tmp_path):
+    log_path = tmp_path / "session.log"
+    write_lines(log_path, [(time.time(), f"line {number:03d}") for number in range(200)])
+    buffer = TailBuffer(capacity=256)
+    buffer.append(log_path.read_bytes())
+
+    assert strip_timestamps(SessionLogReader(str(log_path)).tail(100)).splitlines()[-1] == "line 199"
+    for tail in (SessionLogReader(str(log_path)).tail(100), buffer.read(100), buffer.read(10_000)):
+        assert TIMESTAMP_PREFIX.match(tail)
+        assert tail.endswith("line 199\n")
+    assert len(buffer.read(10_000)) <= 256
+
+
+def append_later(log_path, lines, delay_s: float, interval_s: float = 0.0):
+    def write():
+        time.sleep(delay_s)
+        for text in lines:
+            write_lines(log_path, [(time.time(), text)])
+            time.sleep(interval_s)
+
+    thread = threading.Thread(target=write, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_wait_returns_when_new_output_matches(tmp_path):
+    log_path = tmp_path / "session.log"
+    write_lines(log_path, [(time.time(), "done")])
+    append_later(log_path, ["building", "done"], delay_s=0.2)
+
+    started = time.monotonic()
+    reason = wait_for_log_output(str(log_path), timeout_s=10, until_regex=r"^done$")
+
+    assert reason == WAIT_REGEX
+    assert 0.2 <= time.monotonic() - started < 5
+
+
+def test_wait_ignores_matches_before_the_start_offset(tmp_path):
+    log_path = tmp_path / "session.log"
+    write_lines(log_path, [(time.time(), "done")])
+
+    assert wait_for_log_output(str(log_path), timeout_s=0.3, until_regex="done") == WAIT_TIMEOUT
+    assert wait_for_log_output(str(log_path), timeout_s=0.3, until_regex="done", start_offset=0) == WAIT_REGEX
+
+
+def test_wait_returns_once_output_settles(tmp_path):
+    log_path = tmp_path / "session.log"
+    log_path.write_bytes(b"")
+    writer = append_later(log_path, [f"line {number}" for number in range(10)], delay_s=0, interval_s=0.05)
+
+    reason = wait_for_log_output(str(log_path), timeout_s=10, idle_ms=300)
+
+    assert reason == WAIT_IDLE
+    assert not writer.is_alive()
+
+
+def test_wait_times_out_while_output_keeps_growing(tmp_path):
+    log_path = tmp_path / "session.log"
+    log_path.write_bytes(b"")
+    append_later(log_path, [f"line {number}" for number in range(40)], delay_s=0, interval_s=0.02)
+
+    assert wait_for_log_output(str(log_path), timeout_s=0.4, idle_ms=300) == WAIT_TIMEOUT
+
+
+def test_async_waits_do_not_block_each_other(tmp_path):
+    log_paths = [tmp_path / "first.log", tmp_path / "second.log"]
+    for log_path in log_paths:
+        log_path.write_bytes(b"")
+
+    async def wait_all():
+        return await asyncio.gather(*(async_wait_for_log_output(str(log_path), timeout_s=0.5) for log_path in log_paths))
+
+    started = time.monotonic()
+    assert asyncio.run(wait_all()) == [WAIT_TIMEOUT, WAIT_TIMEOUT]
+    assert time.monotonic() - started < 0.9
@@ -0,0 +1,86 @@
+from core.utils.terminal_output import MAX_LINE_CHARS, compact_terminal_output
+
+STAMP = "2026-01-02-03:04:05 "
+
+
+def test_short_plain_output_is_unchanged():
+    text = "$ ls\nREADME.md\nsetup.py\n$ "
+
+    compacted, stats = compact_terminal_output(text)
+
+    assert compacted == text
+    assert not stats.changed
+
+
+def test_carriage_return_redraws_keep_the_final_state():
+    progress = "\r".join(f"Downloading {percent}%" for percent in range(0, 101, 10))
+
+    compacted, stats = compact_terminal_output(f"{STAMP}{progress}\r\n{STAMP}done\n")
+
+    assert compacted == f"{STAMP}Downloading 100%\n{STAMP}done\n"
+    assert stats.overwritten_lines == 10
+    assert stats.changed
+
+
+def test_trailing_carriage_return_does_not_blank_the_line():
+    compacted, _ = compact_terminal_output("50%\r100%\r\nok")
+
+    assert compacted == "100%\nok"
+
+
+def test_ansi_escapes_are_stripped():
+    compacted, stats = compact_terminal_output("\x1b[1;31mFAILED\x1b[0m test_a\n\x1b]0;title\x07$ ")
+
+    assert compacted == "FAILED test_a\n$ "
+    assert stats.ansi_sequences == 3
+
+
+def test_runs_of_identical_lines_are_folded_ignoring_timestamps():
+    lines = ["start"] + [f"2026-01-02-03:04:{second:02d} retrying connection" for second in range(10)] + ["ok", "ok", "end"]
+
+    compacted, stats = compact_terminal_output("\n".join(lines))
+
+    assert compacted.split("\n") == [
+        "start",
+        "2026-01-02-03:04:00 retrying connection",
+        "[... previous line repeated 9 more times]",
+        "ok",
+        "ok",
+        "end",
+    ]
+    assert stats.folded_lines == 9
+
+
+def test_long_output_keeps_head_and_tail():
+    compacted, stats = compact_terminal_output("\n".join(f"line {number}" for number in range(1000)), max_lines=100)
+    lines = compacted.split("\n")
+
+    assert lines[0] == "line 0"
+    assert lines[-1] == "line 999"
+    assert "[... 900 lines elided ...]" in lines
+    assert stats.elided_lines == 900
+    assert stats.compacted_lines == 101
+
+
+def test_overlong_lines_are_truncated():
+    compacted, _ = compact_terminal_output("x" * (MAX_LINE_CHARS * 2))
+
+    assert compacted == "x" * MAX_LINE_CHARS + " [... line truncated]"
+
+
+def test_errors_only_keeps_error_context_and_the_last_lines():
+    lines = [f"compiling module {number}" for number in range(50)]
+    lines[20:23] = ["Traceback (most recent call last):", '  File "main.py", line 3', "ValueError: bad input"]
+    lines += ["exit status 1", "$ "]
+
+    compacted, stats = compact_terminal_output("\n".join(lines), errors_only=True)
+    kept = compacted.split("\n")
+
+    assert "Traceback (most recent call last):" in kept
+    assert '  File "main.py", line 3' in kept
+    assert "ValueError: bad input" in kept
+    assert "compiling module 18" in kept  # Context before the first error line
+    assert "compiling module 10" not in kept
+    assert kept[-2:] == ["exit status 1", "$ "]
+    assert kept[0] == "[... 18 lines without errors omitted]"
+    assert stats.elided_lines == len(lines) - len([line for line in kept if not line.startswith("[...")])
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from core.units import terminal_tool
+from core.units.terminal_tool import TerminalTool
+from core.units.working_memory import WorkingMemory
+from core.utils.execution_backends import LocalProcessExecutionBackend, ResourceLimits
+
+
+@pytest.fixture
+def tool(tmp_path, monkeypatch):
+    monkeypatch.setattr(terminal_tool, "WorkingMemory", lambda: WorkingMemory(db_path=str(tmp_path / "working_memory.db")))
+    backend = LocalProcessExecutionBackend(limits=ResourceLimits(open_files=256))
+    tool = TerminalTool(execution_backend=backend)
+    yield tool
+    tool.close()
+    backend.close()
+
+
+def stdout(tool, session_id, command):
+    result = tool.run_command(session_id, command, timeout=10)
+    assert result.success, result.output
+    return json.loads(result.output)["stdout"]
+
+
+def test_released_shell_is_reused_under_a_new_id_with_its_state_reset(tool):
+    first = tool.new_terminal_session()
+    shell_id = tool.session_pool.lease(first).shell_id
+    home = stdout(tool, first, "echo $HOME")
+    stdout(tool, first, "export LEFTOVER=1; alias ll='ls -l'; cd /tmp; sleep 300 &")
+    assert tool.control_c_terminal_session(first).success
+
+    second = tool.new_terminal_session()
+
+    assert second != first
+    assert tool.session_pool.lease(second).shell_id == shell_id
+    assert stdout(tool, second, "echo [$LEFTOVER] $PWD $(jobs | wc -l); alias ll >/dev/null 2>&1 || echo no alias") == f"[] {home} 0\nno alias"
+
+
+def test_released_ids_are_rejected(tool):
+    session_id = tool.new_terminal_session()
+    assert tool.control_c_terminal_session(session_id).success
+
+    with pytest.raises(KeyError):
+        tool.session_pool.lease(session_id)
+    assert not tool.send_terminal_command(session_id, "echo hi").success
+    assert not tool.control_c_terminal_session(session_id).success
+
+
+def test_tools_on_the_same_backend_share_sessions(tool):
+    session_id = tool.new_terminal_session()
+    stdout(tool, session_id, "export SHARED=yes")
+
+    other = TerminalTool(execution_backend=tool.execution_backend)
+
+    assert other.session_pool is tool.session_pool
+    assert stdout(other, session_id, "echo $SHARED") == "yes"
+
+
+def test_new_session_does_not_see_earlier_output(tool):
+    first = tool.new_terminal_session()
+    tool.run_command(first, "echo from the previous session")
+    tool.control_c_terminal_session(first)
+
+    second = tool.new_terminal_session()
+
+    assert "previous session" not in tool.observe_terminal_session(second, 60, 0)
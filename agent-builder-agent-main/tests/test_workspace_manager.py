@@ -0,0 +1,169 @@
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import docker
+import pytest
+
+from core.utils.workspace_manager import EMPTY_MOUNT_SCRIPT, OWNER_LABEL, POOL_LABEL, WorkspaceError, WorkspaceManager
+from tests.fake_docker import FakeDockerClient
+
+
+def make_manager(tmp_path, client=None, **kwargs) -> WorkspaceManager:
+    kwargs.setdefault("warm_size", 0)
+    return WorkspaceManager(client=client or FakeDockerClient(root=str(tmp_path / "docker")), workspaces_root=str(tmp_path / "workspaces"), **kwargs)
+
+
+def dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_concurrent_acquire_leases_distinct_workspaces(tmp_path):
+    manager = make_manager(tmp_path, FakeDockerClient(start_delay_s=0.05, root=str(tmp_path / "docker")), max_workspaces=4)
+    leased, errors = {}, []
+
+    def acquire(session_id):
+        try:
+            leased[session_id] = manager.acquire(session_id, timeout_s=5)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=acquire, args=(f"session_{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len({workspace.container_id for workspace in leased.values()}) == 4
+    assert len({workspace.host_path for workspace in leased.values()}) == 4
+    assert all(leased[session_id].session_id == session_id for session_id in leased)
+    assert len(manager.client.containers.list()) == 4
+    manager.close()
+
+
+def test_acquire_returns_the_workspace_already_leased_to_a_session(tmp_path):
+    manager = make_manager(tmp_path)
+    workspace = manager.acquire("session_a")
+    assert manager.acquire("session_a") is workspace
+    manager.close()
+
+
+def test_acquire_blocks_at_max_workspaces_until_release(tmp_path):
+    manager = make_manager(tmp_path, max_workspaces=1)
+    first = manager.acquire("session_a")
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(manager.acquire("session_b", timeout_s=5)))
+    waiter.start()
+    time.sleep(0.2)
+    assert acquired == []
+
+    manager.release("session_a")
+    waiter.join(timeout=5)
+
+    assert len(acquired) == 1
+    assert acquired[0].container_id == first.container_id  # Reset in place and reused
+    assert acquired[0].session_id == "session_b"
+    manager.close()
+
+
+def test_acquire_times_out_at_max_workspaces(tmp_path):
+    manager = make_manager(tmp_path, max_workspaces=1)
+    manager.acquire("session_a")
+    started = time.monotonic()
+    with pytest.raises(WorkspaceError):
+        manager.acquire("session_b", timeout_s=0.2)
+    assert time.monotonic() - started >= 0.2
+    manager.close()
+
+
+def test_workspace_that_fails_to_reset_is_replaced(tmp_path):
+    client = FakeDockerClient(root=str(tmp_path / "docker"), exec_handler=lambda container, cmd: (1, b""))
+    manager = make_manager(tmp_path, client, max_workspaces=1)
+    first = manager.acquire("session_a")
+    (tmp_path / "workspaces" / first.name / "leftover.txt").write_text("from session_a")
+    container = client.containers.get(first.container_id)
+
+    manager.release("session_a")
+
+    assert manager.idle == []
+    with pytest.raises(docker.errors.NotFound):
+        client.containers.get(first.container_id)
+    assert container.exec_calls[-1] == ["/bin/bash", "-c", EMPTY_MOUNT_SCRIPT]  # Root-owned files are deleted from inside
+    assert not (tmp_path / "workspaces" / first.name).exists()
+    second = manager.acquire("session_b", timeout_s=1)
+    assert second.container_id != first.container_id
+    assert client.containers.list() == [client.containers.get(second.container_id)]
+    manager.close()
+
+
+def test_release_without_reset_discards_the_workspace(tmp_path):
+    manager = make_manager(tmp_path)
+    workspace = manager.acquire("session_a")
+    manager.release("session_a", reset=False)
+    assert manager.client.containers.list() == []
+    assert not (tmp_path / "workspaces" / workspace.name).exists()
+    with pytest.raises(KeyError):
+        manager.release("session_a")
+    manager.close()
+
+
+def test_remove_stale_containers_only_removes_dead_owners_on_this_host(tmp_path):
+    client = FakeDockerClient(root=str(tmp_path / "docker"))
+    hostname = socket.gethostname()
+    owners = {
+        "dead": f"{hostname}:{dead_pid()}",
+        "alive": f"{hostname}:{os.getpid()}",
+        "other_host": "some-other-host:1",
+        "no_owner": "",
+    }
+    for name, owner in owners.items():
+        labels = {POOL_LABEL: "1"}
+        if owner:
+            labels[OWNER_LABEL] = owner
+        client.containers.run("workspace_dev-env", name=name, labels=labels)
+    client.containers.run("workspace_dev-env", name="unrelated", labels={OWNER_LABEL: owners["dead"]})
+
+    removed = make_manager(tmp_path, client).remove_stale_containers()
+
+    assert removed == 1
+    assert sorted(container.name for container in client.containers.list(all=True)) == ["alive", "no_owner", "other_host", "unrelated"]
+
+
+def test_start_builds_a_missing_image_and_fills_the_warm_pool(tmp_path):
+    client = FakeDockerClient(images=[], root=str(tmp_path / "docker"))
+    manager = make_manager(tmp_path, client, warm_size=2)
+    manager.start()
+    deadline = time.monotonic() + 5
+    while len(manager.idle) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert client.images.builds == 1
+    assert len(manager.idle) == 2
+    manager.acquire("session_a")
+    while len(manager.idle) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(manager.idle) == 2  # Refilled after the lease
+    manager.close()
+    assert client.containers.list() == []
+
+
+def test_discard_logs_a_host_directory_it_cannot_remove(tmp_path, monkeypatch, caplog):
+    manager = make_manager(tmp_path)
+    workspace = manager.acquire("session_a")
+    (tmp_path / "workspaces" / workspace.name / "owned_by_root.txt").write_text("")
+
+    def unlink(path, *args, **kwargs):
+        raise PermissionError(13, "Permission denied", path)
+
+    monkeypatch.setattr(os, "unlink", unlink)
+    with caplog.at_level("WARNING", logger="core.utils.workspace_manager"):
+        manager.release("session_a", reset=False)
+
+    assert "owned_by_root.txt" in caplog.text
+    manager.close()